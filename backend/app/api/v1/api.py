@@ -1,5 +1,6 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import db
+from app.api.v1.endpoints import db, graph
 
 api_router = APIRouter()
 api_router.include_router(db.router, prefix="/api", tags=["database"])
+api_router.include_router(graph.router, prefix="/api/graph", tags=["graph"])
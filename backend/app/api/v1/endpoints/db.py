@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException, Query
-from app.schemas.connection import ConnectionStringInput
+from fastapi import APIRouter, File, Form, Header, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core import config
+from app.schemas.connection import ConnectionStringInput, SchemaDiffRequest, SchemaSource, TableDetailsRequest
 from app.schemas.table_operations import (
     CreateDatabaseRequest, 
     CreateTableRequest, 
@@ -7,94 +10,326 @@ from app.schemas.table_operations import (
     DeleteTableRequest,
     QueryRequest
 )
+from app.services.bulk_import import IMPORT_FORMATS, guess_format, ndjson_events, start_import
 from app.services.db_manager import DBManager
+from app.services.encoding import render, render_table
+from app.services.executor import DBExecutor, db_endpoint
+from app.services.export import EXPORT_FORMATS, encode_rows
+from app.services.graph_layout import layout_cache
+from app.services.index_advisor import advise
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.query_engine import QueryCancelled, ndjson_stream, query_registry, run_query, start_query
+from app.services.schema_diff import diff_schemas
+from app.services.schema_graph import graph_index
+from app.services.snapshot_store import snapshot_store
+from typing import Optional
+import asyncio
 import json
 
 router = APIRouter()
 
 @router.post("/test-connection")
+@db_endpoint
 def test_connection(input: ConnectionStringInput):
     """Test database connection using the provided connection string"""
-    conn, db_type = DBManager.connect(input.connection_string)
-    
-    if conn:
-        if hasattr(conn, 'close'):
-            conn.close()
-        return {"status": "success", "message": f"Connected successfully to {db_type}"}
+    with DBManager.connection(input.connection_string) as (conn, db_type):
+        if conn:
+            return {"status": "success", "message": f"Connected successfully to {db_type}"}
     
     raise HTTPException(status_code=400, detail=f"Failed to connect to {db_type}")
 
 @router.post("/schema")
-def get_schema(input: ConnectionStringInput):
-    """Connect to database using the provided connection string and fetch schema"""
+@db_endpoint
+def get_schema(
+    input: ConnectionStringInput,
+    refresh: bool = Query(False),
+    full: bool = Query(False),
+    exact_counts: bool = Query(False),
+    workers: int = Query(config.INTROSPECTION_WORKERS, ge=1, le=64),
+    layout: Optional[str] = Query(None, pattern="^(layered|force)$"),
+    layout_iterations: int = Query(config.LAYOUT_ITERATIONS, ge=1, le=config.LAYOUT_MAX_ITERATIONS),
+    version: Optional[int] = Query(None, ge=1),
+    snapshot_fallback: bool = Query(True),
+    infer_relationships: bool = Query(False),
+    accept: Optional[str] = Header(None)
+):
+    """Connect to database using the provided connection string and fetch schema.
+
+    Row counts are catalog estimates (flagged "approximate") unless
+    exact_counts=true, which runs COUNT(*) per table under a timeout.
+    Full scans of large databases are split across `workers` connections.
+    layout=layered|force adds an ERD "position" ({x, y}) to every table;
+    layouts are cached per schema structure and tables that survive a
+    schema change keep their position. The X-Layout-Algorithm header names
+    the layout used (schemas over LAYOUT_FORCE_MAX_TABLES get layered even
+    for layout=force) and X-Layout-Incremental says whether only added
+    tables were placed.
+    `version` serves a stored snapshot without contacting the database;
+    if the database cannot be read, the latest snapshot is served instead
+    (unless snapshot_fallback=false). Either way the X-Schema-Snapshot
+    header carries the version id.
+    infer_relationships=true adds the relationships /schema/relationships
+    infers to each table's foreign_keys (flagged "inferred"), so the ERD
+    and its layout include them.
+    Send `Accept: application/msgpack` for a MessagePack body.
+    """
+    snapshot = None
     try:
-        schema = DBManager.fetch_schema(input.connection_string)
-        # Optional: Save to file for debugging/caching
-        with open("schema.json", "w", encoding="utf-8") as f:
-            json.dump(schema, f, ensure_ascii=False, indent=2)
-        return schema
+        if version is not None:
+            snapshot = snapshot_store.load(input.connection_string, version)
+            if snapshot is None:
+                raise HTTPException(status_code=404, detail=f"No schema snapshot {version} for this connection")
+            schema = snapshot[0]
+        else:
+            try:
+                schema, _ = DBManager.get_schema(
+                    input.connection_string, refresh=refresh, full=full, workers=workers
+                )
+            except Exception as e:
+                snapshot = snapshot_store.load(input.connection_string) if snapshot_fallback else None
+                if snapshot is None:
+                    raise
+                print(f"Error fetching schema, serving snapshot {snapshot[1]['version']}: {e}")
+                schema = snapshot[0]
+        if infer_relationships and snapshot is None:
+            _, schema = DBManager.infer_relationships(input.connection_string, schema)
+        positions = None
+        if layout:
+            graph = graph_index.graph_for(input.connection_string, schema)
+            computed = layout_cache.layout_for(
+                input.connection_string, graph, layout, layout_iterations
+            )
+            positions = computed["positions"]
+        if exact_counts and snapshot is None:
+            schema = DBManager.with_exact_counts(input.connection_string, schema)
+        if positions is not None:
+            # Copies: the cached schema itself stays layout-free
+            schema = {key: {**table, "position": positions[key]} for key, table in schema.items()}
+        response = render(schema, accept)
+        if snapshot is not None:
+            response.headers["X-Schema-Snapshot"] = str(snapshot[1]["version"])
+        if positions is not None:
+            response.headers["X-Layout-Algorithm"] = computed["algorithm"]
+            response.headers["X-Layout-Incremental"] = "true" if computed["incremental"] else "false"
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching schema: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/schema/snapshots")
+async def list_schema_snapshots(input: ConnectionStringInput, limit: int = Query(100, ge=1, le=1000)):
+    """Stored schema versions for this connection, newest first. Reads only
+    the local snapshot store, so it works while the database is down."""
+    try:
+        return {"versions": await run_in_threadpool(snapshot_store.versions, input.connection_string, limit)}
+    except Exception as e:
+        print(f"Error listing schema snapshots: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/schema/relationships")
+@db_endpoint
+def infer_schema_relationships(
+    input: ConnectionStringInput,
+    min_confidence: float = Query(config.INFERENCE_MIN_CONFIDENCE, ge=0, le=1),
+    max_queries: int = Query(config.INFERENCE_MAX_QUERIES, ge=1, le=1000),
+    refresh: bool = Query(False)
+):
+    """Propose relationships the database does not declare (MongoDB, or
+    schemas without FK constraints). Candidates come from column names and
+    types (customer_id -> customers.id), then sampled values of each
+    candidate are checked against the referenced key's sampled values.
+    Edges use the foreign_keys shape plus "inferred": true and a
+    "confidence" in [0, 1]. At most `max_queries` tables are sampled."""
+    try:
+        schema, _ = DBManager.get_schema(input.connection_string)
+        result, _ = DBManager.infer_relationships(
+            input.connection_string, schema, min_confidence, refresh, max_queries
+        )
+        return result
+    except ConnectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error inferring relationships: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/schema/indexes/advice")
+@db_endpoint
+def index_advice(
+    input: ConnectionStringInput,
+    refresh: bool = Query(False),
+    version: Optional[int] = Query(None, ge=1)
+):
+    """Foreign keys without a supporting index, plus duplicate and redundant
+    indexes, each with the table's estimated rows and size. Works from the
+    cached schema (or stored snapshot `version`), so it adds no queries
+    beyond introspection."""
+    try:
+        if version is not None:
+            snapshot = snapshot_store.load(input.connection_string, version)
+            if snapshot is None:
+                raise HTTPException(status_code=404, detail=f"No schema snapshot {version} for this connection")
+            schema = snapshot[0]
+        else:
+            schema, _ = DBManager.get_schema(input.connection_string, refresh=refresh)
+        return advise(schema)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error building index advice: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/schema/tables")
+@db_endpoint
+def list_schema_tables(
+    input: ConnectionStringInput,
+    pattern: Optional[str] = Query(None, max_length=256),
+    schema: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=config.SCHEMA_TABLES_MAX_PAGE),
+    offset: int = Query(0, ge=0)
+):
+    """Table names only, filtered and paged: the cheap first call before
+    /schema/tables/batch fetches definitions for the tables in view.
+    `pattern` matches anywhere in the name, or as a whole with * and ?
+    wildcards; matching ignores case."""
+    try:
+        return DBManager.list_tables_page(input.connection_string, pattern, schema, limit, offset)
+    except ConnectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error listing tables: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/schema/tables/batch")
+@db_endpoint
+def get_schema_tables(request: TableDetailsRequest):
+    """Definitions of the given tables, introspecting only those tables;
+    "missing" lists keys that do not exist"""
+    try:
+        tables = DBManager.get_table_details(request.connection_string, request.tables)
+        return {"tables": tables, "missing": [key for key in request.tables if key not in tables]}
+    except ConnectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error fetching table details: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/schema/tables/{table_key}")
+@db_endpoint
+def get_schema_table(table_key: str, input: ConnectionStringInput):
+    """Definition of one table, introspecting only that table"""
+    try:
+        tables = DBManager.get_table_details(input.connection_string, [table_key])
+    except ConnectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error fetching table details: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if table_key not in tables:
+        raise HTTPException(status_code=404, detail=f"Table '{table_key}' not found")
+    return tables[table_key]
+
+@router.post("/schema/changes")
+@db_endpoint
+def get_schema_changes(input: ConnectionStringInput, full: bool = Query(False)):
+    """Re-read only the tables that changed since the last snapshot and return the delta"""
+    try:
+        return DBManager.get_schema_changes(input.connection_string, full=full)
+    except Exception as e:
+        print(f"Error refreshing schema: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _diff_side(side: SchemaSource, refresh: bool) -> dict:
+    if side.version is None:
+        schema, _ = await DBExecutor.run(
+            side.connection_string, DBManager.get_schema, side.connection_string, refresh=refresh
+        )
+        return schema
+    snapshot = await run_in_threadpool(snapshot_store.load, side.connection_string, side.version)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No schema snapshot {side.version} for this connection")
+    return snapshot[0]
+
+@router.post("/schema/diff")
+async def diff_schema(request: SchemaDiffRequest):
+    """Compare two schemas: tables added, dropped and altered going from
+    source to target. Each side is a live database or, with `version`, one
+    of its stored snapshots. Both are read concurrently, live ones on their
+    own database type's pool; tables are compared by definition hash first,
+    so only changed ones are diffed column by column."""
+    try:
+        source, target = await asyncio.gather(*[_diff_side(side, request.refresh) for side in (request.source, request.target)])
+        return await run_in_threadpool(diff_schemas, source, target, request.include_definitions)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error diffing schemas: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/create-database")
+@db_endpoint
 def create_database(request: CreateDatabaseRequest):
     """Create a new database"""
     try:
-        conn, db_type = DBManager.connect(request.connection_string)
-        if not conn:
-            raise HTTPException(status_code=400, detail=f"Failed to connect to database")
-        
-        adapter = DBManager.get_adapter(db_type)
-        success = adapter.create_database(conn, request.database_name)
-        
-        if hasattr(conn, 'close'):
-            conn.close()
+        with DBManager.connection(request.connection_string) as (conn, db_type):
+            if not conn:
+                raise HTTPException(status_code=400, detail=f"Failed to connect to database")
+            
+            adapter = DBManager.get_adapter(db_type)
+            success = adapter.create_database(conn, request.database_name)
         
         if success:
             return {"status": "success", "message": f"Database '{request.database_name}' created successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to create database")
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error creating database: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        DBManager.invalidate_schema(request.connection_string)
 
 @router.post("/create-table")
+@db_endpoint
 def create_table(request: CreateTableRequest):
     """Create a new table"""
     try:
-        conn, db_type = DBManager.connect(request.connection_string)
-        if not conn:
-            raise HTTPException(status_code=400, detail=f"Failed to connect to database")
-        
-        adapter = DBManager.get_adapter(db_type)
-        columns = [col.dict() for col in request.columns]
-        success = adapter.create_table(conn, request.table_name, columns)
-        
-        if hasattr(conn, 'close'):
-            conn.close()
+        with DBManager.connection(request.connection_string) as (conn, db_type):
+            if not conn:
+                raise HTTPException(status_code=400, detail=f"Failed to connect to database")
+            
+            adapter = DBManager.get_adapter(db_type)
+            columns = [col.dict() for col in request.columns]
+            success = adapter.create_table(conn, request.table_name, columns)
         
         if success:
             return {"status": "success", "message": f"Table '{request.table_name}' created successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to create table")
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error creating table: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        DBManager.invalidate_schema(request.connection_string)
 
 @router.post("/update-table")
+@db_endpoint
 def update_table(request: UpdateTableRequest):
-    """Update/alter an existing table"""
+    """Update/alter an existing table.
+
+    Operations are compiled into as few ALTER statements as the engine
+    allows; the response's "plan" lists them with the operations that
+    rewrite the table or take locks. dry_run=true only returns the plan.
+    """
     try:
-        conn, db_type = DBManager.connect(request.connection_string)
-        if not conn:
-            raise HTTPException(status_code=400, detail=f"Failed to connect to database")
-        
-        adapter = DBManager.get_adapter(db_type)
         operations = []
         for op in request.operations:
             op_dict = {"type": op.type}
@@ -108,64 +343,241 @@ def update_table(request: UpdateTableRequest):
                 op_dict["newName"] = op.newName
             operations.append(op_dict)
         
-        success = adapter.alter_table(conn, request.table_name, operations)
-        
-        if hasattr(conn, 'close'):
-            conn.close()
+        with DBManager.connection(request.connection_string) as (conn, db_type):
+            if not conn:
+                raise HTTPException(status_code=400, detail=f"Failed to connect to database")
+            
+            adapter = DBManager.get_adapter(db_type)
+            plan = adapter.plan_alter(request.table_name, operations)
+            if request.dry_run:
+                return {"status": "success", "message": "Dry run: no changes made", "plan": plan}
+            success = adapter.alter_table(conn, request.table_name, operations)
         
         if success:
-            return {"status": "success", "message": f"Table '{request.table_name}' updated successfully"}
+            return {"status": "success", "message": f"Table '{request.table_name}' updated successfully", "plan": plan}
         else:
             raise HTTPException(status_code=500, detail="Failed to update table")
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error updating table: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not request.dry_run:
+            DBManager.invalidate_schema(request.connection_string)
 
 @router.delete("/delete-table")
+@db_endpoint
 def delete_table(request: DeleteTableRequest):
     """Delete a table"""
     try:
-        conn, db_type = DBManager.connect(request.connection_string)
-        if not conn:
-            raise HTTPException(status_code=400, detail=f"Failed to connect to database")
-        
-        adapter = DBManager.get_adapter(db_type)
-        success = adapter.drop_table(conn, request.table_name)
-        
-        if hasattr(conn, 'close'):
-            conn.close()
+        with DBManager.connection(request.connection_string) as (conn, db_type):
+            if not conn:
+                raise HTTPException(status_code=400, detail=f"Failed to connect to database")
+            
+            adapter = DBManager.get_adapter(db_type)
+            success = adapter.drop_table(conn, request.table_name)
         
         if success:
             return {"status": "success", "message": f"Table '{request.table_name}' deleted successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to delete table")
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error deleting table: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        DBManager.invalidate_schema(request.connection_string)
 
 @router.get("/table-data/{table_name}")
+@db_endpoint
 def get_table_data(
     table_name: str,
     connection_string: str = Query(...),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    pagination: str = Query("offset", pattern="^(offset|keyset)$"),
+    cursor: Optional[str] = Query(None),
+    layout: str = Query("rows", pattern="^(rows|columnar)$"),
+    exact_decimals: bool = Query(False),
+    accept: Optional[str] = Header(None)
 ):
-    """Get paginated data from a table"""
+    """Get paginated data from a table.
+
+    pagination=keyset seeks on the primary key instead of using OFFSET: pass
+    the returned next_cursor as `cursor` to get the following page. Tables
+    without a primary key fall back to offset paging.
+
+    layout=columnar sends field names once plus one value array per field.
+    The body is JSON unless Accept asks for application/msgpack or
+    application/vnd.apache.arrow.stream (always columnar). Decimals are
+    numbers unless exact_decimals=true, which sends their exact text.
+    """
     try:
-        conn, db_type = DBManager.connect(connection_string)
-        if not conn:
-            raise HTTPException(status_code=400, detail=f"Failed to connect to database")
+        after = decode_cursor(cursor) if cursor else None
+        with DBManager.connection(connection_string) as (conn, db_type):
+            if not conn:
+                raise HTTPException(status_code=400, detail=f"Failed to connect to database")
+            
+            adapter = DBManager.get_adapter(db_type)
+            data = None
+            if pagination == "keyset" or after is not None:
+                data = adapter.get_table_data_keyset(conn, table_name, limit, after)
+            if data is not None:
+                next_key = data.pop("next_key")
+                data["next_cursor"] = encode_cursor(next_key) if next_key is not None else None
+                data["pagination"] = "keyset"
+            else:
+                data = adapter.get_table_data(conn, table_name, limit, offset)
+                data["pagination"] = "offset"
         
-        adapter = DBManager.get_adapter(db_type)
-        data = adapter.get_table_data(conn, table_name, limit, offset)
-        
-        if hasattr(conn, 'close'):
-            conn.close()
-        
-        return data
+        return render_table(data, accept, layout, exact_decimals)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching table data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/profile/{table_name}")
+@db_endpoint
+def profile_table(
+    table_name: str,
+    connection_string: str = Query(...),
+    sample_size: int = Query(config.PROFILE_SAMPLE_ROWS, ge=1, le=config.PROFILE_MAX_SAMPLE_ROWS),
+    refresh: bool = Query(False),
+    accept: Optional[str] = Header(None)
+):
+    """Approximate per-column statistics from a random sample of the table:
+    null ratio, distinct count (HyperLogLog), min/max, most frequent values,
+    numeric quantiles and a string length histogram. Profiles are cached
+    for a while; refresh=true samples again."""
+    try:
+        profile = DBManager.profile_table(connection_string, table_name, sample_size, refresh)
+        return render(profile, accept)
+    except (ValueError, ConnectionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error profiling table: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/export/{table_name}")
+@db_endpoint
+def export_table(
+    table_name: str,
+    connection_string: str = Query(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filter: Optional[str] = Query(None, description='JSON object of column equality filters, e.g. {"status": "open"}'),
+    batch_size: int = Query(1000, ge=1, le=50000)
+):
+    """Stream a whole table (or a filtered subset) as NDJSON or CSV"""
+    try:
+        filters = json.loads(filter) if filter else None
+        if filters is not None and not isinstance(filters, dict):
+            raise ValueError("filter must be a JSON object")
+        columns, batches = DBManager.stream_table(connection_string, table_name, filters, batch_size)
+    except (ValueError, ConnectionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error exporting table: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        DBExecutor.iterate(connection_string, encode_rows(format, columns, batches)),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.{format}"'}
+    )
+
+@router.post("/import/{table_name}")
+@db_endpoint
+def import_table(
+    table_name: str,
+    file: UploadFile = File(...),
+    connection_string: str = Form(...),
+    format: Optional[str] = Form(None, pattern="^(csv|ndjson)$"),
+    batch_size: int = Form(config.IMPORT_BATCH_SIZE, ge=1, le=config.IMPORT_MAX_BATCH_SIZE)
+):
+    """Bulk-load a CSV (header row first) or NDJSON upload into a table.
+
+    Uses each engine's fast path (COPY, fast_executemany, multi-row INSERT,
+    unordered insert_many) one batch at a time, and streams NDJSON progress
+    events ending with a "summary" (or "error") line. Every engine stores
+    the same values: empty CSV fields are NULL, while in NDJSON "" stays an
+    empty string and null or absent keys are NULL.
+    """
+    fmt = format or guess_format(file.filename)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Pass format=csv or format=ndjson for this file")
+    try:
+        events = start_import(connection_string, table_name, fmt, file.file, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error importing into {table_name}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        DBExecutor.iterate(connection_string, ndjson_events(events)),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/query")
+@db_endpoint
+def execute_query(
+    request: QueryRequest,
+    layout: str = Query("rows", pattern="^(rows|columnar)$"),
+    exact_decimals: bool = Query(False),
+    accept: Optional[str] = Header(None)
+):
+    """Run an ad-hoc SQL statement (or a MongoDB find/aggregate JSON spec).
+
+    At most max_rows rows are returned ("truncated" says whether more
+    existed) and the query is cancelled after timeout_ms. With stream=true
+    the result is sent as NDJSON batches as they are read; otherwise
+    read-only statements may be answered from the result cache ("cached"),
+    for cache_ttl seconds at most. Either way the
+    query can be cancelled through /query/{query_id}/cancel; the id is
+    returned in the body and the X-Query-Id header. exact_decimals=true
+    sends decimals as exact strings rather than numbers.
+    """
+    options = {
+        "params": request.params,
+        "max_rows": request.max_rows,
+        "timeout_ms": request.timeout_ms,
+        "batch_size": request.batch_size,
+        "query_id": request.query_id,
+    }
+    try:
+        if request.stream:
+            # Streams are never cached
+            handle, fields, batches = start_query(request.connection_string, request.query, **options)
+            return StreamingResponse(
+                DBExecutor.iterate(request.connection_string, ndjson_stream(handle, fields, batches, exact_decimals)),
+                media_type="application/x-ndjson",
+                headers={"X-Query-Id": handle.query_id}
+            )
+        
+        result = run_query(request.connection_string, request.query, cache_ttl=request.cache_ttl, **options)
+        response = render_table(result, accept, layout, exact_decimals)
+        response.headers["X-Query-Id"] = result["query_id"]
+        return response
+    except QueryCancelled as e:
+        raise HTTPException(status_code=408 if e.reason == "timeout" else 409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error executing query: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/query/{query_id}/cancel")
+async def cancel_query(query_id: str, input: ConnectionStringInput):
+    """Cancel a running /query. Not routed through DBExecutor, so it never
+    queues behind the query it is cancelling."""
+    cancelled = await run_in_threadpool(query_registry.cancel, query_id, input.connection_string)
+    if not cancelled:
+        raise HTTPException(status_code=404, detail=f"No running query '{query_id}' for this connection")
+    return {"status": "success", "message": f"Query '{query_id}' cancelled"}
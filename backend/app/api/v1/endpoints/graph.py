@@ -0,0 +1,90 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.schemas.connection import ConnectionStringInput
+from app.schemas.graph import NeighborhoodRequest, JoinPathRequest
+from app.services.db_manager import DBManager
+from app.services.executor import db_endpoint
+from app.services.schema_graph import SchemaGraph, graph_index
+
+router = APIRouter()
+
+def _graph(connection_string: str, refresh: bool = False) -> SchemaGraph:
+    """Relationship graph of the cached schema; only rebuilt when the schema is"""
+    schema, _ = DBManager.get_schema(connection_string, refresh=refresh)
+    return graph_index.graph_for(connection_string, schema)
+
+def _table(graph: SchemaGraph, table: str) -> str:
+    key = graph.resolve(table)
+    if key is None:
+        raise HTTPException(status_code=404, detail=f"Table '{table}' not found (or ambiguous without a schema)")
+    return key
+
+@router.post("/summary")
+@db_endpoint
+def graph_summary(input: ConnectionStringInput, refresh: bool = Query(False)):
+    """Table and edge counts, cycles, orphans and foreign keys whose target table could not be found"""
+    try:
+        return _graph(input.connection_string, refresh).summary()
+    except Exception as e:
+        print(f"Error building relationship graph: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/neighborhood")
+@db_endpoint
+def graph_neighborhood(request: NeighborhoodRequest):
+    """Tables within `hops` foreign keys of a table, with their distance and the edges between them"""
+    try:
+        graph = _graph(request.connection_string)
+        return graph.neighborhood(_table(graph, request.table), request.hops, request.direction)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error reading table neighborhood: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/join-path")
+@db_endpoint
+def graph_join_path(request: JoinPathRequest):
+    """Shortest chain of foreign-key joins between two tables, followed in either direction"""
+    try:
+        graph = _graph(request.connection_string)
+        source, target = _table(graph, request.source), _table(graph, request.target)
+        path = graph.join_path(source, target)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"No foreign-key path between '{source}' and '{target}'")
+        return {"source": source, "target": target, "joins": len(path), "path": path}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error finding join path: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/orphans")
+@db_endpoint
+def graph_orphans(input: ConnectionStringInput):
+    """Tables that neither reference nor are referenced by another table"""
+    try:
+        return {"orphans": _graph(input.connection_string).orphans()}
+    except Exception as e:
+        print(f"Error finding orphan tables: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/cycles")
+@db_endpoint
+def graph_cycles(input: ConnectionStringInput):
+    """Groups of tables whose foreign keys form a cycle (including self-references)"""
+    try:
+        return {"cycles": _graph(input.connection_string).cycles()}
+    except Exception as e:
+        print(f"Error finding reference cycles: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/order")
+@db_endpoint
+def graph_order(input: ConnectionStringInput):
+    """Tables ordered so referenced tables come before the tables referencing them
+    (a safe load order; tables in a cycle are adjacent)"""
+    try:
+        return {"order": _graph(input.connection_string).topological_order()}
+    except Exception as e:
+        print(f"Error ordering tables: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
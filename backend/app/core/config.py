@@ -0,0 +1,97 @@
+import os
+
+# Connection pooling (see app/services/connection_pool.py)
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+DB_POOL_MAX_POOLS = int(os.getenv("DB_POOL_MAX_POOLS", "32"))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "30"))
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+
+# Schema cache (see app/services/schema_cache.py)
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", "300"))
+SCHEMA_CACHE_MAX_BYTES = int(os.getenv("SCHEMA_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Seconds a target's change markers (its "has anything changed" probe) are reused
+SCHEMA_PROBE_INTERVAL = float(os.getenv("SCHEMA_PROBE_INTERVAL", "5"))
+# Schema snapshot store (see app/services/snapshot_store.py): SQLite file that
+# keeps a version per introspection (empty disables it), versions kept per target
+SNAPSHOT_DB_PATH = os.getenv("SNAPSHOT_DB_PATH", "schema_snapshots.db")
+SNAPSHOT_MAX_VERSIONS = int(os.getenv("SNAPSHOT_MAX_VERSIONS", "200"))
+
+# Exact row counts (/api/schema?exact_counts=true)
+EXACT_COUNT_WORKERS = int(os.getenv("EXACT_COUNT_WORKERS", str(DB_POOL_MAX_SIZE)))
+EXACT_COUNT_TIMEOUT_MS = int(os.getenv("EXACT_COUNT_TIMEOUT_MS", "5000"))
+
+# Driver thread pools (see app/services/executor.py). DB_EXECUTOR_WORKERS_<DBTYPE>
+# (e.g. DB_EXECUTOR_WORKERS_SQLSERVER) overrides the size for one database type.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "16"))
+# Concurrent calls allowed against a single connection string
+DB_TARGET_CONCURRENCY = int(os.getenv("DB_TARGET_CONCURRENCY", str(DB_POOL_MAX_SIZE)))
+
+
+def executor_workers(db_type: str) -> int:
+    return int(os.getenv(f"DB_EXECUTOR_WORKERS_{db_type.upper()}", str(DB_EXECUTOR_WORKERS)))
+
+# Parallel introspection: full scans of at least PARALLEL_INTROSPECTION_MIN_TABLES
+# tables are split across INTROSPECTION_WORKERS pooled connections
+INTROSPECTION_WORKERS = int(os.getenv("INTROSPECTION_WORKERS", "4"))
+PARALLEL_INTROSPECTION_MIN_TABLES = int(os.getenv("PARALLEL_INTROSPECTION_MIN_TABLES", "200"))
+
+# MongoDB schema inference: documents sampled per collection, collections
+# described concurrently, and how deep nested documents are walked
+MONGO_SAMPLE_SIZE = int(os.getenv("MONGO_SAMPLE_SIZE", "1000"))
+MONGO_INFERENCE_WORKERS = int(os.getenv("MONGO_INFERENCE_WORKERS", "8"))
+MONGO_MAX_FIELD_DEPTH = int(os.getenv("MONGO_MAX_FIELD_DEPTH", "8"))
+
+# Ad-hoc /api/query limits
+QUERY_DEFAULT_MAX_ROWS = int(os.getenv("QUERY_DEFAULT_MAX_ROWS", "1000"))
+QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", "100000"))
+QUERY_DEFAULT_TIMEOUT_MS = int(os.getenv("QUERY_DEFAULT_TIMEOUT_MS", "30000"))
+QUERY_MAX_TIMEOUT_MS = int(os.getenv("QUERY_MAX_TIMEOUT_MS", "600000"))
+
+# /api/query result cache: default per-entry TTL (seconds, 0 disables),
+# total byte budget, and how long a probed schema version is trusted
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "60"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+RESULT_CACHE_VERSION_INTERVAL = float(os.getenv("RESULT_CACHE_VERSION_INTERVAL", "5"))
+
+# Bulk import: rows sent to the database per batch (and the largest batch a request may ask for)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+IMPORT_MAX_BATCH_SIZE = int(os.getenv("IMPORT_MAX_BATCH_SIZE", "50000"))
+
+# Server-side ERD layout (/schema?layout=...): default and largest iteration
+# budget, how many computed layouts are kept, and the most tables laid out
+# with layout=force (larger schemas get the layered layout instead)
+LAYOUT_ITERATIONS = int(os.getenv("LAYOUT_ITERATIONS", "100"))
+LAYOUT_MAX_ITERATIONS = int(os.getenv("LAYOUT_MAX_ITERATIONS", "1000"))
+LAYOUT_CACHE_ENTRIES = int(os.getenv("LAYOUT_CACHE_ENTRIES", "64"))
+LAYOUT_FORCE_MAX_TABLES = int(os.getenv("LAYOUT_FORCE_MAX_TABLES", "3000"))
+
+# Lazy schema API: largest page of /schema/tables and most tables per detail batch
+SCHEMA_TABLES_MAX_PAGE = int(os.getenv("SCHEMA_TABLES_MAX_PAGE", "1000"))
+SCHEMA_DETAIL_MAX_TABLES = int(os.getenv("SCHEMA_DETAIL_MAX_TABLES", "500"))
+
+# Column profiling (/api/profile): default and largest sample, top values
+# reported, values kept for quantiles, and how long profiles are cached
+PROFILE_SAMPLE_ROWS = int(os.getenv("PROFILE_SAMPLE_ROWS", "10000"))
+PROFILE_MAX_SAMPLE_ROWS = int(os.getenv("PROFILE_MAX_SAMPLE_ROWS", "200000"))
+PROFILE_TOP_K = int(os.getenv("PROFILE_TOP_K", "10"))
+PROFILE_RESERVOIR_SIZE = int(os.getenv("PROFILE_RESERVOIR_SIZE", "2048"))
+PROFILE_TIMEOUT_MS = int(os.getenv("PROFILE_TIMEOUT_MS", "30000"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "600"))
+PROFILE_CACHE_ENTRIES = int(os.getenv("PROFILE_CACHE_ENTRIES", "256"))
+
+# Inferred relationships (/api/schema/relationships): rows sampled from
+# referencing tables and from referenced key columns, the most tables sampled
+# per run (one query each), concurrent samples, per-query timeout, and the
+# lowest confidence reported
+INFERENCE_SAMPLE_ROWS = int(os.getenv("INFERENCE_SAMPLE_ROWS", "5000"))
+INFERENCE_KEY_SAMPLE_ROWS = int(os.getenv("INFERENCE_KEY_SAMPLE_ROWS", "50000"))
+INFERENCE_MAX_QUERIES = int(os.getenv("INFERENCE_MAX_QUERIES", "50"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(INTROSPECTION_WORKERS)))
+INFERENCE_TIMEOUT_MS = int(os.getenv("INFERENCE_TIMEOUT_MS", "10000"))
+INFERENCE_MIN_CONFIDENCE = float(os.getenv("INFERENCE_MIN_CONFIDENCE", "0.7"))
+
+# Instrumentation: Prometheus metrics on /metrics (adapter, driver and
+# endpoint latency, rows and bytes), and a per-request Server-Timing header
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
@@ -1,8 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from app.api.v1.api import api_router
+from app.core import config
+from app.services.db_manager import DBManager
+from app.services.executor import DBExecutor
+from app.services.instrumentation import MetricsMiddleware
+from app.services.metrics import registry
 
-app = FastAPI(title="Database Intelligence Engine API")
+
+async def prune_pools_periodically():
+    """Close idle pooled connections even when no requests arrive"""
+    while True:
+        await asyncio.sleep(max(1.0, config.DB_POOL_IDLE_TIMEOUT / 2))
+        await run_in_threadpool(DBManager.prune_pools)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pruner = asyncio.create_task(prune_pools_periodically())
+    try:
+        yield
+    finally:
+        pruner.cancel()
+        DBExecutor.shutdown()
+        DBManager.close_all()
+
+
+app = FastAPI(title="Database Intelligence Engine API", lifespan=lifespan)
 
 # Allow CORS
 app.add_middleware(
@@ -10,10 +38,20 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers only let scripts read these when listed
+    expose_headers=["X-Schema-Snapshot", "X-Layout-Algorithm", "X-Layout-Incremental", "X-Query-Id"],
 )
 
+# Outermost, so request timings cover CORS handling and error responses too
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router)
 
 @app.get("/")
 def root():
     return {"message": "Welcome to Database Intelligence Engine API"}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
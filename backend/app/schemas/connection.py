@@ -1,4 +1,20 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.core import config
 
 class ConnectionStringInput(BaseModel):
     connection_string: str
+
+class SchemaSource(BaseModel):
+    connection_string: str
+    version: Optional[int] = None  # A stored snapshot instead of the live schema
+
+class SchemaDiffRequest(BaseModel):
+    source: SchemaSource
+    target: SchemaSource
+    refresh: bool = False  # Re-read both schemas instead of using cached copies
+    include_definitions: bool = False  # Send full definitions of added tables
+
+class TableDetailsRequest(BaseModel):
+    connection_string: str
+    tables: List[str] = Field(..., min_length=1, max_length=config.SCHEMA_DETAIL_MAX_TABLES)  # Schema keys
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+class NeighborhoodRequest(BaseModel):
+    connection_string: str
+    table: str  # Schema key ("public.orders") or bare table name
+    hops: int = Field(1, ge=1, le=10)
+    direction: str = Field("both", pattern="^(in|out|both)$")  # out: tables it references; in: tables referencing it
+
+class JoinPathRequest(BaseModel):
+    connection_string: str
+    source: str
+    target: str
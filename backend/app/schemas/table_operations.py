@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
+from app.core import config
 
 class ColumnDefinition(BaseModel):
     name: str
@@ -29,6 +30,7 @@ class UpdateTableRequest(BaseModel):
     connection_string: str
     table_name: str
     operations: List[AlterOperation]
+    dry_run: bool = False  # Return the DDL plan without running it
 
 class DeleteTableRequest(BaseModel):
     connection_string: str
@@ -36,4 +38,11 @@ class DeleteTableRequest(BaseModel):
 
 class QueryRequest(BaseModel):
     connection_string: str
-    query: str
+    query: str  # SQL, or a JSON find/aggregate spec for MongoDB
+    params: Optional[List[Any]] = None  # Bound with the driver's placeholder style
+    query_id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_-]{1,64}$")  # Generated when omitted
+    max_rows: int = Field(config.QUERY_DEFAULT_MAX_ROWS, ge=1, le=config.QUERY_MAX_ROWS)
+    timeout_ms: int = Field(config.QUERY_DEFAULT_TIMEOUT_MS, ge=1, le=config.QUERY_MAX_TIMEOUT_MS)
+    batch_size: int = Field(500, ge=1, le=10000)
+    stream: bool = False  # NDJSON batches instead of one response
+    cache_ttl: Optional[float] = Field(None, ge=0, le=86400)  # Seconds; 0 skips the result cache
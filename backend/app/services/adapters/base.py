@@ -1,14 +1,267 @@
+import hashlib
+import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+from app.services.instrumentation import instrument_adapter
+
+# DB-API exception classes raised when the connection is lost or closed
+_DISCONNECT_ERRORS = {"OperationalError", "InterfaceError"}
+
+_LEADING_NOISE = re.compile(r"^(\s+|--[^\n]*(\n|$)|/\*.*?\*/|\()+", re.DOTALL)
+
+def empty_table_schema() -> Dict[str, Any]:
+    """Per-table dict shape shared by every adapter's fetch_schema"""
+    return {
+        "columns": [],
+        "column_types": {},
+        "nullable": {},
+        "primary_keys": [],
+        "foreign_keys": [],
+        "indexes": [],
+        "row_count": 0,
+        # row_count comes from catalog statistics unless counted exactly
+        "approximate": True,
+        # Estimated bytes of table data, of all its indexes, and per index
+        # where the catalog reports it
+        "size_bytes": 0,
+        "index_bytes": 0,
+        "index_sizes": {},
+    }
+
+
+def index_entry(
+    name: str,
+    columns: List[str],
+    unique: bool = False,
+    primary: bool = False,
+    partial: bool = False,
+    method: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One element of a table's "indexes": key columns in index order
+    (expressions as text); partial means filtered to a subset of rows"""
+    return {
+        "name": name,
+        "columns": list(columns),
+        "unique": bool(unique or primary),
+        "primary": bool(primary),
+        "partial": bool(partial),
+        "method": method.lower() if method else None,
+    }
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield successive lists of at most `size` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def statement_keyword(sql: str) -> str:
+    """First keyword of a SQL statement, lower-cased, skipping comments"""
+    match = re.match(r"[A-Za-z]+", _LEADING_NOISE.sub("", sql))
+    return match.group(0).lower() if match else ""
+
+
+def marker_digest(markers: Dict[str, str]) -> str:
+    """Digest of a target's change markers: moves whenever any table definition does"""
+    digest = hashlib.sha256()
+    for key in sorted(markers):
+        digest.update(f"{key}={markers[key]};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def check_filter_columns(filters: Dict[str, Any], columns: Iterable[str]):
+    """Reject equality filters (e.g. /export's filter) on names that are not
+    columns of the table"""
+    known = set(columns)
+    unknown = [str(col) for col in filters if col not in known]
+    if unknown:
+        raise ValueError(f"Unknown filter column(s): {', '.join(unknown)}")
+
+
+def documents_to_rows(docs: List[Dict[str, Any]], missing: Any = None) -> tuple:
+    """(field names in first-seen order, one tuple per document), with
+    `missing` for the fields a document does not have"""
+    fields = {}
+    for doc in docs:
+        for key in doc:
+            fields.setdefault(key, None)
+    names = list(fields)
+    return names, [tuple(doc.get(key, missing) for key in names) for doc in docs]
+
+
+def sample_percent(row_estimate: Optional[float], sample_size: int) -> Optional[float]:
+    """Share of a table (in percent) to sample for about `sample_size` rows,
+    slightly over so a LIMIT rarely has to cut it; None means read up to
+    sample_size rows without sampling (small or never-analyzed tables)"""
+    if not row_estimate or row_estimate <= sample_size * 2:
+        return None
+    return round(min(100.0, 110.0 * sample_size / row_estimate), 6)
+
+
+def like_pattern(pattern: str) -> str:
+    """SQL LIKE pattern (backslash escape) for a table name filter: `*` and
+    `?` are wildcards; without them the filter matches anywhere in the name"""
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    if "*" not in pattern and "?" not in pattern:
+        return f"%{escaped}%"
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+def name_regex(pattern: str) -> str:
+    """The same filter as like_pattern, as a regular expression"""
+    if "*" not in pattern and "?" not in pattern:
+        return re.escape(pattern)
+    return "^" + "".join(
+        ".*" if char == "*" else "." if char == "?" else re.escape(char) for char in pattern
+    ) + "$"
+
+
+def filter_table_refs(refs: Iterable[Dict[str, Any]], pattern: Optional[str], schema_name: Optional[str]) -> List[Dict[str, Any]]:
+    """table_ref dicts whose name matches `pattern` and whose schema is `schema_name`"""
+    regex = re.compile(name_regex(pattern), re.IGNORECASE) if pattern else None
+    return [
+        ref for ref in refs
+        if (regex is None or regex.search(ref["name"]))
+        and (schema_name is None or ref["schema"] == schema_name)
+    ]
+
 
 class BaseAdapter(ABC):
+    # Label for metrics
+    db_type = "unknown"
+    # True when one connection object can safely serve concurrent callers
+    shareable_connections = False
+    # Hand out DB-API connections whose cursors time every driver call
+    instrument_cursors = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_adapter(cls)
+
     @abstractmethod
     def connect(self, connection_string: str):
         pass
 
+    def ping(self, conn) -> bool:
+        """Cheap round trip used to health check pooled connections"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+        return True
+
+    def reset(self, conn):
+        """Return a pooled connection to a clean state (no open transaction)"""
+        conn.rollback()
+
+    def close(self, conn):
+        """Close a connection returned by connect()"""
+        conn.close()
+
+    def is_disconnect(self, error: BaseException) -> bool:
+        """Whether `error` means the connection itself is unusable, as
+        opposed to a failed statement or an error in the caller. DB-API
+        drivers raise OperationalError or InterfaceError for lost
+        connections (and for some statement failures, which only costs a
+        reconnect)."""
+        return isinstance(error, (ConnectionError, TimeoutError)) or any(
+            cls.__name__ in _DISCONNECT_ERRORS for cls in type(error).__mro__
+        )
+
     @abstractmethod
     def fetch_schema(self, conn) -> dict:
         pass
+
+    def list_tables(self, conn) -> List[str]:
+        """Schema keys of every table, in fetch_schema order"""
+        return list(self.fetch_schema(conn))
+
+    def table_ref(self, key: str) -> Dict[str, Optional[str]]:
+        """{"key", "schema", "name"} of a schema key"""
+        schema_name, _, name = key.rpartition(".")
+        return {"key": key, "schema": schema_name or None, "name": name}
+
+    def search_tables(
+        self,
+        conn,
+        pattern: Optional[str] = None,
+        schema_name: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> tuple:
+        """(one page of table_ref dicts in key order, total matches) for
+        tables whose name matches `pattern` (see like_pattern), case-insensitively,
+        in `schema_name`. Adapters push the filter and paging into the catalog."""
+        refs = filter_table_refs(map(self.table_ref, sorted(self.list_tables(conn))), pattern, schema_name)
+        return refs[offset:offset + limit], len(refs)
+
+    def fetch_tables(self, conn, tables: Optional[List[str]] = None) -> dict:
+        """Introspect only the given schema keys (every table when None)"""
+        schema = self.fetch_schema(conn)
+        if tables is None:
+            return schema
+        return {key: schema[key] for key in tables if key in schema}
+
+    def stream_rows(
+        self, conn, table_name: str, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000
+    ) -> Iterator[Any]:
+        """Read a whole table (optionally filtered by column equality) through a
+        server-side cursor.
+
+        The first item yielded is the list of column names (None for
+        schemaless stores, whose rows are dicts); every following item is a
+        batch of at most batch_size rows.
+        """
+        raise NotImplementedError
+
+    def sample_rows(self, conn, table_name: str, sample_size: int, timeout_ms: int, batch_size: int = 1000) -> Iterator[Any]:
+        """About `sample_size` rows picked without a full read (TABLESAMPLE,
+        $sample and the like), in the stream_rows shape: column names (None
+        for schemaless stores) first, then batches"""
+        raise NotImplementedError
+
+    def execute_query(
+        self, conn, query: str, params: Optional[List[Any]], handle, batch_size: int = 500
+    ) -> Iterator[Any]:
+        """Run an ad-hoc statement for the /query engine.
+
+        Yields like stream_rows: first the field names ([] when the statement
+        returns no rows, None for schemaless stores), then batches. The
+        adapter applies handle.timeout_ms where the engine supports it, sets
+        handle.on_cancel to something that interrupts the running statement
+        from another thread, and records handle.rows_affected.
+        """
+        raise NotImplementedError
+
+    def bulk_insert(self, conn, table_name: str, columns: Optional[List[str]], rows: List[Any]) -> int:
+        """Load one batch through the engine's fast path and commit it.
+
+        `rows` are tuples in `columns` order, or documents (dicts) when
+        columns is None. Returns the number of rows written.
+        """
+        raise NotImplementedError
+
+    def count_rows(self, conn, table_key: str, timeout_ms: int) -> int:
+        """Exact row count for one schema key, cancelled after timeout_ms"""
+        raise NotImplementedError
+
+    def fetch_change_markers(self, conn) -> Optional[Dict[str, str]]:
+        """Map every schema key to a value that changes whenever the table's
+        definition does. None means the engine has no usable markers and
+        refreshes always rescan everything."""
+        return None
+
+    def schema_version(self, conn) -> Optional[str]:
+        """Digest of the change markers: moves whenever any table definition does"""
+        markers = self.fetch_change_markers(conn)
+        return marker_digest(markers) if markers is not None else None
     
     @abstractmethod
     def create_database(self, conn, db_name: str) -> bool:
@@ -24,6 +277,11 @@ class BaseAdapter(ABC):
     def alter_table(self, conn, table_name: str, operations: List[Dict[str, Any]]) -> bool:
         """Alter an existing table (add/modify/drop columns)"""
         pass
+
+    def plan_alter(self, table_name: str, operations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Statements alter_table would run, with rewrite and lock notes.
+        None for engines without DDL."""
+        return None
     
     @abstractmethod
     def drop_table(self, conn, table_name: str) -> bool:
@@ -32,5 +290,20 @@ class BaseAdapter(ABC):
     
     @abstractmethod
     def get_table_data(self, conn, table_name: str, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
-        """Fetch paginated data from a table"""
+        """Fetch paginated data from a table.
+
+        Rows come back as tuples under "rows", with their field names once
+        under "fields"; the endpoint picks the wire layout.
+        """
         pass
+
+    def get_table_data_keyset(
+        self, conn, table_name: str, limit: int = 100, after: Optional[List[Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch the page of rows whose primary key sorts after `after`.
+
+        Reads limit + 1 rows to work out hasMore without a COUNT(*) and
+        returns the last row's key as "next_key". Returns None when the
+        table has no primary key to seek on.
+        """
+        return None
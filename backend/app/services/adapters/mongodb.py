@@ -1,52 +1,203 @@
 import pymongo
+from bson import ObjectId, json_util
 from urllib.parse import urlparse
-from .base import BaseAdapter
-from typing import List, Dict, Any
+from .base import BaseAdapter, documents_to_rows, index_entry, name_regex
+from app.core import config
+from app.services.encoding import MISSING
+from app.services.instrumentation import bind, mongo_listeners
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _walk(value: Any, path: str, depth: int, seen: Dict[str, set]):
+    """Record the type of `value` at `path`, then descend into it"""
+    types = seen.setdefault(path, set())
+    if not isinstance(value, list):
+        types.add(_type_name(value))
+        if isinstance(value, dict) and depth < config.MONGO_MAX_FIELD_DEPTH:
+            for key, child in value.items():
+                _walk(child, f"{path}.{key}", depth + 1, seen)
+        return
+    
+    # Subdocuments inside arrays share the array's path, as in Mongo's own
+    # dotted queries; scalar elements are reported as array<type>
+    element_types = set()
+    for item in value:
+        element_types.add(_type_name(item))
+        if isinstance(item, dict) and depth < config.MONGO_MAX_FIELD_DEPTH:
+            for key, child in item.items():
+                _walk(child, f"{path}.{key}", depth + 1, seen)
+    if element_types:
+        types.update(f"array<{name}>" for name in element_types)
+    else:
+        types.add("array")
+
+
+def infer_fields(documents: Iterable[Dict[str, Any]]) -> Dict[Optional[str], Any]:
+    """Merge the field paths of sampled documents.
+
+    Returns {path: {"types": set, "count": documents containing it}} in
+    first-seen order (top-level _id first), plus the number of documents
+    read under the None key.
+    """
+    fields: Dict[Optional[str], Any] = {"_id": {"types": set(), "count": 0}}
+    sampled = 0
+    for doc in documents:
+        sampled += 1
+        seen: Dict[str, set] = {}
+        for key, value in doc.items():
+            _walk(value, key, 1, seen)
+        for path, types in seen.items():
+            field = fields.setdefault(path, {"types": set(), "count": 0})
+            field["types"] |= types
+            field["count"] += 1
+    if not fields["_id"]["count"]:
+        del fields["_id"]
+    fields[None] = sampled
+    return fields
+
 
 class MongoAdapter(BaseAdapter):
+    db_type = "mongodb"
+    # MongoClient is thread-safe and pools its own sockets
+    shareable_connections = True
+    # Commands are timed by a pymongo CommandListener instead
+    instrument_cursors = False
+
     def connect(self, connection_string: str):
         try:
-            client = pymongo.MongoClient(connection_string)
             db_name = urlparse(connection_string).path.lstrip("/")
             if not db_name:
                 raise ValueError("Database name must be specified in the MongoDB URI")
+            client = pymongo.MongoClient(connection_string, event_listeners=mongo_listeners)
             return client[db_name]
         except Exception as e:
             print(f"MongoDB Connection failed: {e}")
             return None
 
+    def ping(self, db) -> bool:
+        db.client.admin.command("ping")
+        return True
+
+    def reset(self, db):
+        # No transactions are left open between requests
+        pass
+
+    def close(self, db):
+        db.client.close()
+
+    def is_disconnect(self, error: BaseException) -> bool:
+        # MongoClient reconnects by itself after network errors; only a
+        # client that can no longer reach any server is worth replacing
+        return isinstance(error, pymongo.errors.ServerSelectionTimeoutError)
+
     def fetch_schema(self, db) -> dict:
-        schema = {}
-        collections = db.list_collection_names()
+        return self.fetch_tables(db)
+
+    def list_tables(self, db) -> List[str]:
+        return sorted(db.list_collection_names())
+
+    def table_ref(self, key: str) -> Dict[str, Optional[str]]:
+        # Collection names may contain dots; there is no schema level
+        return {"key": key, "schema": None, "name": key}
+
+    def search_tables(
+        self,
+        db,
+        pattern: Optional[str] = None,
+        schema_name: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> tuple:
+        if schema_name is not None:
+            return [], 0
+        name_filter = {"name": {"$regex": name_regex(pattern), "$options": "i"}} if pattern else None
+        names = sorted(db.list_collection_names(filter=name_filter))
+        return [self.table_ref(name) for name in names[offset:offset + limit]], len(names)
+
+    def fetch_tables(self, db, tables: Optional[List[str]] = None) -> dict:
+        collections = self.list_tables(db)
+        if tables is not None:
+            wanted = set(tables)
+            collections = [name for name in collections if name in wanted]
+        if not collections:
+            return {}
         
-        for col_name in collections:
-            collection = db[col_name]
-            sample_doc = collection.find_one()
-            
-            columns = []
-            column_types = {}
-            nullable = {}
-            primary_keys = ["_id"]
-            
-            if sample_doc:
-                for key, value in sample_doc.items():
-                    columns.append(key)
-                    column_types[key] = type(value).__name__
-                    nullable[key] = False
-            
-            foreign_keys = []
-            row_count = collection.count_documents({})
-            
-            schema[col_name] = {
-                "columns": columns,
-                "column_types": column_types,
-                "nullable": nullable,
-                "primary_keys": primary_keys,
-                "foreign_keys": foreign_keys,
-                "row_count": row_count
-            }
-            
-        return schema
+        # Collections are sampled independently; MongoClient is thread-safe
+        workers = max(1, min(config.MONGO_INFERENCE_WORKERS, len(collections)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            described = executor.map(bind(lambda name: self._describe_collection(db[name])), collections)
+            return dict(zip(collections, described))
+
+    def _describe_collection(self, collection, sample_size: int = config.MONGO_SAMPLE_SIZE) -> dict:
+        # $sample picks random documents without scanning the whole collection
+        # (for small collections it just returns everything, shuffled)
+        documents = collection.aggregate([{"$sample": {"size": max(1, sample_size)}}])
+        fields = infer_fields(documents)
+        sampled = fields.pop(None)
+        
+        columns = list(fields)
+        column_types = {}
+        nullable = {}
+        presence = {}
+        for path, info in fields.items():
+            column_types[path] = "|".join(sorted(info["types"] - {"null"})) or "null"
+            presence[path] = round(info["count"] / sampled, 4) if sampled else 0.0
+            nullable[path] = presence[path] < 1 or "null" in info["types"]
+        
+        foreign_keys = []
+        # Collection metadata count; count_documents({}) scans the whole collection
+        row_count = collection.estimated_document_count()
+        indexes = [
+            index_entry(
+                name,
+                [field for field, _ in info["key"]],
+                info.get("unique", False),
+                name == "_id_",
+                "partialFilterExpression" in info or info.get("sparse", False),
+                # Ascending/descending keys are B-trees; otherwise "hashed", "text", "2dsphere"...
+                next((kind for _, kind in info["key"] if isinstance(kind, str)), "btree"),
+            )
+            for name, info in sorted(collection.index_information().items())
+        ]
+        sizes = self._storage_stats(collection)
+        
+        return {
+            "columns": columns,
+            "column_types": column_types,
+            "nullable": nullable,
+            "presence": presence,
+            "sampled_documents": sampled,
+            "primary_keys": ["_id"],
+            "foreign_keys": foreign_keys,
+            "indexes": indexes,
+            "row_count": row_count,
+            "approximate": True,
+            "size_bytes": sizes.get("size", 0),
+            "index_bytes": sizes.get("totalIndexSize", 0),
+            "index_sizes": sizes.get("indexSizes", {}),
+        }
+
+    def _storage_stats(self, collection) -> dict:
+        """size, totalIndexSize and indexSizes from $collStats ({} for views
+        or without the privilege to read them)"""
+        try:
+            stats = next(collection.aggregate([{"$collStats": {"storageStats": {}}}]), None)
+        except pymongo.errors.PyMongoError:
+            return {}
+        return (stats or {}).get("storageStats", {})
+
+    def count_rows(self, db, table_key: str, timeout_ms: int) -> int:
+        return db[table_key].count_documents({}, maxTimeMS=int(timeout_ms))
 
     def create_database(self, db, db_name: str) -> bool:
         # MongoDB creates databases implicitly when you insert data
@@ -152,19 +303,14 @@ class MongoAdapter(BaseAdapter):
                 for key in rows[0].keys():
                     columns.append({"name": key, "type": type(rows[0][key]).__name__})
             
-            # Convert ObjectId to string for JSON serialization
-            data = []
-            for row in rows:
-                row_dict = {}
-                for key, value in row.items():
-                    if isinstance(value, pymongo.objectid.ObjectId):
-                        row_dict[key] = str(value)
-                    else:
-                        row_dict[key] = value
-                data.append(row_dict)
+            # Documents become tuples over the union of their keys; the
+            # response encoder converts ObjectIds and other BSON values and
+            # leaves the missing fields out of each row object again
+            fields, values = documents_to_rows(rows, MISSING)
             
             return {
-                "data": data,
+                "fields": fields,
+                "rows": values,
                 "columns": columns,
                 "total": total,
                 "limit": limit,
@@ -175,3 +321,155 @@ class MongoAdapter(BaseAdapter):
             print(f"Error fetching collection data: {e}")
             raise
 
+    def get_table_data_keyset(self, db, table_name: str, limit: int = 100, after: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+        try:
+            collection = db[table_name]
+            
+            # Every collection is keyed (and indexed) on _id
+            query = {}
+            if after is not None:
+                if len(after) != 1:
+                    raise ValueError("Pagination cursor does not match the collection's _id key")
+                last_id = after[0]
+                if isinstance(last_id, str) and ObjectId.is_valid(last_id):
+                    last_id = ObjectId(last_id)
+                query = {"_id": {"$gt": last_id}}
+            rows = list(collection.find(query).sort("_id", 1).limit(limit + 1))
+            
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            
+            columns = []
+            if rows:
+                for key in rows[0].keys():
+                    columns.append({"name": key, "type": type(rows[0][key]).__name__})
+            
+            fields, values = documents_to_rows(rows, MISSING)
+            last_id = rows[-1]["_id"] if rows else None
+            if isinstance(last_id, ObjectId):
+                last_id = str(last_id)
+            
+            return {
+                "fields": fields,
+                "rows": values,
+                "columns": columns,
+                "limit": limit,
+                "hasMore": has_more,
+                "next_key": [last_id] if has_more else None
+            }
+        except Exception as e:
+            print(f"Error fetching collection data: {e}")
+            raise
+
+    def stream_rows(self, db, table_name: str, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Iterator[Any]:
+        filters = filters or {}
+        # Field equality only: a "$where" or other operator key would run as a query operator
+        operators = [key for key in filters if str(key).startswith("$")]
+        if operators:
+            raise ValueError(f"Unsupported filter key(s): {', '.join(map(str, operators))}")
+        # The driver fetches getMore batches of batch_size as the cursor is consumed
+        cursor = db[table_name].find(filters).batch_size(batch_size)
+        try:
+            # Documents have no fixed columns
+            yield None
+            batch = []
+            for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            cursor.close()
+
+    def sample_rows(self, db, table_name: str, sample_size: int, timeout_ms: int, batch_size: int = 1000) -> Iterator[Any]:
+        # $sample uses a random cursor instead of a collection scan when the
+        # sample is under 5% of the collection
+        cursor = db[table_name].aggregate(
+            [{"$sample": {"size": sample_size}}], maxTimeMS=int(timeout_ms), batchSize=batch_size
+        )
+        try:
+            yield None
+            batch = []
+            for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            cursor.close()
+
+    def execute_query(self, db, query: str, params: Optional[List[Any]], handle, batch_size: int = 500) -> Iterator[Any]:
+        """Run a find or aggregate spec written as (extended) JSON:
+
+            {"collection": "orders", "find": {...}, "projection": {...},
+             "sort": [["created", -1]], "skip": 0, "limit": 50}
+            {"collection": "orders", "aggregate": [{"$match": {...}}, ...]}
+        """
+        try:
+            spec = json_util.loads(query)
+        except ValueError as e:
+            raise ValueError(f"Mongo queries must be a JSON spec: {e}")
+        if not isinstance(spec, dict) or not isinstance(spec.get("collection"), str):
+            raise ValueError('Mongo query spec needs a "collection" name')
+        collection = db[spec["collection"]]
+        
+        # The comment tags the server-side operation so it can be found and killed
+        comment = f"dbstru:{handle.query_id}"
+        handle.on_cancel = lambda: self._kill_operations(db, comment)
+        if "aggregate" in spec:
+            cursor = collection.aggregate(
+                spec["aggregate"],
+                maxTimeMS=int(handle.timeout_ms),
+                comment=comment,
+                batchSize=batch_size,
+            )
+        else:
+            cursor = collection.find(spec.get("find") or {}, spec.get("projection"))
+            if spec.get("sort"):
+                cursor = cursor.sort([tuple(pair) for pair in spec["sort"]])
+            if spec.get("skip"):
+                cursor = cursor.skip(int(spec["skip"]))
+            if spec.get("limit"):
+                cursor = cursor.limit(int(spec["limit"]))
+            cursor = cursor.max_time_ms(int(handle.timeout_ms)).comment(comment).batch_size(batch_size)
+        try:
+            # find is lazy: pull the first batch before the column marker, so a
+            # bad filter or an expired maxTimeMS raises before the response starts
+            documents = iter(cursor)
+            first = next(documents, None)
+            # Documents have no fixed columns
+            yield None
+            batch = [] if first is None else [first]
+            for doc in documents:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _kill_operations(db, comment: str):
+        admin = db.client.admin
+        operations = admin.aggregate([
+            {"$currentOp": {"allUsers": True}},
+            {"$match": {"$or": [
+                {"command.comment": comment},
+                {"cursor.originatingCommand.comment": comment},
+            ]}},
+        ])
+        for operation in operations:
+            admin.command("killOp", op=operation["opid"])
+
+    def bulk_insert(self, db, table_name: str, columns: Optional[List[str]], rows: List[Any]) -> int:
+        if columns is not None:
+            rows = [dict(zip(columns, row)) for row in rows]
+        # Unordered: the server applies the batch in parallel and keeps going past bad documents
+        result = db[table_name].insert_many(rows, ordered=False)
+        return len(result.inserted_ids)
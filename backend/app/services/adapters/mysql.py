@@ -1,9 +1,16 @@
 import mysql.connector
 from urllib.parse import urlparse
-from .base import BaseAdapter
-from typing import List, Dict, Any
+from .base import BaseAdapter, check_filter_columns, empty_table_schema, index_entry, like_pattern, sample_percent
+from ..ddl_planner import plan_alter
+from typing import List, Dict, Any, Optional, Iterator
+
+def _quote(name: str) -> str:
+    """Backtick-quoted identifier, with embedded backticks doubled"""
+    return "`" + str(name).replace("`", "``") + "`"
 
 class MySQLAdapter(BaseAdapter):
+    db_type = "mysql"
+
     def connect(self, connection_string: str):
         try:
             parsed = urlparse(connection_string)
@@ -19,62 +26,170 @@ class MySQLAdapter(BaseAdapter):
             return None
 
     def fetch_schema(self, conn) -> dict:
+        return self.fetch_tables(conn)
+
+    def list_tables(self, conn) -> List[str]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT TABLE_NAME
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME
+        """)
+        tables = [t[0] for t in cursor.fetchall()]
+        cursor.close()
+        return tables
+    
+    def search_tables(
+        self,
+        conn,
+        pattern: Optional[str] = None,
+        schema_name: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> tuple:
+        # Keys carry no schema; a schema filter can only name the current database
+        cursor = conn.cursor()
+        like = like_pattern(pattern) if pattern else None
+        cursor.execute("""
+            SELECT TABLE_NAME, COUNT(*) OVER ()
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND (%s IS NULL OR TABLE_SCHEMA = %s)
+              AND (%s IS NULL OR TABLE_NAME LIKE %s)
+            ORDER BY TABLE_NAME
+            LIMIT %s OFFSET %s
+        """, (schema_name, schema_name, like, like, limit, offset))
+        rows = cursor.fetchall()
+        cursor.close()
+        if not rows and offset > 0:
+            # Paged past the end: still report the total
+            return [], self.search_tables(conn, pattern, schema_name, 1, 0)[1]
+        return [self.table_ref(name) for name, _ in rows], rows[0][1] if rows else 0
+    
+    def fetch_tables(self, conn, tables: Optional[List[str]] = None) -> dict:
         cursor = conn.cursor()
         schema = {}
         
-        cursor.execute("SHOW TABLES")
-        tables = [t[0] for t in cursor.fetchall()]
+        # None means every table; otherwise push the name list into each query
+        params = tuple(tables or [])
+        table_filter = ""
+        if tables is not None:
+            if not tables:
+                return {}
+            table_filter = f"AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})"
         
-        for table_name in tables:
-            cursor.execute(f"DESCRIBE {table_name}")
-            columns_data = cursor.fetchall()
-            
-            columns = []
-            column_types = {}
-            nullable = {}
-            primary_keys = []
-            
-            for col in columns_data:
-                col_name = col[0]
-                col_type = col[1]
-                is_null = col[2] == "YES"
-                key = col[3]
-                
-                columns.append(col_name)
-                column_types[col_name] = col_type
-                nullable[col_name] = is_null
-                
-                if key == "PRI":
-                    primary_keys.append(col_name)
-                    
-            cursor.execute(f"""
-                SELECT 
-                    COLUMN_NAME, 
-                    REFERENCED_TABLE_NAME, 
-                    REFERENCED_COLUMN_NAME 
-                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE 
-                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{table_name}' 
-                AND REFERENCED_TABLE_NAME IS NOT NULL
-            """)
-            foreign_keys = [
-                {"column": fk[0], "ref_table": fk[1], "ref_column": fk[2]}
-                for fk in cursor.fetchall()
-            ]
-            
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            row_count = cursor.fetchone()[0]
-            
-            schema[table_name] = {
-                "columns": columns,
-                "column_types": column_types,
-                "nullable": nullable,
-                "primary_keys": primary_keys,
-                "foreign_keys": foreign_keys,
-                "row_count": row_count
-            }
-            
+        # TABLE_ROWS is InnoDB's sampled estimate (NULL for views), as are the
+        # data and index lengths
+        cursor.execute(f"""
+            SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() {table_filter}
+            ORDER BY TABLE_NAME
+        """, params)
+        for table_name, row_count, data_length, index_length in cursor.fetchall():
+            schema[table_name] = empty_table_schema()
+            schema[table_name]["row_count"] = row_count or 0
+            schema[table_name]["size_bytes"] = data_length or 0
+            schema[table_name]["index_bytes"] = index_length or 0
+        
+        # Same information DESCRIBE returns, for every table at once
+        cursor.execute(f"""
+            SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() {table_filter}
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, params)
+        for table_name, col_name, col_type, is_null, key in cursor.fetchall():
+            table = schema.get(table_name)
+            if table is None:
+                continue
+            table["columns"].append(col_name)
+            table["column_types"][col_name] = col_type
+            table["nullable"][col_name] = is_null == "YES"
+            if key == "PRI":
+                table["primary_keys"].append(col_name)
+        
+        cursor.execute(f"""
+            SELECT 
+                TABLE_NAME,
+                COLUMN_NAME, 
+                REFERENCED_TABLE_NAME, 
+                REFERENCED_COLUMN_NAME 
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE 
+            WHERE TABLE_SCHEMA = DATABASE() {table_filter}
+            AND REFERENCED_TABLE_NAME IS NOT NULL
+            ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+        """, params)
+        for table_name, col_name, ref_table, ref_column in cursor.fetchall():
+            if table_name in schema:
+                schema[table_name]["foreign_keys"].append(
+                    {"column": col_name, "ref_table": ref_table, "ref_column": ref_column}
+                )
+        
+        # One row per index column; functional key parts have no COLUMN_NAME
+        cursor.execute(f"""
+            SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, INDEX_TYPE, COLUMN_NAME
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() {table_filter}
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """, params)
+        indexes = {}
+        for table_name, index_name, non_unique, index_type, col_name in cursor.fetchall():
+            if table_name not in schema:
+                continue
+            index = indexes.get((table_name, index_name))
+            if index is None:
+                index = indexes[(table_name, index_name)] = index_entry(
+                    index_name, [], not int(non_unique), index_name == "PRIMARY", method=index_type
+                )
+                schema[table_name]["indexes"].append(index)
+            index["columns"].append(col_name if col_name is not None else "(expression)")
+        
+        cursor.close()
         return schema
     
+    def count_rows(self, conn, table_key: str, timeout_ms: int) -> int:
+        """Exact COUNT(*) bounded by the MAX_EXECUTION_TIME optimizer hint"""
+        cursor = conn.cursor()
+        table_name = table_key.replace("`", "``")
+        cursor.execute(
+            f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */ COUNT(*) FROM `{table_name}`"
+        )
+        row_count = cursor.fetchone()[0]
+        cursor.close()
+        return row_count
+    
+    def fetch_change_markers(self, conn) -> Dict[str, str]:
+        """CREATE_TIME/UPDATE_TIME plus digests of each table's column and index definitions"""
+        cursor = conn.cursor()
+        # Long enough for the column digest of very wide tables
+        cursor.execute("SET SESSION group_concat_max_len = 1048576")
+        cursor.execute("""
+            SELECT
+                t.TABLE_NAME,
+                CONCAT_WS('|', t.CREATE_TIME, t.UPDATE_TIME, MD5(GROUP_CONCAT(
+                    c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE, c.COLUMN_KEY
+                    ORDER BY c.ORDINAL_POSITION
+                )), (
+                    SELECT MD5(GROUP_CONCAT(
+                        s.INDEX_NAME, s.NON_UNIQUE, s.COLUMN_NAME
+                        ORDER BY s.INDEX_NAME, s.SEQ_IN_INDEX
+                    ))
+                    FROM INFORMATION_SCHEMA.STATISTICS s
+                    WHERE s.TABLE_SCHEMA = t.TABLE_SCHEMA AND s.TABLE_NAME = t.TABLE_NAME
+                ))
+            FROM INFORMATION_SCHEMA.TABLES t
+            LEFT JOIN INFORMATION_SCHEMA.COLUMNS c
+              ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+            WHERE t.TABLE_SCHEMA = DATABASE()
+            GROUP BY t.TABLE_NAME, t.CREATE_TIME, t.UPDATE_TIME
+            ORDER BY t.TABLE_NAME
+        """)
+        markers = {table_name: marker for table_name, marker in cursor.fetchall()}
+        cursor.close()
+        return markers
+    
     def create_database(self, conn, db_name: str) -> bool:
         """Create a new MySQL database"""
         try:
@@ -142,51 +257,18 @@ class MySQLAdapter(BaseAdapter):
             print(f"Error creating table: {e}")
             raise e
     
+    def plan_alter(self, table_name: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compile operations into (usually) a single ALTER TABLE"""
+        return plan_alter("mysql", table_name, operations)
+    
     def alter_table(self, conn, table_name: str, operations: List[Dict[str, Any]]) -> bool:
         """Alter an existing MySQL table"""
         try:
             cursor = conn.cursor()
             
-            for operation in operations:
-                op_type = operation['type']  # 'add', 'modify', 'drop'
-                
-                if op_type == 'add':
-                    col = operation['column']
-                    col_name = col['name']
-                    col_type = col['type']
-                    nullable = col.get('nullable', True)
-                    
-                    alter_sql = f"ALTER TABLE `{table_name}` ADD COLUMN `{col_name}` {col_type}"
-                    if not nullable:
-                        alter_sql += " NOT NULL"
-                    if col.get('default') is not None:
-                        alter_sql += f" DEFAULT {col['default']}"
-                    
-                    cursor.execute(alter_sql)
-                
-                elif op_type == 'modify':
-                    col = operation['column']
-                    col_name = col['name']
-                    col_type = col['type']
-                    nullable = col.get('nullable', True)
-                    
-                    alter_sql = f"ALTER TABLE `{table_name}` MODIFY COLUMN `{col_name}` {col_type}"
-                    if not nullable:
-                        alter_sql += " NOT NULL"
-                    
-                    cursor.execute(alter_sql)
-                
-                elif op_type == 'drop':
-                    col_name = operation['columnName']
-                    alter_sql = f"ALTER TABLE `{table_name}` DROP COLUMN `{col_name}`"
-                    cursor.execute(alter_sql)
-                
-                elif op_type == 'rename':
-                    old_name = operation['oldName']
-                    new_name = operation['newName']
-                    col_type = operation['type']
-                    alter_sql = f"ALTER TABLE `{table_name}` CHANGE `{old_name}` `{new_name}` {col_type}"
-                    cursor.execute(alter_sql)
+            # One table rebuild at most, instead of one per operation
+            for statement in self.plan_alter(table_name, operations)["statements"]:
+                cursor.execute(statement["sql"])
             
             conn.commit()
             cursor.close()
@@ -210,24 +292,27 @@ class MySQLAdapter(BaseAdapter):
     def get_table_data(self, conn, table_name: str, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
         """Fetch paginated data from a MySQL table"""
         try:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             
             # Get total count
-            cursor.execute(f"SELECT COUNT(*) as total FROM `{table_name}`")
-            total = cursor.fetchone()['total']
+            cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+            total = cursor.fetchone()[0]
             
             # Get paginated data
             cursor.execute(f"SELECT * FROM `{table_name}` LIMIT {limit} OFFSET {offset}")
             rows = cursor.fetchall()
+            fields = [col[0] for col in cursor.description]
             
-            # Get column information
+            # Get column information (Field, Type, ...)
             cursor.execute(f"DESCRIBE `{table_name}`")
             columns = [{"name": col[0], "type": col[1]} for col in cursor.fetchall()]
             
             cursor.close()
             
+            # Rows stay tuples; the response encoder lays them out
             return {
-                "data": rows,
+                "fields": fields,
+                "rows": rows,
                 "columns": columns,
                 "total": total,
                 "limit": limit,
@@ -237,4 +322,196 @@ class MySQLAdapter(BaseAdapter):
         except Exception as e:
             print(f"Error fetching table data: {e}")
             raise e
+    
+    def get_table_data_keyset(self, conn, table_name: str, limit: int = 100, after: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+        """Fetch a page of a MySQL table by seeking on its primary key"""
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT COLUMN_NAME
+                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                AND CONSTRAINT_NAME = 'PRIMARY'
+                ORDER BY ORDINAL_POSITION
+            """, (table_name,))
+            key_columns = [row[0] for row in cursor.fetchall()]
+            if not key_columns:
+                cursor.close()
+                return None
+            if after is not None and len(after) != len(key_columns):
+                raise ValueError("Pagination cursor does not match the table's primary key")
+            
+            # Seek past the last key with a row constructor comparison (range scan on PRIMARY)
+            key_list = ", ".join(f"`{col}`" for col in key_columns)
+            where = ""
+            if after is not None:
+                where = f"WHERE ({key_list}) > ({', '.join(['%s'] * len(after))})"
+            cursor.execute(
+                f"SELECT * FROM `{table_name}` {where} ORDER BY {key_list} LIMIT {limit + 1}",
+                tuple(after or ())
+            )
+            rows = cursor.fetchall()
+            fields = [col[0] for col in cursor.description]
+            
+            # Get column information (Field, Type, ...)
+            cursor.execute(f"DESCRIBE `{table_name}`")
+            columns = [{"name": col[0], "type": col[1]} for col in cursor.fetchall()]
+            
+            cursor.close()
+            
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            key_positions = [fields.index(col) for col in key_columns]
+            
+            return {
+                "fields": fields,
+                "rows": rows,
+                "columns": columns,
+                "limit": limit,
+                "hasMore": has_more,
+                "next_key": [rows[-1][i] for i in key_positions] if has_more else None
+            }
+        except Exception as e:
+            print(f"Error fetching table data: {e}")
+            raise e
+    
+    def _column_names(self, conn, table_name: str) -> List[str]:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT * FROM {_quote(table_name)} LIMIT 0")
+            cursor.fetchall()
+            return [col[0] for col in cursor.description]
+        finally:
+            cursor.close()
+    
+    def stream_rows(self, conn, table_name: str, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Iterator[Any]:
+        """Stream a MySQL table through an unbuffered cursor"""
+        # Unbuffered: rows stay on the socket until fetched instead of being read up front
+        cursor = conn.cursor(buffered=False)
+        try:
+            filters = filters or {}
+            where = ""
+            if filters:
+                check_filter_columns(filters, self._column_names(conn, table_name))
+                where = "WHERE " + " AND ".join(f"{_quote(col)} = %s" for col in filters)
+            cursor.execute(f"SELECT * FROM {_quote(table_name)} {where}", tuple(filters.values()))
+            
+            yield [col[0] for col in cursor.description]
+            batch = cursor.fetchmany(batch_size)
+            while batch:
+                yield batch
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            self._close_unbuffered(conn, cursor)
+    
+    def sample_rows(self, conn, table_name: str, sample_size: int, timeout_ms: int, batch_size: int = 1000) -> Iterator[Any]:
+        """MySQL has no TABLESAMPLE: a RAND() filter keeps about sample_size
+        rows, so the server still reads the table but sends only the sample,
+        and MAX_EXECUTION_TIME bounds the read"""
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT TABLE_ROWS
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (table_name,))
+        row = cursor.fetchone()
+        cursor.close()
+        percent = sample_percent(row[0] if row else None, sample_size)
+        where = f"WHERE RAND() < {percent / 100}" if percent is not None else ""
+        
+        cursor = conn.cursor(buffered=False)
+        try:
+            cursor.execute(
+                f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */ * FROM `{table_name}` {where} LIMIT %s",
+                (sample_size,)
+            )
+            yield [col[0] for col in cursor.description]
+            batch = cursor.fetchmany(batch_size)
+            while batch:
+                yield batch
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            self._close_unbuffered(conn, cursor)
+    
+    def execute_query(self, conn, query: str, params: Optional[List[Any]], handle, batch_size: int = 500) -> Iterator[Any]:
+        """Run an ad-hoc statement through an unbuffered cursor.
+
+        MySQL only bounds SELECTs natively (MAX_EXECUTION_TIME), so the
+        timeout is left to the engine's watchdog, which cancels through
+        KILL QUERY like an explicit cancel does.
+        """
+        connection_id = conn.connection_id
+        handle.on_cancel = lambda: self._kill_query(handle.connection_string, connection_id)
+        cursor = conn.cursor(buffered=False)
+        try:
+            cursor.execute(query, tuple(params or ()))
+            if cursor.description is None:
+                handle.rows_affected = cursor.rowcount
+                conn.commit()
+                yield []
+                return
+            
+            yield [col[0] for col in cursor.description]
+            batch = cursor.fetchmany(batch_size)
+            while batch:
+                yield batch
+                batch = cursor.fetchmany(batch_size)
+            conn.commit()
+        finally:
+            # Stopped early past max_rows, cancelled or the client went away
+            self._close_unbuffered(
+                conn, cursor, lambda: self._kill_query(handle.connection_string, connection_id)
+            )
+    
+    def _close_unbuffered(self, conn, cursor, kill=None):
+        """Close an unbuffered cursor whose reader may have stopped early.
 
+        mysql-connector refuses to close the cursor, or to run anything
+        else on the connection, while result rows are still unread. When
+        `kill` can stop the statement server-side, what is left of the
+        result is drained after it; otherwise (or if that fails) the
+        connection is closed, so the pool drops it instead of reusing it.
+        """
+        if conn.unread_result and kill is not None:
+            try:
+                kill()
+                conn.consume_results()
+            except Exception as e:
+                # The killed statement ends its result with an "interrupted" error
+                print(f"Discarding unread MySQL result: {e}")
+        if conn.unread_result:
+            try:
+                conn.close()
+            except Exception as e:
+                print(f"Error closing MySQL connection with an unread result: {e}")
+        try:
+            cursor.close()
+        except mysql.connector.Error as e:
+            print(f"Error closing MySQL cursor: {e}")
+    
+    def _kill_query(self, connection_string: str, connection_id: int):
+        """Interrupt the statement running on another session"""
+        side = self.connect(connection_string)
+        if side is None:
+            raise ConnectionError("Could not open a connection to cancel the query")
+        try:
+            cursor = side.cursor()
+            cursor.execute(f"KILL QUERY {int(connection_id)}")
+            cursor.close()
+        finally:
+            side.close()
+    
+    def bulk_insert(self, conn, table_name: str, columns: Optional[List[str]], rows: List[Any]) -> int:
+        """Insert a batch as one multi-row INSERT"""
+        # Column names come from the upload's header or keys
+        column_list = ", ".join(_quote(col) for col in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        cursor = conn.cursor()
+        try:
+            # executemany rewrites a plain INSERT into a single multi-row statement
+            cursor.executemany(f"INSERT INTO {_quote(table_name)} ({column_list}) VALUES ({placeholders})", rows)
+            conn.commit()
+            return len(rows)
+        finally:
+            cursor.close()
@@ -1,8 +1,25 @@
+import io
 import psycopg2
-from .base import BaseAdapter
-from typing import List, Dict, Any
+import uuid
+from .base import BaseAdapter, check_filter_columns, empty_table_schema, index_entry, like_pattern, sample_percent, statement_keyword
+from ..ddl_planner import plan_alter
+from ..result_cache import is_read_only
+from typing import List, Dict, Any, Optional, Iterator
+
+# Statements a server-side (DECLARE) cursor can run, as long as they do
+# not write: DECLARE rejects a WITH holding INSERT/UPDATE/DELETE
+CURSOR_STATEMENTS = {"select", "with", "values", "table"}
+
+def _copy_field(value: Any) -> str:
+    """One COPY CSV field. Only an unquoted empty field reads as NULL, so
+    every value is quoted and an empty string stays an empty string."""
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
 
 class PostgresAdapter(BaseAdapter):
+    db_type = "postgresql"
+
     def connect(self, connection_string: str):
         try:
             return psycopg2.connect(connection_string)
@@ -11,76 +28,202 @@ class PostgresAdapter(BaseAdapter):
             return None
 
     def fetch_schema(self, conn) -> dict:
+        return self.fetch_tables(conn)
+
+    def list_tables(self, conn) -> List[str]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT table_name 
+            FROM information_schema.tables 
+            WHERE table_schema = 'public'
+            ORDER BY table_name
+        """)
+        return [f"public.{t[0]}" for t in cursor.fetchall()]
+
+    def search_tables(
+        self,
+        conn,
+        pattern: Optional[str] = None,
+        schema_name: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> tuple:
+        if schema_name not in (None, "public"):
+            return [], 0
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT table_name, COUNT(*) OVER ()
+            FROM information_schema.tables
+            WHERE table_schema = 'public'
+              AND (%(pattern)s::text IS NULL OR table_name ILIKE %(pattern)s)
+            ORDER BY table_name
+            LIMIT %(limit)s OFFSET %(offset)s
+        """, {"pattern": like_pattern(pattern) if pattern else None, "limit": limit, "offset": offset})
+        rows = cursor.fetchall()
+        if not rows and offset > 0:
+            # Paged past the end: still report the total
+            return [], self.search_tables(conn, pattern, schema_name, 1, 0)[1]
+        return [self.table_ref(f"public.{name}") for name, _ in rows], rows[0][1] if rows else 0
+
+    def fetch_tables(self, conn, tables: Optional[List[str]] = None) -> dict:
         cursor = conn.cursor()
         schema = {}
+        # Keys look like "public.<table>"; None means every table
+        params = {
+            "all": tables is None,
+            "names": [key.split(".", 1)[-1] for key in tables or []],
+        }
         
         cursor.execute("""
             SELECT table_name 
             FROM information_schema.tables 
             WHERE table_schema = 'public'
-        """)
-        tables = [t[0] for t in cursor.fetchall()]
+              AND (%(all)s OR table_name = ANY(%(names)s::text[]))
+            ORDER BY table_name
+        """, params)
+        table_names = [t[0] for t in cursor.fetchall()]
+        for table_name in table_names:
+            schema[table_name] = empty_table_schema()
+        if not table_names:
+            return {}
         
-        for table_name in tables:
-            cursor.execute(f"""
-                SELECT column_name, data_type, is_nullable
-                FROM information_schema.columns
-                WHERE table_name = '{table_name}'
-            """)
-            columns_data = cursor.fetchall()
-            
-            columns = []
-            column_types = {}
-            nullable = {}
-            
-            for col in columns_data:
-                col_name = col[0]
-                col_type = col[1]
-                is_null = col[2] == "YES"
-                
-                columns.append(col_name)
-                column_types[col_name] = col_type
-                nullable[col_name] = is_null
-                
-            cursor.execute(f"""
-                SELECT kcu.column_name
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.key_column_usage kcu
-                  ON tc.constraint_name = kcu.constraint_name
-                WHERE tc.constraint_type = 'PRIMARY KEY' AND tc.table_name = '{table_name}'
-            """)
-            primary_keys = [pk[0] for pk in cursor.fetchall()]
-            
-            cursor.execute(f"""
-                SELECT
-                    kcu.column_name,
-                    ccu.table_name AS foreign_table_name,
-                    ccu.column_name AS foreign_column_name
-                FROM information_schema.key_column_usage AS kcu
-                JOIN information_schema.constraint_column_usage AS ccu
-                  ON kcu.constraint_name = ccu.constraint_name
-                JOIN information_schema.table_constraints AS tc
-                  ON kcu.constraint_name = tc.constraint_name
-                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_name = '{table_name}'
-            """)
-            foreign_keys = [
-                {"column": fk[0], "ref_table": fk[1], "ref_column": fk[2]}
-                for fk in cursor.fetchall()
-            ]
-            
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            row_count = cursor.fetchone()[0]
-            
-            schema[f"public.{table_name}"] = {
-                "columns": columns,
-                "column_types": column_types,
-                "nullable": nullable,
-                "primary_keys": primary_keys,
-                "foreign_keys": foreign_keys,
-                "row_count": row_count
-            }
-            
-        return schema
+        # Columns for every table in one pass
+        cursor.execute("""
+            SELECT table_name, column_name, data_type, is_nullable
+            FROM information_schema.columns
+            WHERE table_schema = 'public'
+              AND (%(all)s OR table_name = ANY(%(names)s::text[]))
+            ORDER BY table_name, ordinal_position
+        """, params)
+        for table_name, col_name, col_type, is_null in cursor.fetchall():
+            table = schema.get(table_name)
+            if table is None:
+                continue
+            table["columns"].append(col_name)
+            table["column_types"][col_name] = col_type
+            table["nullable"][col_name] = is_null == "YES"
+        
+        # Primary keys straight from pg_constraint (information_schema joins are slow on big catalogs)
+        cursor.execute("""
+            SELECT c.relname, a.attname
+            FROM pg_constraint con
+            JOIN pg_class c ON c.oid = con.conrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            CROSS JOIN LATERAL unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            WHERE con.contype = 'p' AND n.nspname = 'public'
+              AND (%(all)s OR c.relname = ANY(%(names)s::text[]))
+            ORDER BY c.relname, k.ord
+        """, params)
+        for table_name, col_name in cursor.fetchall():
+            if table_name in schema:
+                schema[table_name]["primary_keys"].append(col_name)
+        
+        # Foreign keys, local and referenced columns paired by position
+        cursor.execute("""
+            SELECT c.relname, a.attname, rc.relname, ra.attname
+            FROM pg_constraint con
+            JOIN pg_class c ON c.oid = con.conrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_class rc ON rc.oid = con.confrelid
+            CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, ref_attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.ref_attnum
+            WHERE con.contype = 'f' AND n.nspname = 'public'
+              AND (%(all)s OR c.relname = ANY(%(names)s::text[]))
+            ORDER BY c.relname, con.conname, k.ord
+        """, params)
+        for table_name, col_name, ref_table, ref_column in cursor.fetchall():
+            if table_name in schema:
+                schema[table_name]["foreign_keys"].append(
+                    {"column": col_name, "ref_table": ref_table, "ref_column": ref_column}
+                )
+        
+        # Indexes of every table in one pass: key columns in order (expressions
+        # as text, INCLUDE columns left out) and relpages-based size estimates
+        cursor.execute("""
+            SELECT
+                c.relname,
+                ic.relname,
+                i.indisunique,
+                i.indisprimary,
+                i.indpred IS NOT NULL,
+                am.amname,
+                ARRAY(
+                    SELECT COALESCE(a.attname::text, pg_get_indexdef(i.indexrelid, k.ord::int, true))
+                    FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+                    LEFT JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum AND k.attnum > 0
+                    WHERE k.ord <= i.indnkeyatts
+                    ORDER BY k.ord
+                ),
+                ic.relpages::bigint * current_setting('block_size')::bigint
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = ic.relam
+            WHERE n.nspname = 'public'
+              AND (%(all)s OR c.relname = ANY(%(names)s::text[]))
+            ORDER BY c.relname, ic.relname
+        """, params)
+        for table_name, index_name, unique, primary, partial, method, columns, size in cursor.fetchall():
+            table = schema.get(table_name)
+            if table is None:
+                continue
+            table["indexes"].append(index_entry(index_name, columns, unique, primary, partial, method))
+            table["index_sizes"][index_name] = size
+            table["index_bytes"] += size
+        
+        # Row count estimates from planner statistics; fall back to the stats
+        # collector's live tuple count for tables never vacuumed or analyzed
+        cursor.execute("""
+            SELECT
+                c.relname,
+                CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint
+                     ELSE COALESCE(s.n_live_tup, 0) END,
+                c.relpages::bigint * current_setting('block_size')::bigint
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE n.nspname = 'public'
+              AND (%(all)s OR c.relname = ANY(%(names)s::text[]))
+        """, params)
+        for table_name, row_count, size in cursor.fetchall():
+            if table_name in schema:
+                schema[table_name]["row_count"] = row_count
+                schema[table_name]["size_bytes"] = size
+        
+        return {f"public.{table_name}": table for table_name, table in schema.items()}
+
+    def count_rows(self, conn, table_key: str, timeout_ms: int) -> int:
+        cursor = conn.cursor()
+        table_name = table_key.split(".", 1)[-1].replace('"', '""')
+        # SET LOCAL ends with the transaction, which the pool rolls back on return
+        cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+        cursor.execute(f'SELECT COUNT(*) FROM "public"."{table_name}"')
+        return cursor.fetchone()[0]
+
+    def fetch_change_markers(self, conn) -> Dict[str, str]:
+        cursor = conn.cursor()
+        # relfilenode moves on rewrites; xmin of the pg_class, pg_attribute,
+        # pg_constraint and pg_index rows moves whenever a column, constraint
+        # or index is touched
+        cursor.execute("""
+            SELECT
+                c.relname,
+                concat_ws(':',
+                    c.relfilenode, c.xmin,
+                    (SELECT max(a.xmin::text::bigint) FROM pg_attribute a WHERE a.attrelid = c.oid),
+                    (SELECT max(con.xmin::text::bigint) || '/' || count(*)
+                     FROM pg_constraint con WHERE con.conrelid = c.oid),
+                    (SELECT max(i.xmin::text::bigint) || '/' || count(*)
+                     FROM pg_index i WHERE i.indrelid = c.oid))
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'v', 'f', 'p')
+            ORDER BY c.relname
+        """)
+        return {f"public.{table_name}": marker for table_name, marker in cursor.fetchall()}
 
     def create_database(self, conn, db_name: str) -> bool:
         try:
@@ -119,29 +262,16 @@ class PostgresAdapter(BaseAdapter):
             print(f"Error creating table: {e}")
             raise
 
+    def plan_alter(self, table_name: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return plan_alter("postgresql", table_name, operations)
+
     def alter_table(self, conn, table_name: str, operations: List[Dict[str, Any]]) -> bool:
         try:
             cursor = conn.cursor()
             
-            for op in operations:
-                if op["type"] == "add":
-                    col = op["column"]
-                    col_def = f'{col["type"]}'
-                    if not col.get("nullable", True):
-                        col_def += " NOT NULL"
-                    alter_sql = f'ALTER TABLE "{table_name}" ADD COLUMN "{col["name"]}" {col_def}'
-                    cursor.execute(alter_sql)
-                    
-                elif op["type"] == "modify":
-                    col = op["column"]
-                    cursor.execute(f'ALTER TABLE "{table_name}" ALTER COLUMN "{col["name"]}" TYPE {col["type"]}')
-                    if col.get("nullable", True):
-                        cursor.execute(f'ALTER TABLE "{table_name}" ALTER COLUMN "{col["name"]}" DROP NOT NULL')
-                    else:
-                        cursor.execute(f'ALTER TABLE "{table_name}" ALTER COLUMN "{col["name"]}" SET NOT NULL')
-                    
-                elif op["type"] == "drop":
-                    cursor.execute(f'ALTER TABLE "{table_name}" DROP COLUMN "{op["columnName"]}"')
+            # One ALTER TABLE for everything but renames, all in one transaction
+            for statement in self.plan_alter(table_name, operations)["statements"]:
+                cursor.execute(statement["sql"])
             
             conn.commit()
             return True
@@ -183,14 +313,10 @@ class PostgresAdapter(BaseAdapter):
             cursor.execute(f'SELECT * FROM "{table_name}" LIMIT {limit} OFFSET {offset}')
             rows = cursor.fetchall()
             
-            # Convert to list of dicts
-            data = []
-            for row in rows:
-                row_dict = {columns[i]["name"]: row[i] for i in range(len(columns))}
-                data.append(row_dict)
-            
+            # Rows stay tuples; the response encoder lays them out
             return {
-                "data": data,
+                "fields": [col[0] for col in cursor.description],
+                "rows": rows,
                 "columns": columns,
                 "total": total,
                 "limit": limit,
@@ -201,3 +327,165 @@ class PostgresAdapter(BaseAdapter):
             print(f"Error fetching table data: {e}")
             raise
 
+    def get_table_data_keyset(self, conn, table_name: str, limit: int = 100, after: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT a.attname
+                FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                WHERE i.indrelid = to_regclass(%s) AND i.indisprimary
+                ORDER BY array_position(i.indkey::int2[], a.attnum)
+            """, ('"' + table_name.replace('"', '""') + '"',))
+            key_columns = [row[0] for row in cursor.fetchall()]
+            if not key_columns:
+                return None
+            if after is not None and len(after) != len(key_columns):
+                raise ValueError("Pagination cursor does not match the table's primary key")
+            
+            # Get column info
+            cursor.execute("""
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_name = %s
+                ORDER BY ordinal_position
+            """, (table_name,))
+            columns = [{"name": col[0], "type": col[1]} for col in cursor.fetchall()]
+            
+            # Seek past the last key with a row comparison, which the PK index serves directly
+            key_list = ", ".join('"' + col.replace('"', '""') + '"' for col in key_columns)
+            where = ""
+            if after is not None:
+                where = f"WHERE ({key_list}) > ({', '.join(['%s'] * len(after))})"
+            cursor.execute(
+                f'SELECT * FROM "{table_name}" {where} ORDER BY {key_list} LIMIT {limit + 1}',
+                after
+            )
+            rows = cursor.fetchall()
+            
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            names = [col[0] for col in cursor.description]
+            key_positions = [names.index(col) for col in key_columns]
+            
+            return {
+                "fields": names,
+                "rows": rows,
+                "columns": columns,
+                "limit": limit,
+                "hasMore": has_more,
+                "next_key": [rows[-1][i] for i in key_positions] if has_more else None
+            }
+        except Exception as e:
+            print(f"Error fetching table data: {e}")
+            raise
+
+    def stream_rows(self, conn, table_name: str, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Iterator[Any]:
+        # A named cursor keeps the result set on the server; rows arrive batch_size at a time
+        cursor = conn.cursor(name=f"dbstru_export_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+        try:
+            filters = filters or {}
+            where = ""
+            quoted_table = table_name.replace('"', '""')
+            if filters:
+                check = conn.cursor()
+                try:
+                    check.execute(f'SELECT * FROM "{quoted_table}" LIMIT 0')
+                    check_filter_columns(filters, [col[0] for col in check.description])
+                finally:
+                    check.close()
+                where = "WHERE " + " AND ".join(
+                    '"' + col.replace('"', '""') + '" = %s' for col in filters
+                )
+            cursor.execute(f'SELECT * FROM "{quoted_table}" {where}', list(filters.values()))
+            
+            # The description of a named cursor is only known after the first fetch
+            batch = cursor.fetchmany(batch_size)
+            yield [col[0] for col in cursor.description]
+            while batch:
+                yield batch
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+
+    def sample_rows(self, conn, table_name: str, sample_size: int, timeout_ms: int, batch_size: int = 1000) -> Iterator[Any]:
+        cursor = conn.cursor()
+        # SET LOCAL ends with the transaction, which the pool rolls back on return
+        cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+        cursor.execute("""
+            SELECT c.reltuples
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relname = %s
+        """, (table_name,))
+        row = cursor.fetchone()
+        cursor.close()
+        percent = sample_percent(row[0] if row and row[0] > 0 else None, sample_size)
+        # SYSTEM picks whole pages at random, so only the sampled pages are read
+        tablesample = f" TABLESAMPLE SYSTEM ({percent})" if percent is not None else ""
+        
+        cursor = conn.cursor(name=f"dbstru_sample_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+        try:
+            quoted_table = table_name.replace('"', '""')
+            cursor.execute(f'SELECT * FROM "{quoted_table}"{tablesample} LIMIT %s', (sample_size,))
+            batch = cursor.fetchmany(batch_size)
+            yield [col[0] for col in cursor.description]
+            while batch:
+                yield batch
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+
+    def execute_query(self, conn, query: str, params: Optional[List[Any]], handle, batch_size: int = 500) -> Iterator[Any]:
+        # Sends a cancel request on a separate socket; safe from any thread
+        handle.on_cancel = conn.cancel
+        cursor = conn.cursor()
+        # SET LOCAL ends with the transaction, committed or rolled back below
+        cursor.execute("SET LOCAL statement_timeout = %s", (int(handle.timeout_ms),))
+        cursor.close()
+        
+        server_side = statement_keyword(query) in CURSOR_STATEMENTS and is_read_only(self.db_type, query)
+        if server_side:
+            cursor = conn.cursor(name=f"dbstru_query_{uuid.uuid4().hex}")
+            cursor.itersize = batch_size
+        else:
+            cursor = conn.cursor()
+        try:
+            cursor.execute(query, params or None)
+            batch = cursor.fetchmany(batch_size) if server_side else None
+            if cursor.description is None:
+                handle.rows_affected = cursor.rowcount
+                conn.commit()
+                yield []
+                return
+            
+            yield [col[0] for col in cursor.description]
+            if batch is None:
+                batch = cursor.fetchmany(batch_size)
+            while batch:
+                yield batch
+                batch = cursor.fetchmany(batch_size)
+            if not server_side:
+                # e.g. INSERT ... RETURNING
+                handle.rows_affected = cursor.rowcount
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def bulk_insert(self, conn, table_name: str, columns: Optional[List[str]], rows: List[Any]) -> int:
+        # COPY parses text for every column type, so the batch goes over as CSV
+        buffer = io.StringIO()
+        buffer.writelines(",".join(map(_copy_field, row)) + "\n" for row in rows)
+        buffer.seek(0)
+        column_list = ", ".join('"' + col.replace('"', '""') + '"' for col in columns)
+        quoted_table = table_name.replace('"', '""')
+        cursor = conn.cursor()
+        try:
+            cursor.copy_expert(f'COPY "{quoted_table}" ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+            conn.commit()
+            return len(rows)
+        finally:
+            cursor.close()
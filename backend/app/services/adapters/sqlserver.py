@@ -1,10 +1,112 @@
 import pyodbc
 from urllib.parse import urlparse, parse_qs, unquote
-from .base import BaseAdapter
-from typing import List, Dict, Any
+from .base import (
+    BaseAdapter, check_filter_columns, chunked, empty_table_schema, index_entry, like_pattern, sample_percent
+)
+from ..ddl_planner import plan_alter
+from typing import List, Dict, Any, Optional, Iterator
 import logging
 
+def _quote(name: str) -> str:
+    """Bracket-quoted identifier, with embedded closing brackets doubled"""
+    return "[" + str(name).replace("]", "]]") + "]"
+
+# Catalog queries; {filter} narrows them to specific tables
+LIST_ALL_TABLES = """
+SELECT TABLE_SCHEMA , TABLE_NAME
+FROM INFORMATION_SCHEMA.TABLES
+WHERE TABLE_TYPE = 'BASE TABLE' {filter}
+ORDER BY TABLE_SCHEMA, TABLE_NAME
+"""
+
+LIST_ALL_COLUMNS = """
+SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE
+FROM INFORMATION_SCHEMA.COLUMNS
+WHERE 1 = 1 {filter}
+ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+"""
+
+LIST_ALL_PRIMARY_KEYS = """
+SELECT kcu.TABLE_SCHEMA, kcu.TABLE_NAME, kcu.COLUMN_NAME
+FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS tc
+JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS kcu
+    ON tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
+   AND tc.CONSTRAINT_SCHEMA = kcu.CONSTRAINT_SCHEMA
+WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY' {filter}
+ORDER BY kcu.TABLE_SCHEMA, kcu.TABLE_NAME, kcu.ORDINAL_POSITION
+"""
+
+LIST_ALL_FOREIGN_KEYS = """
+SELECT
+    SCHEMA_NAME(t.schema_id),
+    t.name,
+    c.name,
+    rt.name AS PK_TABLE,
+    rc.name AS PK_COLUMN
+FROM sys.foreign_key_columns fkc
+JOIN sys.tables t ON t.object_id = fkc.parent_object_id
+JOIN sys.columns c
+    ON c.object_id = fkc.parent_object_id AND c.column_id = fkc.parent_column_id
+JOIN sys.tables rt ON rt.object_id = fkc.referenced_object_id
+JOIN sys.columns rc
+    ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+WHERE 1 = 1 {filter}
+ORDER BY SCHEMA_NAME(t.schema_id), t.name, fkc.constraint_object_id, fkc.constraint_column_id
+"""
+
+LIST_ALL_ROW_COUNTS = """
+SELECT SCHEMA_NAME(t.schema_id), t.name, SUM(p.rows)
+FROM sys.tables t
+JOIN sys.partitions p ON t.object_id = p.object_id
+WHERE p.index_id IN (0,1) {filter}
+GROUP BY t.schema_id, t.name
+"""
+
+# Key columns of every index (heaps and INCLUDE columns left out)
+LIST_ALL_INDEXES = """
+SELECT
+    SCHEMA_NAME(t.schema_id),
+    t.name,
+    i.name,
+    i.is_unique,
+    i.is_primary_key,
+    i.has_filter,
+    i.type_desc,
+    c.name
+FROM sys.indexes i
+JOIN sys.tables t ON t.object_id = i.object_id
+JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+WHERE i.type > 0 AND ic.is_included_column = 0 {filter}
+ORDER BY SCHEMA_NAME(t.schema_id), t.name, i.name, ic.key_ordinal
+"""
+
+# Used pages per index; index_id 0 (heap) and 1 (clustered) hold the table data
+LIST_ALL_INDEX_SIZES = """
+SELECT SCHEMA_NAME(t.schema_id), t.name, i.index_id, i.name, SUM(au.used_pages) * 8192
+FROM sys.tables t
+JOIN sys.indexes i ON i.object_id = t.object_id
+JOIN sys.partitions p ON p.object_id = i.object_id AND p.index_id = i.index_id
+JOIN sys.allocation_units au ON au.container_id = p.partition_id
+WHERE 1 = 1 {filter}
+GROUP BY t.schema_id, t.name, i.index_id, i.name
+"""
+
+# One page of table names; {filter} narrows by name and schema
+SEARCH_TABLES = """
+SELECT TABLE_SCHEMA, TABLE_NAME, COUNT(*) OVER ()
+FROM INFORMATION_SCHEMA.TABLES
+WHERE TABLE_TYPE = 'BASE TABLE' {filter}
+ORDER BY TABLE_SCHEMA, TABLE_NAME
+OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+"""
+
+# Table keys pushed into one IN (...) list
+FILTER_BATCH_SIZE = 500
+
 class SQLServerAdapter(BaseAdapter):
+    db_type = "sqlserver"
+
     def connect(self, connection_string: str):
         try:
             if connection_string.strip().upper().startswith("DRIVER="):
@@ -44,85 +146,168 @@ class SQLServerAdapter(BaseAdapter):
    
 
     def fetch_schema(self, conn) -> dict:
-        schema = {}
-        cursor = conn.cursor()
+        return self.fetch_tables(conn)
 
-        # SQL Queries (Inlined for simplicity in this refactor)
-        LIST_ALL_TABLES = """
-        SELECT TABLE_SCHEMA , TABLE_NAME
-        FROM INFORMATION_SCHEMA.TABLES
-        WHERE TABLE_TYPE = 'BASE TABLE'
-        ORDER BY TABLE_SCHEMA, TABLE_NAME
-        """
-        
-        cursor.execute(LIST_ALL_TABLES)
-        tables = cursor.fetchall()
+    def list_tables(self, conn) -> List[str]:
+        cursor = conn.cursor()
+        cursor.execute(LIST_ALL_TABLES.format(filter=""))
+        return [f"{table_schema}.{table_name}" for table_schema, table_name in cursor.fetchall()]
 
-        for table_schema, table_name in tables:
-            # Columns
-            cursor.execute("""
-            SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_NAME = ? AND TABLE_SCHEMA = ?
-            ORDER BY ORDINAL_POSITION
-            """, (table_name, table_schema))
-            columns_data = cursor.fetchall()
-
-            columns = [c[0] for c in columns_data]
-            column_types = {c[0]: c[1] for c in columns_data}
-            nullable = {c[0]: c[2] == "YES" for c in columns_data}
-
-            # Primary keys
-            cursor.execute("""
-            SELECT kcu.COLUMN_NAME
-            FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS tc
-            JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS kcu
-                ON tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
-            WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
-              AND kcu.TABLE_NAME = ? AND kcu.TABLE_SCHEMA = ?
-            """, (table_name, table_schema))
-            primary_keys = [pk[0] for pk in cursor.fetchall()]
-
-            # Foreign keys
-            cursor.execute("""
-            SELECT 
-                fk.COLUMN_NAME,
-                pk.TABLE_NAME AS PK_TABLE,
-                pk.COLUMN_NAME AS PK_COLUMN
-            FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
-            JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE fk
-                ON rc.CONSTRAINT_NAME = fk.CONSTRAINT_NAME
-            JOIN INFORMATION_SCHEMA.CONSTRAINT_COLUMN_USAGE pk
-                ON rc.UNIQUE_CONSTRAINT_NAME = pk.CONSTRAINT_NAME
-            WHERE fk.TABLE_NAME = ? AND fk.TABLE_SCHEMA = ?
-            """, (table_name, table_schema))
-            foreign_keys = [
-                {"column": fk[0], "ref_table": fk[1], "ref_column": fk[2]}
-                for fk in cursor.fetchall()
-            ]
-
-            # Row counts
-            cursor.execute("""
-            SELECT SUM(p.rows)
-            FROM sys.tables t
-            JOIN sys.partitions p ON t.object_id = p.object_id
-            WHERE p.index_id IN (0,1) AND t.name = ?
-            GROUP BY t.name
-            """, (table_name,))
-            row_count = cursor.fetchone()
-            row_count_val = row_count[0] if row_count else 0
+    def search_tables(
+        self,
+        conn,
+        pattern: Optional[str] = None,
+        schema_name: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> tuple:
+        filters, params = "", []
+        if pattern:
+            filters += " AND TABLE_NAME LIKE ? ESCAPE '\\'"
+            params.append(like_pattern(pattern))
+        if schema_name is not None:
+            filters += " AND TABLE_SCHEMA = ?"
+            params.append(schema_name)
+        cursor = conn.cursor()
+        cursor.execute(SEARCH_TABLES.format(filter=filters), *params, offset, limit)
+        rows = cursor.fetchall()
+        if not rows and offset > 0:
+            # Paged past the end: still report the total
+            return [], self.search_tables(conn, pattern, schema_name, 1, 0)[1]
+        refs = [self.table_ref(f"{table_schema}.{table_name}") for table_schema, table_name, _ in rows]
+        return refs, rows[0][2] if rows else 0
 
-            schema[f"{table_schema}.{table_name}"] = {
-                "columns": columns,
-                "column_types": column_types,
-                "nullable": nullable,
-                "primary_keys": primary_keys,
-                "foreign_keys": foreign_keys,
-                "row_count": row_count_val,
-            }
+    def fetch_tables(self, conn, tables: Optional[List[str]] = None) -> dict:
+        cursor = conn.cursor()
+        if tables is None:
+            return self._fetch_tables(cursor, None)
 
+        # Stay well below the 2100 parameter limit per statement
+        schema = {}
+        for batch in chunked(tables, FILTER_BATCH_SIZE):
+            schema.update(self._fetch_tables(cursor, batch))
         return schema
 
+    def _fetch_tables(self, cursor, keys: Optional[List[str]]) -> dict:
+        """Introspect the given "schema.table" keys (all tables when None)"""
+        schema = {}
+        params = tuple(keys or [])
+
+        def key_filter(expr: str) -> str:
+            if keys is None:
+                return ""
+            return f"AND {expr} IN ({', '.join(['?'] * len(keys))})"
+
+        cursor.execute(LIST_ALL_TABLES.format(
+            filter=key_filter("TABLE_SCHEMA + '.' + TABLE_NAME")
+        ), *params)
+        for table_schema, table_name in cursor.fetchall():
+            schema[(table_schema, table_name)] = empty_table_schema()
+        if not schema:
+            return {}
+
+        # Columns
+        cursor.execute(LIST_ALL_COLUMNS.format(
+            filter=key_filter("TABLE_SCHEMA + '.' + TABLE_NAME")
+        ), *params)
+        for table_schema, table_name, col_name, col_type, is_null in cursor.fetchall():
+            table = schema.get((table_schema, table_name))
+            if table is None:
+                continue
+            table["columns"].append(col_name)
+            table["column_types"][col_name] = col_type
+            table["nullable"][col_name] = is_null == "YES"
+
+        # Primary keys
+        cursor.execute(LIST_ALL_PRIMARY_KEYS.format(
+            filter=key_filter("kcu.TABLE_SCHEMA + '.' + kcu.TABLE_NAME")
+        ), *params)
+        for table_schema, table_name, col_name in cursor.fetchall():
+            table = schema.get((table_schema, table_name))
+            if table is not None:
+                table["primary_keys"].append(col_name)
+
+        # Foreign keys
+        cursor.execute(LIST_ALL_FOREIGN_KEYS.format(
+            filter=key_filter("SCHEMA_NAME(t.schema_id) + '.' + t.name")
+        ), *params)
+        for table_schema, table_name, col_name, ref_table, ref_column in cursor.fetchall():
+            table = schema.get((table_schema, table_name))
+            if table is not None:
+                table["foreign_keys"].append(
+                    {"column": col_name, "ref_table": ref_table, "ref_column": ref_column}
+                )
+
+        # Row counts
+        cursor.execute(LIST_ALL_ROW_COUNTS.format(
+            filter=key_filter("SCHEMA_NAME(t.schema_id) + '.' + t.name")
+        ), *params)
+        for table_schema, table_name, row_count in cursor.fetchall():
+            table = schema.get((table_schema, table_name))
+            if table is not None:
+                table["row_count"] = row_count or 0
+
+        # Indexes
+        cursor.execute(LIST_ALL_INDEXES.format(
+            filter=key_filter("SCHEMA_NAME(t.schema_id) + '.' + t.name")
+        ), *params)
+        indexes = {}
+        for table_schema, table_name, index_name, unique, primary, partial, method, col_name in cursor.fetchall():
+            table = schema.get((table_schema, table_name))
+            if table is None:
+                continue
+            index = indexes.get((table_schema, table_name, index_name))
+            if index is None:
+                index = indexes[(table_schema, table_name, index_name)] = index_entry(
+                    index_name, [], unique, primary, partial, method
+                )
+                table["indexes"].append(index)
+            index["columns"].append(col_name)
+
+        # Table and index sizes
+        cursor.execute(LIST_ALL_INDEX_SIZES.format(
+            filter=key_filter("SCHEMA_NAME(t.schema_id) + '.' + t.name")
+        ), *params)
+        for table_schema, table_name, index_id, index_name, size in cursor.fetchall():
+            table = schema.get((table_schema, table_name))
+            if table is None:
+                continue
+            size = size or 0
+            if index_id <= 1:
+                table["size_bytes"] += size
+            else:
+                table["index_sizes"][index_name] = size
+                table["index_bytes"] += size
+
+        return {
+            f"{table_schema}.{table_name}": table
+            for (table_schema, table_name), table in schema.items()
+        }
+
+    def count_rows(self, conn, table_key: str, timeout_ms: int) -> int:
+        table_schema, table_name = table_key.split(".", 1)
+        # pyodbc query timeouts are whole seconds
+        conn.timeout = max(1, -(-int(timeout_ms) // 1000))
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT_BIG(*) FROM [{table_schema}].[{table_name}]")
+            return cursor.fetchone()[0]
+        finally:
+            conn.timeout = 0
+
+    def fetch_change_markers(self, conn) -> Dict[str, str]:
+        cursor = conn.cursor()
+        # modify_date moves on ALTER TABLE and on index/constraint changes
+        cursor.execute("""
+        SELECT SCHEMA_NAME(schema_id), name, CONVERT(varchar(33), modify_date, 126)
+        FROM sys.tables
+        ORDER BY SCHEMA_NAME(schema_id), name
+        """)
+        return {
+            f"{table_schema}.{table_name}": marker
+            for table_schema, table_name, marker in cursor.fetchall()
+        }
+
     def create_database(self, conn, db_name: str) -> bool:
         try:
             # SQL Server doesn't allow CREATE DATABASE in a transaction
@@ -162,33 +347,17 @@ class SQLServerAdapter(BaseAdapter):
             print(f"Error creating table: {e}")
             raise
 
+    def plan_alter(self, table_name: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return plan_alter("sqlserver", table_name, operations)
+
     def alter_table(self, conn, table_name: str, operations: List[Dict[str, Any]]) -> bool:
         try:
             cursor = conn.cursor()
             
-            for op in operations:
-                if op["type"] == "add":
-                    col = op["column"]
-                    col_def = f"{col['type']}"
-                    if not col.get("nullable", True):
-                        col_def += " NOT NULL"
-                    alter_sql = f"ALTER TABLE [{table_name}] ADD [{col['name']}] {col_def}"
-                    logging.warning(f"Executing SQL: {alter_sql}")
-                    cursor.execute(alter_sql)
-                    
-                elif op["type"] == "modify":
-                    col = op["column"]
-                    col_def = f"{col['type']}"
-                    if not col.get("nullable", True):
-                        col_def += " NOT NULL"
-                    else:
-                        col_def += " NULL"
-                    alter_sql = f"ALTER TABLE [{table_name}] ALTER COLUMN [{col['name']}] {col_def}"
-                    logging.warning(f"Executing SQL: {alter_sql}")
-                    cursor.execute(alter_sql)
-                    
-                elif op["type"] == "drop":
-                    cursor.execute(f"ALTER TABLE [{table_name}] DROP COLUMN [{op['columnName']}]")
+            # ADDs and DROPs are grouped; ALTER COLUMN is one column per statement
+            for statement in self.plan_alter(table_name, operations)["statements"]:
+                logging.warning(f"Executing SQL: {statement['sql']}")
+                cursor.execute(statement["sql"])
             
             conn.commit()
             return True
@@ -249,14 +418,10 @@ class SQLServerAdapter(BaseAdapter):
             """)
             rows = cursor.fetchall()
             
-            # Convert to list of dicts
-            data = []
-            for row in rows:
-                row_dict = {columns[i]["name"]: row[i] for i in range(len(columns))}
-                data.append(row_dict)
-            
+            # Rows stay tuples; the response encoder lays them out
             return {
-                "data": data,
+                "fields": [col[0] for col in cursor.description],
+                "rows": [tuple(row) for row in rows],
                 "columns": columns,
                 "total": total,
                 "limit": limit,
@@ -271,4 +436,149 @@ class SQLServerAdapter(BaseAdapter):
             print(f"Error fetching table data: {e}")
             raise
 
+    def get_table_data_keyset(self, conn, table_name: str, limit: int = 100, after: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT kcu.COLUMN_NAME
+                FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS tc
+                JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS kcu
+                    ON tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
+                   AND tc.CONSTRAINT_SCHEMA = kcu.CONSTRAINT_SCHEMA
+                WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY' AND kcu.TABLE_NAME = ?
+                ORDER BY kcu.ORDINAL_POSITION
+            """, (table_name,))
+            key_columns = [row[0] for row in cursor.fetchall()]
+            if not key_columns:
+                return None
+            if after is not None and len(after) != len(key_columns):
+                raise ValueError("Pagination cursor does not match the table's primary key")
+            
+            # Get column info
+            cursor.execute("""
+                SELECT COLUMN_NAME, DATA_TYPE
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_NAME = ?
+                ORDER BY ORDINAL_POSITION
+            """, (table_name,))
+            columns = [{"name": col[0], "type": col[1]} for col in cursor.fetchall()]
+            
+            # No row-value comparison in T-SQL, so expand (a, b) > (x, y) into
+            # a > x OR (a = x AND b > y), which still seeks on the clustered PK
+            where = ""
+            params = []
+            if after is not None:
+                branches = []
+                for i, col in enumerate(key_columns):
+                    terms = [f"[{prev}] = ?" for prev in key_columns[:i]] + [f"[{col}] > ?"]
+                    branches.append("(" + " AND ".join(terms) + ")")
+                    params.extend(after[:i + 1])
+                where = "WHERE " + " OR ".join(branches)
+            order_by = ", ".join(f"[{col}]" for col in key_columns)
+            cursor.execute(
+                f"SELECT TOP ({limit + 1}) * FROM [{table_name}] {where} ORDER BY {order_by}",
+                *params
+            )
+            rows = cursor.fetchall()
+            
+            has_more = len(rows) > limit
+            rows = [tuple(row) for row in rows[:limit]]
+            names = [col[0] for col in cursor.description]
+            key_positions = [names.index(col) for col in key_columns]
+            
+            return {
+                "fields": names,
+                "rows": rows,
+                "columns": columns,
+                "limit": limit,
+                "hasMore": has_more,
+                "next_key": [rows[-1][i] for i in key_positions] if has_more else None
+            }
+        except Exception as e:
+            print(f"Error fetching table data: {e}")
+            raise
+
+    def stream_rows(self, conn, table_name: str, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Iterator[Any]:
+        cursor = conn.cursor()
+        try:
+            filters = filters or {}
+            where = ""
+            if filters:
+                cursor.execute(f"SELECT TOP (0) * FROM {_quote(table_name)}")
+                columns = [col[0] for col in cursor.description]
+                cursor.fetchall()
+                check_filter_columns(filters, columns)
+                where = "WHERE " + " AND ".join(f"{_quote(col)} = ?" for col in filters)
+            cursor.execute(f"SELECT * FROM {_quote(table_name)} {where}", *filters.values())
+            
+            # fetchmany pulls rows from the server as the client asks for them
+            yield [col[0] for col in cursor.description]
+            batch = cursor.fetchmany(batch_size)
+            while batch:
+                yield [tuple(row) for row in batch]
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+
+    def sample_rows(self, conn, table_name: str, sample_size: int, timeout_ms: int, batch_size: int = 1000) -> Iterator[Any]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT SUM(rows) FROM sys.partitions
+            WHERE object_id = OBJECT_ID(?) AND index_id IN (0, 1)
+        """, table_name)
+        row = cursor.fetchone()
+        percent = sample_percent(row[0] if row else None, sample_size)
+        # TABLESAMPLE reads whole pages picked at random
+        tablesample = f" TABLESAMPLE SYSTEM ({percent} PERCENT)" if percent is not None else ""
+        
+        # pyodbc query timeouts are whole seconds
+        conn.timeout = max(1, -(-int(timeout_ms) // 1000))
+        try:
+            cursor.execute(f"SELECT TOP (?) * FROM [{table_name}]{tablesample}", sample_size)
+            yield [col[0] for col in cursor.description]
+            batch = cursor.fetchmany(batch_size)
+            while batch:
+                yield [tuple(row) for row in batch]
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            conn.timeout = 0
+            cursor.close()
 
+    def execute_query(self, conn, query: str, params: Optional[List[Any]], handle, batch_size: int = 500) -> Iterator[Any]:
+        cursor = conn.cursor()
+        # SQLCancel on the statement handle; pyodbc allows it from another thread
+        handle.on_cancel = cursor.cancel
+        # pyodbc query timeouts are whole seconds
+        conn.timeout = max(1, -(-int(handle.timeout_ms) // 1000))
+        try:
+            cursor.execute(query, *(params or []))
+            if cursor.description is None:
+                handle.rows_affected = cursor.rowcount
+                conn.commit()
+                yield []
+                return
+            
+            yield [col[0] for col in cursor.description]
+            batch = cursor.fetchmany(batch_size)
+            while batch:
+                yield [tuple(row) for row in batch]
+                batch = cursor.fetchmany(batch_size)
+            conn.commit()
+        finally:
+            conn.timeout = 0
+            cursor.close()
+
+    def bulk_insert(self, conn, table_name: str, columns: Optional[List[str]], rows: List[Any]) -> int:
+        # Column names come from the upload's header or keys
+        column_list = ", ".join(_quote(col) for col in columns)
+        placeholders = ", ".join(["?"] * len(columns))
+        cursor = conn.cursor()
+        # Sends the whole batch as parameter arrays in one round trip
+        cursor.fast_executemany = True
+        try:
+            cursor.executemany(f"INSERT INTO {_quote(table_name)} ({column_list}) VALUES ({placeholders})", rows)
+            conn.commit()
+            return len(rows)
+        finally:
+            cursor.close()
@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+import sys
+import time
+from contextlib import ExitStack
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from app.services.adapters.base import chunked, documents_to_rows
+from app.services.db_manager import DBManager
+from app.services.encoding import dumps_json
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def guess_format(filename: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def csv_batches(stream: BinaryIO, batch_size: int, documents: bool = False) -> Iterator[Tuple[Optional[List[str]], List[Any]]]:
+    """(columns, rows) batches from a CSV file whose first row is the header.
+    Empty fields become NULL."""
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    header = next(reader, None)
+    if not header:
+        raise ValueError("CSV upload has no header row")
+    for batch in chunked(reader, batch_size):
+        rows = []
+        for row in batch:
+            if len(row) != len(header):
+                raise ValueError(f"CSV line {reader.line_num}: expected {len(header)} fields, got {len(row)}")
+            rows.append(tuple(value if value != "" else None for value in row))
+        if documents:
+            yield None, [dict(zip(header, row)) for row in rows]
+        else:
+            yield header, rows
+
+
+def ndjson_batches(stream: BinaryIO, batch_size: int, documents: bool = False) -> Iterator[Tuple[Optional[List[str]], List[Any]]]:
+    """(columns, rows) batches from one JSON object per line. For tables the
+    columns are the keys seen in each batch; nested values are stored as JSON text."""
+    def objects():
+        for line_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                doc = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"NDJSON line {line_number}: {e}")
+            if not isinstance(doc, dict):
+                raise ValueError(f"NDJSON line {line_number}: expected an object")
+            yield doc
+
+    for batch in chunked(objects(), batch_size):
+        if documents:
+            yield None, batch
+            continue
+        columns, rows = documents_to_rows(batch)
+        yield columns, [
+            tuple(json.dumps(value) if isinstance(value, (dict, list)) else value for value in row)
+            for row in rows
+        ]
+
+
+def start_import(
+    connection_string: str,
+    table_name: str,
+    fmt: str,
+    stream: BinaryIO,
+    batch_size: int,
+) -> Iterator[Dict[str, Any]]:
+    """Load an upload batch by batch and yield a progress event per batch.
+
+    The first batch is written before this returns, so connection, table
+    and parse errors surface before a response is started. Each batch is
+    committed on its own: memory stays at one batch, and a failure part way
+    leaves the earlier batches loaded (the events say how many rows).
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    started = time.perf_counter()
+    stack = ExitStack()
+    # Readers of this target's cached query results must see the new rows
+    stack.callback(DBManager.invalidate_results, connection_string)
+    try:
+        conn, db_type = stack.enter_context(DBManager.connection(connection_string))
+        if not conn:
+            raise ConnectionError(f"Failed to connect to {db_type}")
+        adapter = DBManager.get_adapter(db_type)
+        reader = csv_batches if fmt == "csv" else ndjson_batches
+        batches = reader(stream, batch_size, documents=db_type == "mongodb")
+        first = next(batches, None)
+        loaded = adapter.bulk_insert(conn, table_name, *first) if first else 0
+    except BaseException:
+        stack.__exit__(*sys.exc_info())
+        raise
+
+    def event(kind: str, count: int, batch_count: int) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        return {
+            "type": kind,
+            "rows_loaded": count,
+            "batches": batch_count,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "rows_per_second": round(count / elapsed) if elapsed > 0 else None,
+        }
+
+    def progress() -> Iterator[Dict[str, Any]]:
+        count = loaded
+        batch_count = 1 if first else 0
+        try:
+            if first:
+                yield event("progress", count, batch_count)
+            for columns, rows in batches:
+                count += adapter.bulk_insert(conn, table_name, columns, rows)
+                batch_count += 1
+                yield event("progress", count, batch_count)
+        except Exception as e:
+            stack.__exit__(*sys.exc_info())
+            print(f"Error importing into {table_name}: {e}")
+            yield {**event("error", count, batch_count), "detail": str(e)}
+            return
+        except BaseException:
+            stack.__exit__(*sys.exc_info())
+            raise
+        stack.close()
+        yield event("summary", count, batch_count)
+
+    return progress()
+
+
+def ndjson_events(events: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    for item in events:
+        yield dumps_json(item) + b"\n"
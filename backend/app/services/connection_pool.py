@@ -0,0 +1,307 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, List, Tuple
+
+from app.core import config
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of open connections for a single connection string.
+
+    Connections are created lazily through the adapter, handed out
+    exclusively, rolled back on return and closed once they sit idle longer
+    than `idle_timeout`. Adapters whose connection objects are already
+    thread-safe pools (MongoClient) set `shareable_connections` and get one
+    shared connection instead, health checked the same way. A shared
+    connection dropped as broken is only closed once its last borrower
+    releases it.
+    """
+
+    def __init__(
+        self,
+        adapter,
+        connection_string: str,
+        max_size: int = config.DB_POOL_MAX_SIZE,
+        idle_timeout: float = config.DB_POOL_IDLE_TIMEOUT,
+        checkout_timeout: float = config.DB_POOL_CHECKOUT_TIMEOUT,
+        ping_interval: float = config.DB_POOL_PING_INTERVAL,
+    ):
+        self.adapter = adapter
+        self.connection_string = connection_string
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+        self.shared = getattr(adapter, "shareable_connections", False)
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, returned_at), most recently used on the right
+        self._size = 0  # idle + checked out
+        self._in_use = 0
+        self._shared_conn = None
+        self._shared_pinged = 0.0
+        # id(conn) -> borrowers of the shared connection and of retired ones
+        self._shared_users = {}
+        # Shared connections dropped while borrowed: id(conn) -> conn
+        self._retired = {}
+        self._closed = False
+        self.last_used = time.monotonic()
+        # Checkouts under way through PoolRegistry.acquire; guarded by the registry's lock
+        self.reserved = 0
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def acquire(self):
+        """Check out a healthy connection, or return None if connecting fails"""
+        if self.shared:
+            return self._acquire_shared()
+
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            conn, idle_since, expired = None, None, []
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                expired = self._take_expired_locked()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timed out waiting for a connection (pool size {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    self._size += 1
+                self._in_use += 1
+                self.last_used = time.monotonic()
+            self._close_all(expired)
+
+            if conn is None:
+                try:
+                    conn = self._open()
+                except Exception:
+                    self._forget()
+                    raise
+                if conn is None:
+                    self._forget()
+                return conn
+
+            # Health check connections that have been idle for a while
+            if time.monotonic() - idle_since < self.ping_interval or self._ping(conn):
+                return conn
+            self._forget()
+            self._close_all([conn])
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool. `discard` means the connection
+        itself is broken: it is closed instead of reused (a shared one once
+        nobody else holds it)."""
+        if conn is None:
+            return
+        if self.shared:
+            with self._cond:
+                self._in_use -= 1
+                self.last_used = time.monotonic()
+                users = self._shared_users.pop(id(conn), 1) - 1
+                if users:
+                    self._shared_users[id(conn)] = users
+                if discard and self._shared_conn is conn:
+                    self._retire_shared_locked()
+                closing = self._retired.pop(id(conn), None) if not users else None
+            if closing is not None:
+                self._close_all([closing])
+            return
+
+        if not discard:
+            discard = not self._reset(conn)
+        with self._cond:
+            self._in_use -= 1
+            self.last_used = time.monotonic()
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard or self._closed:
+            self._close_all([conn])
+
+    def prune(self):
+        """Close connections that have been idle longer than idle_timeout"""
+        with self._cond:
+            expired = self._take_expired_locked()
+        self._close_all(expired)
+
+    def close(self):
+        """Close every idle connection; checked-out ones close on release"""
+        with self._cond:
+            self._closed = True
+            conns = [conn for conn, _ in self._idle]
+            self._size -= len(conns)
+            self._idle.clear()
+            if self._shared_conn is not None:
+                conns.extend(self._retire_shared_locked())
+            self._cond.notify_all()
+        self._close_all(conns)
+
+    def _acquire_shared(self):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            now = time.monotonic()
+            self.last_used = now
+            conn = self._shared_conn
+            # One caller health checks a connection that has gone unchecked a while
+            stale = conn is not None and now - self._shared_pinged >= self.ping_interval
+            if stale:
+                self._shared_pinged = now
+        if stale and not self._ping(conn):
+            with self._cond:
+                closing = self._retire_shared_locked() if self._shared_conn is conn else []
+            self._close_all(closing)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._shared_conn is None:
+                self._shared_conn = self._open()
+                self._shared_pinged = time.monotonic()
+            conn = self._shared_conn
+            if conn is not None:
+                self._in_use += 1
+                self._shared_users[id(conn)] = self._shared_users.get(id(conn), 0) + 1
+            return conn
+
+    def _retire_shared_locked(self) -> List[Any]:
+        """Stop handing out the shared connection. Returns it if it can be
+        closed now; otherwise the last borrower's release closes it."""
+        conn, self._shared_conn = self._shared_conn, None
+        if self._shared_users.get(id(conn)):
+            self._retired[id(conn)] = conn
+            return []
+        return [conn]
+
+    def _take_expired_locked(self) -> List[Any]:
+        expired = []
+        now = time.monotonic()
+        # Oldest connections sit on the left
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            expired.append(conn)
+        return expired
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _open(self):
+        return self.adapter.connect(self.connection_string)
+
+    def _ping(self, conn) -> bool:
+        try:
+            return self.adapter.ping(conn)
+        except Exception as e:
+            print(f"Discarding unhealthy pooled connection: {e}")
+            return False
+
+    def _reset(self, conn) -> bool:
+        try:
+            self.adapter.reset(conn)
+            return True
+        except Exception as e:
+            print(f"Discarding pooled connection that failed to reset: {e}")
+            return False
+
+    def _close_all(self, conns: List[Any]):
+        for conn in conns:
+            try:
+                self.adapter.close(conn)
+            except Exception as e:
+                print(f"Error closing pooled connection: {e}")
+
+
+class PoolRegistry:
+    """LRU-bounded collection of ConnectionPools keyed by connection string"""
+
+    def __init__(
+        self,
+        max_pools: int = config.DB_POOL_MAX_POOLS,
+        idle_timeout: float = config.DB_POOL_IDLE_TIMEOUT,
+    ):
+        self.max_pools = max(1, max_pools)
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._pools: "OrderedDict[str, ConnectionPool]" = OrderedDict()
+
+    def get(self, connection_string: str, adapter) -> ConnectionPool:
+        return self._get(connection_string, adapter, reserve=False)
+
+    def acquire(self, connection_string: str, adapter) -> Tuple[ConnectionPool, Any]:
+        """Check out a connection from the target's pool: (pool, conn).
+
+        The pool is reserved from lookup until the checkout completes (after
+        which in_use covers it), so a request for another target cannot
+        evict and close it in between.
+        """
+        pool = self._get(connection_string, adapter, reserve=True)
+        try:
+            return pool, pool.acquire()
+        finally:
+            with self._lock:
+                pool.reserved -= 1
+
+    def _get(self, connection_string: str, adapter, reserve: bool) -> ConnectionPool:
+        with self._lock:
+            pool = self._pools.get(connection_string)
+            if pool is None:
+                pool = ConnectionPool(adapter, connection_string)
+                self._pools[connection_string] = pool
+            self._pools.move_to_end(connection_string)
+            pool.last_used = time.monotonic()
+            if reserve:
+                pool.reserved += 1
+            evicted = self._evict_locked()
+        for cold in evicted:
+            cold.close()
+        return pool
+
+    def prune(self):
+        """Close idle connections everywhere and drop pools nobody has used lately"""
+        with self._lock:
+            pools = list(self._pools.values())
+            evicted = self._evict_locked()
+        for pool in pools:
+            pool.prune()
+        for cold in evicted:
+            cold.close()
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def _evict_locked(self) -> List[ConnectionPool]:
+        evicted = []
+        now = time.monotonic()
+        for key, pool in list(self._pools.items()):
+            over_limit = len(self._pools) > self.max_pools
+            cold = now - pool.last_used > self.idle_timeout
+            if not (over_limit or cold):
+                # Remaining pools are more recently used than this one
+                break
+            if pool.in_use == 0 and pool.reserved == 0:
+                evicted.append(self._pools.pop(key))
+        return evicted
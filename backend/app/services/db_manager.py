@@ -2,8 +2,41 @@ from .adapters.mysql import MySQLAdapter
 from .adapters.postgres import PostgresAdapter
 from .adapters.mongodb import MongoAdapter
 from .adapters.sqlserver import SQLServerAdapter
+from .adapters.base import chunked, filter_table_refs, marker_digest
+from .connection_pool import PoolRegistry
+from .instrumentation import bind
+from .profiling import profile_cache, profile_rows
+from .relationship_inference import (
+    collect_values, find_candidates, merge_inferred, plan_samples, relationship_cache, score_candidates
+)
+from .result_cache import result_cache
+from .schema_cache import changed_tables, schema_cache, schema_delta
+from .snapshot_store import snapshot_store
+from app.core import config
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Optional
+import sys
+import time
+
+def introspection_batches(table_keys: list, workers: int) -> list:
+    """Split schema keys into per-schema batches of at most ceil(n / workers)"""
+    if not table_keys:
+        return []
+    size = max(1, -(-len(table_keys) // max(1, workers)))
+    groups = {}
+    for key in table_keys:
+        schema_name = key.split(".", 1)[0] if "." in key else ""
+        groups.setdefault(schema_name, []).append(key)
+    batches = []
+    for keys in groups.values():
+        batches.extend(chunked(keys, size))
+    return batches
+
 
 class DBManager:
+    _pools = PoolRegistry()
+
     @staticmethod
     def get_db_type(connection_string: str) -> str:
         cs = connection_string.lower()
@@ -33,6 +66,7 @@ class DBManager:
 
     @classmethod
     def connect(cls, connection_string: str):
+        """Open a new, unpooled connection. Callers own closing it."""
         db_type = cls.get_db_type(connection_string)
         adapter = cls.get_adapter(db_type)
         if adapter:
@@ -40,14 +74,398 @@ class DBManager:
         return None, "unknown"
 
     @classmethod
-    def fetch_schema(cls, connection_string: str):
-        conn, db_type = cls.connect(connection_string)
-        if not conn:
-            raise Exception(f"Failed to connect to {db_type}")
-        
+    @contextmanager
+    def connection(cls, connection_string: str):
+        """Borrow a pooled connection for the duration of a with-block.
+
+        Yields (conn, db_type); conn is None when connecting failed. The
+        connection is returned to the pool afterwards (rolled back), also
+        when the block raised; only errors the adapter reports as a broken
+        connection get it closed instead.
+        """
+        db_type = cls.get_db_type(connection_string)
+        adapter = cls.get_adapter(db_type)
+        if not adapter:
+            yield None, "unknown"
+            return
+
+        pool, conn = cls._pools.acquire(connection_string, adapter)
         try:
+            yield conn, db_type
+        except BaseException as e:
+            # A failed statement or an error in the caller (bad input, an
+            # HTTPException, a client going away) leaves the connection usable
+            pool.release(conn, discard=adapter.is_disconnect(e))
+            raise
+        else:
+            pool.release(conn)
+
+    @classmethod
+    def stream_table(cls, connection_string: str, table_name: str, filters=None, batch_size: int = 1000):
+        """Start reading a table through a server-side cursor.
+
+        Returns (columns, batches). The query has already been sent, so
+        errors surface here; the pooled connection stays checked out until
+        `batches` is exhausted or closed.
+        """
+        stack = ExitStack()
+        try:
+            conn, db_type = stack.enter_context(cls.connection(connection_string))
+            if not conn:
+                raise ConnectionError(f"Failed to connect to {db_type}")
+            rows = cls.get_adapter(db_type).stream_rows(conn, table_name, filters, batch_size)
+            columns = next(rows)
+        except BaseException:
+            stack.__exit__(*sys.exc_info())
+            raise
+
+        def batches():
+            try:
+                yield from rows
+            except BaseException:
+                # Includes the client going away mid-stream; stream_rows closes
+                # its cursor and the pool rolls back (or drops) the connection
+                stack.__exit__(*sys.exc_info())
+                raise
+            else:
+                stack.close()
+
+        return columns, batches()
+
+    @classmethod
+    def prune_pools(cls):
+        """Close idle pooled connections and drop cold pools"""
+        cls._pools.prune()
+
+    @classmethod
+    def close_all(cls):
+        """Close every pooled connection (called on application shutdown)"""
+        cls._pools.close_all()
+
+    @classmethod
+    def fetch_schema(cls, connection_string: str):
+        with cls.connection(connection_string) as (conn, db_type):
+            if not conn:
+                raise Exception(f"Failed to connect to {db_type}")
             adapter = cls.get_adapter(db_type)
             return adapter.fetch_schema(conn)
-        finally:
-            if hasattr(conn, 'close'):
-                conn.close()
+
+    @classmethod
+    def fetch_tables_parallel(
+        cls,
+        connection_string: str,
+        table_keys: list,
+        workers: int = config.INTROSPECTION_WORKERS,
+    ) -> dict:
+        """Introspect `table_keys` on up to `workers` pooled connections at once.
+
+        Keys are grouped by schema, and large groups are cut into batches so
+        every worker gets a similar share. The merged result follows the
+        order of `table_keys`, whatever order the batches finish in.
+        """
+        adapter = cls.get_adapter(cls.get_db_type(connection_string))
+        batches = introspection_batches(table_keys, workers)
+
+        def fetch(batch):
+            with cls.connection(connection_string) as (conn, db_type):
+                if not conn:
+                    raise Exception(f"Failed to connect to {db_type}")
+                return adapter.fetch_tables(conn, batch)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+            parts = list(executor.map(bind(fetch), batches))
+
+        merged = {}
+        for part in parts:
+            merged.update(part)
+        return {key: merged[key] for key in table_keys if key in merged}
+
+    @classmethod
+    def get_schema(
+        cls,
+        connection_string: str,
+        refresh: bool = False,
+        full: bool = False,
+        workers: int = config.INTROSPECTION_WORKERS,
+    ):
+        """Cached fetch_schema. Returns (schema, from_cache).
+
+        `refresh` skips the cached copy; the previous snapshot is still used
+        to re-read only changed tables unless `full` is set. Full scans of
+        large databases are spread over `workers` connections.
+        """
+        if not (refresh or full):
+            schema = schema_cache.get(connection_string)
+            if schema is not None:
+                return schema, True
+        schema, _, from_cache = cls._load_schema(
+            connection_string, force=refresh or full, full=full, workers=workers
+        )
+        return schema, from_cache
+
+    @classmethod
+    def list_tables_page(
+        cls,
+        connection_string: str,
+        pattern: Optional[str] = None,
+        schema_name: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> dict:
+        """One page of table names matching the filters. Answered from the
+        cached schema when there is one, otherwise by a single catalog query."""
+        cached = schema_cache.get(connection_string)
+        adapter = cls.get_adapter(cls.get_db_type(connection_string))
+        if cached is not None:
+            refs = filter_table_refs(map(adapter.table_ref, sorted(cached)), pattern, schema_name)
+            tables, total = refs[offset:offset + limit], len(refs)
+        else:
+            with cls.connection(connection_string) as (conn, db_type):
+                if not conn:
+                    raise ConnectionError(f"Failed to connect to {db_type}")
+                tables, total = adapter.search_tables(conn, pattern, schema_name, limit, offset)
+        return {
+            "tables": tables,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "from_cache": cached is not None,
+        }
+
+    @classmethod
+    def get_table_details(cls, connection_string: str, table_keys: list) -> dict:
+        """Definitions of the given tables only, from the cached schema when
+        there is one, otherwise introspecting just those tables"""
+        cached = schema_cache.get(connection_string)
+        if cached is not None:
+            return {key: cached[key] for key in table_keys if key in cached}
+        with cls.connection(connection_string) as (conn, db_type):
+            if not conn:
+                raise ConnectionError(f"Failed to connect to {db_type}")
+            return cls.get_adapter(db_type).fetch_tables(conn, list(table_keys))
+
+    @classmethod
+    def get_schema_changes(cls, connection_string: str, full: bool = False):
+        """Refresh the cached schema and report what changed since the last snapshot"""
+        _, delta, _ = cls._load_schema(connection_string, force=True, full=full)
+        return delta
+
+    @classmethod
+    def _load_schema(
+        cls,
+        connection_string: str,
+        force: bool,
+        full: bool,
+        workers: int = config.INTROSPECTION_WORKERS,
+    ):
+        """Introspect and cache. Returns (schema, delta, from_cache)."""
+        with schema_cache.load_lock(connection_string):
+            # Another request may have refreshed the entry while we waited
+            if not force:
+                schema = schema_cache.get(connection_string)
+                if schema is not None:
+                    return schema, None, True
+
+            previous = schema_cache.peek(connection_string)
+            with cls.connection(connection_string) as (conn, db_type):
+                if not conn:
+                    raise Exception(f"Failed to connect to {db_type}")
+                adapter = cls.get_adapter(db_type)
+
+                # A refresh always probes; a TTL reload may reuse a probe from the last few seconds
+                markers = schema_cache.change_markers(
+                    connection_string, lambda: adapter.fetch_change_markers(conn), fresh=force
+                )
+                incremental = (
+                    not full
+                    and previous is not None
+                    and previous.markers is not None
+                    and markers is not None
+                )
+                if incremental:
+                    changed = changed_tables(previous.markers, markers)
+                    fetched = adapter.fetch_tables(conn, changed) if changed else {}
+                    schema = {}
+                    for key in markers:
+                        table = fetched.get(key, previous.schema.get(key))
+                        if table is not None:
+                            schema[key] = table
+                else:
+                    table_keys = adapter.list_tables(conn)
+                    parallel = (
+                        workers > 1
+                        and len(table_keys) >= config.PARALLEL_INTROSPECTION_MIN_TABLES
+                    )
+                    if not parallel:
+                        schema = adapter.fetch_schema(conn)
+
+            if not incremental and parallel:
+                # Outside the with-block so this connection is free for a worker
+                schema = cls.fetch_tables_parallel(connection_string, table_keys, workers)
+
+            delta = schema_delta(previous.schema if previous else {}, schema)
+            delta["full"] = not incremental
+            schema_cache.put(connection_string, schema, markers)
+            snapshot_store.submit(connection_string, db_type, schema)
+            return schema, delta, False
+
+    @classmethod
+    def with_exact_counts(
+        cls,
+        connection_string: str,
+        schema: dict,
+        timeout_ms: int = config.EXACT_COUNT_TIMEOUT_MS,
+        workers: int = config.EXACT_COUNT_WORKERS,
+    ) -> dict:
+        """Copy of `schema` with COUNT(*) row counts, run in parallel on pooled
+        connections. Tables whose count fails or times out keep their estimate
+        and stay flagged approximate."""
+        adapter = cls.get_adapter(cls.get_db_type(connection_string))
+
+        def count(table_key):
+            with cls.connection(connection_string) as (conn, db_type):
+                if not conn:
+                    return None
+                try:
+                    return adapter.count_rows(conn, table_key, timeout_ms)
+                except Exception as e:
+                    print(f"Exact count for {table_key} failed: {e}")
+                    return None
+
+        keys = list(schema)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            counts = list(executor.map(bind(count), keys))
+
+        result = {}
+        for key, row_count in zip(keys, counts):
+            table = dict(schema[key])
+            if row_count is not None:
+                table["row_count"] = row_count
+                table["approximate"] = False
+            result[key] = table
+        return result
+
+    @classmethod
+    def infer_relationships(
+        cls,
+        connection_string: str,
+        schema: dict,
+        min_confidence: float = config.INFERENCE_MIN_CONFIDENCE,
+        refresh: bool = False,
+        max_queries: int = config.INFERENCE_MAX_QUERIES,
+        workers: int = config.INFERENCE_WORKERS,
+    ):
+        """Relationships the schema does not declare, from column names and
+        types and then value containment on sampled rows. Tables are sampled
+        in parallel on pooled connections, one query each, at most
+        `max_queries` per run. Returns (result, schema with the inferred
+        foreign keys merged in); both are cached for the schema dict."""
+        if not refresh:
+            cached = relationship_cache.get(connection_string, schema, min_confidence)
+            if cached is not None:
+                return {**cached[0], "cached": True}, cached[1]
+
+        started = time.perf_counter()
+        adapter = cls.get_adapter(cls.get_db_type(connection_string))
+        name_of = lambda key: adapter.table_ref(key)["name"]
+        candidates = find_candidates(schema, name_of)
+        plan, kept = plan_samples(candidates, max_queries)
+
+        def sample(table_key):
+            wanted = plan[table_key]
+            with cls.connection(connection_string) as (conn, db_type):
+                if not conn:
+                    return None
+                rows = adapter.sample_rows(conn, name_of(table_key), wanted["rows"], config.INFERENCE_TIMEOUT_MS)
+                try:
+                    return collect_values(next(rows), rows, wanted["columns"])
+                except Exception as e:
+                    print(f"Sampling {table_key} for relationships failed: {e}")
+                    return None
+                finally:
+                    rows.close()
+
+        keys = list(plan)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            sampled = list(executor.map(bind(sample), keys))
+        samples = {key: result for key, result in zip(keys, sampled) if result is not None}
+
+        relationships = score_candidates(schema, kept, samples, name_of, min_confidence)
+        result = {
+            "relationships": relationships,
+            "inferred": sum(len(fks) for fks in relationships.values()),
+            "candidates": len(candidates),
+            "checked_candidates": len(kept),
+            "tables_sampled": len(samples),
+            "failed_samples": len(keys) - len(samples),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        merged = merge_inferred(schema, relationships)
+        relationship_cache.put(connection_string, schema, min_confidence, result, merged)
+        return {**result, "cached": False}, merged
+
+    @classmethod
+    def profile_table(
+        cls,
+        connection_string: str,
+        table_name: str,
+        sample_size: int = config.PROFILE_SAMPLE_ROWS,
+        refresh: bool = False,
+    ) -> dict:
+        """Approximate column statistics from a random sample of the table,
+        cached per sample size until the TTL runs out or the schema changes"""
+        if not refresh:
+            cached = profile_cache.get(connection_string, table_name, sample_size)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        started = time.perf_counter()
+        with cls.connection(connection_string) as (conn, db_type):
+            if not conn:
+                raise ConnectionError(f"Failed to connect to {db_type}")
+            rows = cls.get_adapter(db_type).sample_rows(
+                conn, table_name, sample_size, config.PROFILE_TIMEOUT_MS
+            )
+            try:
+                fields = next(rows)
+                profile = profile_rows(fields, rows)
+            finally:
+                rows.close()
+
+        profile = {
+            "table": table_name,
+            "sample_size": sample_size,
+            **profile,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        profile_cache.put(connection_string, table_name, sample_size, profile)
+        return {**profile, "cached": False}
+
+    @classmethod
+    def schema_version(cls, connection_string: str):
+        """Digest of the target's change markers (None when its adapter has
+        none). The probe is shared with schema loads for SCHEMA_PROBE_INTERVAL
+        seconds, and only then needs a connection."""
+        def probe():
+            with cls.connection(connection_string) as (conn, db_type):
+                if not conn:
+                    raise Exception(f"Failed to connect to {db_type}")
+                return cls.get_adapter(db_type).fetch_change_markers(conn)
+
+        markers = schema_cache.change_markers(connection_string, probe)
+        return marker_digest(markers) if markers is not None else None
+
+    @classmethod
+    def invalidate_schema(cls, connection_string: str):
+        """Forget the cached schema, and the query results that depend on it,
+        after DDL against this target"""
+        schema_cache.invalidate(connection_string)
+        result_cache.invalidate(connection_string)
+        profile_cache.invalidate(connection_string)
+        relationship_cache.invalidate(connection_string)
+
+    @classmethod
+    def invalidate_results(cls, connection_string: str):
+        """Forget cached query results after writes to this target"""
+        result_cache.invalidate(connection_string)
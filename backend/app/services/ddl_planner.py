@@ -0,0 +1,226 @@
+from typing import Any, Callable, Dict, List, Optional
+
+# Lock levels per dialect, weakest first; a combined statement takes the
+# strongest lock any of its clauses needs
+LOCK_ORDER = {
+    "postgresql": ["ACCESS EXCLUSIVE"],
+    "mysql": ["none (INSTANT)", "none (INPLACE)", "SHARED (COPY, writes blocked)"],
+    "sqlserver": ["Sch-M"],
+}
+
+
+class Clause:
+    """One operation rendered for a dialect.
+
+    `group` names the statement kind it can be merged into (None means it
+    must run on its own); `columns` are the column names it touches, so two
+    operations on the same column are never merged into one statement.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        op_type: str,
+        sql: str,
+        columns: List[str],
+        group: Optional[str],
+        rewrite: bool,
+        lock: str,
+        note: str,
+    ):
+        self.index = index
+        self.op_type = op_type
+        self.sql = sql
+        self.columns = columns
+        self.group = group
+        self.rewrite = rewrite
+        self.lock = lock
+        self.note = note
+
+
+def _column_def(col: Dict[str, Any], explicit_null: bool = False) -> str:
+    col_def = f"{col['type']}"
+    if not col.get("nullable", True):
+        col_def += " NOT NULL"
+    elif explicit_null:
+        col_def += " NULL"
+    return col_def
+
+
+def _postgres_clauses(table_name: str, operations: List[Dict[str, Any]]) -> List[Clause]:
+    clauses = []
+    for i, op in enumerate(operations):
+        if op["type"] == "add":
+            col = op["column"]
+            clauses.append(Clause(
+                i, "add", f'ADD COLUMN "{col["name"]}" {_column_def(col)}', [col["name"]], "alter",
+                False, "ACCESS EXCLUSIVE", "catalog-only (no default, or a constant one on PG 11+)",
+            ))
+        elif op["type"] == "modify":
+            col = op["column"]
+            null_clause = "DROP NOT NULL" if col.get("nullable", True) else "SET NOT NULL"
+            clauses.append(Clause(
+                i, "modify",
+                f'ALTER COLUMN "{col["name"]}" TYPE {col["type"]}, ALTER COLUMN "{col["name"]}" {null_clause}',
+                [col["name"]], "alter", True, "ACCESS EXCLUSIVE",
+                "TYPE rewrites the table and its indexes unless the types are binary-coercible"
+                + ("; SET NOT NULL scans the table" if not col.get("nullable", True) else ""),
+            ))
+        elif op["type"] == "drop":
+            clauses.append(Clause(
+                i, "drop", f'DROP COLUMN "{op["columnName"]}"', [op["columnName"]], "alter",
+                False, "ACCESS EXCLUSIVE", "catalog-only; space is reclaimed by a later rewrite",
+            ))
+        elif op["type"] == "rename":
+            # RENAME cannot share an ALTER TABLE with other subcommands
+            clauses.append(Clause(
+                i, "rename",
+                f'ALTER TABLE "{table_name}" RENAME COLUMN "{op["oldName"]}" TO "{op["newName"]}"',
+                [op["oldName"], op["newName"]], None, False, "ACCESS EXCLUSIVE", "catalog-only",
+            ))
+        else:
+            raise ValueError(f"Unsupported alter operation: {op['type']}")
+    return clauses
+
+
+def _mysql_clauses(table_name: str, operations: List[Dict[str, Any]]) -> List[Clause]:
+    clauses = []
+    for i, op in enumerate(operations):
+        if op["type"] == "add":
+            col = op["column"]
+            col_def = _column_def(col)
+            if col.get("default") is not None:
+                col_def += f" DEFAULT {col['default']}"
+            clauses.append(Clause(
+                i, "add", f"ADD COLUMN `{col['name']}` {col_def}", [col["name"]], "alter",
+                False, "none (INSTANT)", "INSTANT on 8.0.12+; older servers rebuild in place",
+            ))
+        elif op["type"] == "modify":
+            col = op["column"]
+            clauses.append(Clause(
+                i, "modify", f"MODIFY COLUMN `{col['name']}` {_column_def(col)}", [col["name"]], "alter",
+                True, "SHARED (COPY, writes blocked)", "type changes copy the table",
+            ))
+        elif op["type"] == "drop":
+            clauses.append(Clause(
+                i, "drop", f"DROP COLUMN `{op['columnName']}`", [op["columnName"]], "alter",
+                True, "none (INPLACE)", "INSTANT on 8.0.29+; older servers rebuild in place",
+            ))
+        elif op["type"] == "rename":
+            clauses.append(Clause(
+                i, "rename", f"RENAME COLUMN `{op['oldName']}` TO `{op['newName']}`",
+                [op["oldName"], op["newName"]], "alter", False, "none (INSTANT)", "metadata-only",
+            ))
+        else:
+            raise ValueError(f"Unsupported alter operation: {op['type']}")
+    return clauses
+
+
+def _sqlserver_clauses(table_name: str, operations: List[Dict[str, Any]]) -> List[Clause]:
+    clauses = []
+    for i, op in enumerate(operations):
+        if op["type"] == "add":
+            col = op["column"]
+            nullable = col.get("nullable", True)
+            clauses.append(Clause(
+                i, "add", f"[{col['name']}] {_column_def(col)}", [col["name"]], "add", False, "Sch-M",
+                "metadata-only" if nullable else "metadata-only, but fails on a non-empty table without a default",
+            ))
+        elif op["type"] == "modify":
+            # ALTER COLUMN takes exactly one column per statement
+            col = op["column"]
+            clauses.append(Clause(
+                i, "modify",
+                f"ALTER TABLE [{table_name}] ALTER COLUMN [{col['name']}] {_column_def(col, explicit_null=True)}",
+                [col["name"]], None, True, "Sch-M",
+                "size-of-data for most type changes; widening a varchar is metadata-only",
+            ))
+        elif op["type"] == "drop":
+            clauses.append(Clause(
+                i, "drop", f"[{op['columnName']}]", [op["columnName"]], "drop", False, "Sch-M",
+                "metadata-only; space is reclaimed by an index rebuild",
+            ))
+        elif op["type"] == "rename":
+            old = f"{table_name}.{op['oldName']}".replace("'", "''")
+            new = op["newName"].replace("'", "''")
+            clauses.append(Clause(
+                i, "rename", f"EXEC sp_rename '{old}', '{new}', 'COLUMN'",
+                [op["oldName"], op["newName"]], None, False, "Sch-M", "metadata-only",
+            ))
+        else:
+            raise ValueError(f"Unsupported alter operation: {op['type']}")
+    return clauses
+
+
+def _statement(dialect: str, table_name: str, group: str, fragments: List[str]) -> str:
+    if dialect == "postgresql":
+        return f'ALTER TABLE "{table_name}" ' + ", ".join(fragments)
+    if dialect == "mysql":
+        return f"ALTER TABLE `{table_name}` " + ", ".join(fragments)
+    if group == "add":
+        return f"ALTER TABLE [{table_name}] ADD " + ", ".join(fragments)
+    return f"ALTER TABLE [{table_name}] DROP COLUMN " + ", ".join(fragments)
+
+
+_CLAUSES: Dict[str, Callable[[str, List[Dict[str, Any]]], List[Clause]]] = {
+    "postgresql": _postgres_clauses,
+    "mysql": _mysql_clauses,
+    "sqlserver": _sqlserver_clauses,
+}
+
+
+def plan_alter(dialect: str, table_name: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compile alter_table operations into the fewest statements the dialect allows.
+
+    Consecutive mergeable operations share one ALTER TABLE; an operation
+    that cannot be merged, or that touches a column an earlier operation in
+    the current statement already touched, starts a new one, so the result
+    applies in request order. Every statement and operation reports
+    whether it rewrites the table and which lock it takes.
+    """
+    if dialect not in _CLAUSES:
+        raise ValueError(f"No DDL planner for {dialect}")
+    clauses = _CLAUSES[dialect](table_name, operations)
+    ranks = {lock: rank for rank, lock in enumerate(LOCK_ORDER[dialect])}
+
+    groups: List[List[Clause]] = []
+    for clause in clauses:
+        current = groups[-1] if groups else None
+        if (
+            current
+            and clause.group is not None
+            and current[0].group == clause.group
+            and not any(set(clause.columns) & set(other.columns) for other in current)
+        ):
+            current.append(clause)
+        else:
+            groups.append([clause])
+
+    statements = []
+    for group in groups:
+        if group[0].group is None:
+            sql = group[0].sql
+        else:
+            sql = _statement(dialect, table_name, group[0].group, [clause.sql for clause in group])
+        statements.append({
+            "sql": sql,
+            "operations": [clause.index for clause in group],
+            "rewrite": any(clause.rewrite for clause in group),
+            "lock": max((clause.lock for clause in group), key=lambda lock: ranks.get(lock, 0)),
+        })
+
+    return {
+        "dialect": dialect,
+        "statements": statements,
+        "operations": [
+            {
+                "index": clause.index,
+                "type": clause.op_type,
+                "rewrite": clause.rewrite,
+                "lock": clause.lock,
+                "note": clause.note,
+            }
+            for clause in clauses
+        ],
+        "rewrites": sum(1 for statement in statements if statement["rewrite"]),
+    }
@@ -0,0 +1,264 @@
+import base64
+import datetime
+import decimal
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi.responses import Response
+
+from app.services.instrumentation import observe_encoding
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional format
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional format
+    pa = None
+
+try:
+    from bson import ObjectId
+except ImportError:  # pragma: no cover - pymongo not installed
+    ObjectId = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+LAYOUTS = ("rows", "columnar")
+
+# Stands in for a field a document does not have (documents_to_rows(...,
+# missing=MISSING)): left out of row objects, null everywhere else
+MISSING = object()
+
+_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/vnd.apache.arrow.file": ARROW,
+    "application/*": JSON,
+    "*/*": JSON,
+}
+
+
+def available_formats() -> List[str]:
+    formats = [JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    if pa is not None:
+        formats.append(ARROW)
+    return formats
+
+
+def negotiate(accept: Optional[str], offers: Optional[Sequence[str]] = None) -> str:
+    """Pick the best media type from an Accept header. Unknown or unavailable
+    types are skipped; JSON is the fallback."""
+    offers = [media for media in (offers or available_formats()) if media in available_formats()]
+    candidates = []
+    for position, part in enumerate((accept or "").split(",")):
+        media, _, params = part.strip().partition(";")
+        media = _ALIASES.get(media.strip().lower(), media.strip().lower())
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media in offers and quality > 0:
+            candidates.append((-quality, position, media))
+    return min(candidates)[2] if candidates else JSON
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _seconds(value):
+    return value.total_seconds()
+
+
+def _number(value):
+    """Decimal as an int when it has no fractional digits, else a float (as FastAPI encodes it)"""
+    exponent = value.as_tuple().exponent
+    if isinstance(exponent, int) and exponent >= 0:
+        return int(value)
+    return float(value)
+
+
+def _bytes_text(value):
+    """UTF-8 text as FastAPI sends it; base64 for bytes that are not UTF-8"""
+    value = bytes(value)
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return base64.b64encode(value).decode("ascii")
+
+
+def _converters(target: str, exact_decimals: bool = False) -> List[tuple]:
+    """(types, converter) pairs for one output format, most specific first.
+
+    JSON and MessagePack values match FastAPI's default encoding: decimals
+    are numbers unless exact_decimals asks for their exact text.
+    """
+    if target == "arrow":
+        # Arrow has native temporal, decimal and binary types
+        return [((uuid.UUID,), str), ((memoryview, bytearray), bytes)] + (
+            [((ObjectId,), str)] if ObjectId is not None else []
+        )
+    converters = [
+        ((datetime.datetime, datetime.date, datetime.time), _isoformat),
+        ((datetime.timedelta,), _seconds),
+        ((uuid.UUID,), str),
+        ((decimal.Decimal,), str if exact_decimals else _number),
+    ]
+    if ObjectId is not None:
+        converters.append(((ObjectId,), str))
+    if target == "msgpack":
+        # MessagePack carries raw bytes
+        return converters + [((memoryview, bytearray), bytes)]
+    return converters + [((bytes, bytearray, memoryview), _bytes_text)]
+
+
+def _pick(kind: type, converters: List[tuple]) -> Optional[Callable[[Any], Any]]:
+    for types, converter in converters:
+        if issubclass(kind, types):
+            return converter
+    return None
+
+
+def convert_column(values: Sequence[Any], target: str = "json", exact_decimals: bool = False) -> list:
+    """Make one column serializable for `target` ("json", "msgpack", "arrow").
+
+    Driver columns hold one Python type (plus None), so the converter is
+    chosen once per column; mixed columns (documents) fall back to a
+    per-value lookup. None and MISSING pass through unchanged.
+    """
+    converters = _converters(target, exact_decimals)
+    kinds = {type(value) for value in values if value is not None and value is not MISSING}
+    if not kinds:
+        return list(values)
+    if len(kinds) == 1:
+        converter = _pick(kinds.pop(), converters)
+        if converter is None:
+            return list(values)
+        return [value if value is None or value is MISSING else converter(value) for value in values]
+
+    by_kind = {kind: _pick(kind, converters) for kind in kinds}
+    result = []
+    for value in values:
+        converter = by_kind.get(type(value)) if value is not None else None
+        result.append(converter(value) if converter else value)
+    if target == "arrow":
+        # Arrow columns need a single type
+        result = [None if value is None else _text(value) for value in result]
+    return result
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def dumps_json(payload: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the stdlib encoder copes
+            pass
+    return json.dumps(payload, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode(payload: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(payload, default=str, use_bin_type=True)
+    return dumps_json(payload)
+
+
+def render(payload: Any, accept: Optional[str] = None) -> Response:
+    """Serialize a plain payload (e.g. a schema) as JSON or MessagePack"""
+    media_type = negotiate(accept, [JSON, MSGPACK])
+    started = time.perf_counter()
+    body = encode(payload, media_type)
+    observe_encoding(media_type, time.perf_counter() - started, len(body))
+    return Response(content=body, media_type=media_type)
+
+
+def _columns(result: Dict[str, Any], target: str, exact_decimals: bool, keep_missing: bool = False) -> tuple:
+    fields = result.pop("fields")
+    rows = result.pop("rows")
+    if not rows:
+        return fields, [[] for _ in fields]
+    columns = []
+    for values in zip(*rows):
+        if not keep_missing and MISSING in values:
+            values = [None if value is MISSING else value for value in values]
+        columns.append(convert_column(values, target, exact_decimals))
+    return fields, columns
+
+
+def _arrow_stream(fields: List[str], columns: List[list], metadata: Dict[str, Any]) -> bytes:
+    arrays = []
+    for values in columns:
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            arrays.append(pa.array([None if value is None else _text(value) for value in values]))
+    table = pa.Table.from_arrays(arrays, names=list(fields))
+    # Paging info and column types travel in the schema metadata
+    table = table.replace_schema_metadata({"dbstru": dumps_json(metadata)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def render_table(
+    result: Dict[str, Any],
+    accept: Optional[str] = None,
+    layout: str = "rows",
+    exact_decimals: bool = False,
+) -> Response:
+    """Serialize an adapter page ({"fields", "rows", ...}) in the negotiated format.
+
+    layout="rows" sends "data" as a list of objects (the original shape,
+    documents without their missing fields); layout="columnar" sends the
+    field names once, one value array per field and "layout": "columnar".
+    Arrow IPC is always columnar. Decimals are numbers, which may round
+    them; exact_decimals sends their exact text instead (Arrow keeps them
+    exact either way).
+    """
+    media_type = negotiate(accept)
+    started = time.perf_counter()
+    if media_type == ARROW:
+        fields, columns = _columns(result, "arrow", exact_decimals)
+        body = _arrow_stream(fields, columns, result)
+    else:
+        target = "msgpack" if media_type == MSGPACK else "json"
+        if layout == "columnar":
+            result["fields"], result["data"] = _columns(result, target, exact_decimals)
+            result["layout"] = layout
+        else:
+            fields, columns = _columns(result, target, exact_decimals, keep_missing=True)
+            if any(MISSING in column for column in columns):
+                result["data"] = [
+                    {field: value for field, value in zip(fields, row) if value is not MISSING}
+                    for row in zip(*columns)
+                ]
+            else:
+                result["data"] = [dict(zip(fields, row)) for row in zip(*columns)]
+        body = encode(result, media_type)
+    observe_encoding(media_type, time.perf_counter() - started, len(body))
+    return Response(content=body, media_type=media_type)
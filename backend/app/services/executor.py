@@ -0,0 +1,216 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from app.core import config
+from app.services.db_manager import DBManager
+
+_DONE = object()
+
+
+class _TargetLimit:
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class _Slot:
+    """One claimed unit of a target's concurrency limit, released once"""
+
+    def __init__(self, key: str, target: _TargetLimit, loop: asyncio.AbstractEventLoop):
+        self.key = key
+        self.target = target
+        self.loop = loop
+        self.held = True
+        # Set when the endpoint holding the slot hands it to a stream
+        self.streaming = False
+
+
+# The slot held by the db_endpoint call running in this context
+_current_slot: contextvars.ContextVar[Optional[_Slot]] = contextvars.ContextVar("db_slot", default=None)
+
+
+class _Stream:
+    """Drains a blocking iterator on DBExecutor while holding a target slot.
+
+    The slot is released when the iterator is exhausted, fails or is
+    closed, or (for a response that was never sent) when the stream is
+    garbage collected.
+    """
+
+    def __init__(self, connection_string: str, iterator: Iterator[Any], slot: Optional[_Slot]):
+        self._slot = slot
+        self._connection_string = connection_string
+        self._db_type = DBManager.get_db_type(connection_string)
+        self._iterator = iterator
+        self._closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            if self._slot is None:
+                self._slot = await DBExecutor._claim(self._connection_string)
+            item = await DBExecutor._submit(self._db_type, next, self._iterator, _DONE)
+        except BaseException:
+            await self.aclose()
+            raise
+        if item is _DONE:
+            await self.aclose()
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            close = getattr(self._iterator, "close", None)
+            if close is not None:
+                await DBExecutor._submit(self._db_type, close)
+        finally:
+            if self._slot is not None:
+                DBExecutor._release(self._slot)
+
+    def __del__(self):
+        slot = getattr(self, "_slot", None)
+        if slot is not None and slot.held:
+            try:
+                slot.loop.call_soon_threadsafe(DBExecutor._release, slot)
+            except RuntimeError:
+                # The event loop is already closed
+                pass
+
+
+class DBExecutor:
+    """Runs blocking driver calls off the event loop.
+
+    Each database type gets its own bounded thread pool, so a slow SQL
+    Server introspection cannot starve Postgres requests, and each
+    connection string gets a semaphore capping how many calls may run
+    against it at once (queued callers wait without holding a thread).
+    Streams keep their slot for as long as they hold a pooled connection.
+    """
+
+    _lock = threading.Lock()
+    _executors: Dict[str, ThreadPoolExecutor] = {}
+    _targets: Dict[str, _TargetLimit] = {}
+
+    @classmethod
+    def executor_for(cls, db_type: str) -> ThreadPoolExecutor:
+        with cls._lock:
+            executor = cls._executors.get(db_type)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max(1, config.executor_workers(db_type)),
+                    thread_name_prefix=f"db-{db_type}",
+                )
+                cls._executors[db_type] = executor
+            return executor
+
+    @classmethod
+    async def run(cls, connection_string: str, fn: Callable[..., Any], /, *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) on the pool for this connection string's database type"""
+        db_type = DBManager.get_db_type(connection_string)
+        slot = await cls._claim(connection_string)
+        token = _current_slot.set(slot)
+        try:
+            return await cls._submit(db_type, fn, *args, **kwargs)
+        finally:
+            _current_slot.reset(token)
+            if not slot.streaming:
+                cls._release(slot)
+
+    @classmethod
+    def iterate(cls, connection_string: str, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """Drain a blocking iterator (e.g. a streaming cursor) on the database type's pool.
+
+        The iterator usually holds a pooled connection until it is closed,
+        so the stream holds a target slot for its whole life: called from a
+        db_endpoint body it takes over the endpoint's slot (under which the
+        connection was checked out), otherwise it claims one before its
+        first read. Slow clients therefore cannot hold more connections
+        than DB_TARGET_CONCURRENCY allows.
+        """
+        slot = _current_slot.get()
+        if slot is None or slot.streaming or not slot.held:
+            slot = None
+        else:
+            slot.streaming = True
+        return _Stream(connection_string, iterator, slot)
+
+    @classmethod
+    async def _claim(cls, connection_string: str) -> _Slot:
+        key = hashlib.sha256(connection_string.encode("utf-8")).hexdigest()
+        target = cls._targets.get(key)
+        if target is None:
+            target = cls._targets[key] = _TargetLimit(max(1, config.DB_TARGET_CONCURRENCY))
+        target.users += 1
+        try:
+            await target.semaphore.acquire()
+        except BaseException:
+            cls._leave(key, target)
+            raise
+        return _Slot(key, target, asyncio.get_running_loop())
+
+    @classmethod
+    def _release(cls, slot: _Slot):
+        if not slot.held:
+            return
+        slot.held = False
+        slot.target.semaphore.release()
+        cls._leave(slot.key, slot.target)
+
+    @classmethod
+    def _leave(cls, key: str, target: _TargetLimit):
+        target.users -= 1
+        if target.users == 0:
+            cls._targets.pop(key, None)
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            executors = list(cls._executors.values())
+            cls._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    async def _submit(cls, db_type: str, fn: Callable[..., Any], /, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        # Carry context variables (request-scoped state) into the worker thread
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        return await loop.run_in_executor(cls.executor_for(db_type), call)
+
+
+def _find_connection_string(kwargs: Dict[str, Any]) -> str:
+    if isinstance(kwargs.get("connection_string"), str):
+        return kwargs["connection_string"]
+    for value in kwargs.values():
+        connection_string = getattr(value, "connection_string", None)
+        if isinstance(connection_string, str):
+            return connection_string
+    raise ValueError("Endpoint has no connection_string to route on")
+
+
+def db_endpoint(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Turn a blocking endpoint into an async one whose body runs on DBExecutor.
+
+    The endpoint keeps its signature (FastAPI reads it through __wrapped__);
+    the connection string is taken from a `connection_string` parameter or
+    from the request model that carries one.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await DBExecutor.run(_find_connection_string(kwargs), fn, *args, **kwargs)
+
+    return wrapper
+
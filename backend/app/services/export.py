@@ -0,0 +1,79 @@
+import csv
+import io
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from app.services.adapters.base import documents_to_rows
+from app.services.encoding import MISSING, convert_column, dumps_json
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _converted(columns: Optional[List[str]], batch: List[Any]) -> Tuple[List[str], List[tuple]]:
+    """Field names and rows of one batch, with values converted column by
+    column as /table-data converts them. Documents become rows over the
+    batch's fields, with MISSING for the fields a document lacks."""
+    if columns is None:
+        columns, batch = documents_to_rows(batch, MISSING)
+    if not batch:
+        return columns, []
+    return columns, list(zip(*[convert_column(values) for values in zip(*batch)]))
+
+
+def _as_dicts(fields: List[str], rows: List[tuple]) -> Iterator[dict]:
+    for row in rows:
+        yield {field: value for field, value in zip(fields, row) if value is not MISSING}
+
+
+def ndjson_chunks(columns: Optional[List[str]], batches: Iterable[List[Any]]) -> Iterator[bytes]:
+    """One JSON object per line, one chunk per batch"""
+    for batch in batches:
+        lines = [dumps_json(row) for row in _as_dicts(*_converted(columns, batch))]
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+
+def _csv_value(value: Any) -> Any:
+    """Nested documents and arrays as JSON text"""
+    if isinstance(value, (dict, list)):
+        return dumps_json(value).decode("utf-8")
+    return value
+
+
+def csv_chunks(columns: Optional[List[str]], batches: Iterable[List[Any]]) -> Iterator[bytes]:
+    """CSV with a header row. Schemaless rows (dicts) take their header from
+    the first batch; fields that only appear later are dropped."""
+    buffer = io.StringIO()
+    writer = None
+    for batch in batches:
+        if not batch:
+            continue
+        fields, rows = _converted(columns, batch)
+        if writer is None:
+            if columns is None:
+                writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+                writer.writeheader()
+            else:
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+        if columns is None:
+            writer.writerows(
+                {field: _csv_value(value) for field, value in row.items()} for row in _as_dicts(fields, rows)
+            )
+        else:
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if writer is None and columns is not None:
+        # Empty table: still send the header
+        csv.writer(buffer).writerow(columns)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_rows(fmt: str, columns: Optional[List[str]], batches: Iterable[List[Any]]) -> Iterator[bytes]:
+    if fmt == "csv":
+        return csv_chunks(columns, batches)
+    return ndjson_chunks(columns, batches)
@@ -0,0 +1,425 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from app.core import config
+from app.services.encoding import dumps_json
+from app.services.schema_cache import SchemaCache
+from app.services.schema_graph import SchemaGraph
+
+LAYOUT_ALGORITHMS = ("layered", "force")
+
+# Node box sizes, matching what the ERD view renders
+NODE_WIDTH = 350
+HEADER_HEIGHT = 60
+COLUMN_HEIGHT = 30
+GAP = 100
+
+# Below this share of tables already placed, lay out from scratch
+_INCREMENTAL_MIN_SHARE = 0.5
+# Nodes whose far-field repulsion is computed at once, to bound memory
+_REPULSION_BLOCK = 4096
+# Deepest level of the repulsion grid hierarchy (4^10 cells)
+_MAX_DEPTH = 10
+# Up to this many nodes every pair is computed directly
+_EXACT_MAX_NODES = 256
+# Node-steps of a full force layout (tables x iterations); bigger schemas
+# get fewer iterations, but never fewer than _FORCE_MIN_ITERATIONS
+_FORCE_STEP_BUDGET = 100000
+_FORCE_MIN_ITERATIONS = 30
+# Incremental force layouts move new tables among the placed tables within
+# this many node spacings of where they start
+_NEIGHBOURHOOD = 3
+# Pull towards the centroid, so tables without relationships do not drift off
+GRAVITY = 1.0
+
+
+def structure_hash(schema: Dict[str, Any]) -> str:
+    """Hash of what the layout depends on: tables, their column counts and
+    foreign keys. Row counts and other volatile fields are left out."""
+    material = [
+        [key, len(schema[key].get("columns") or []), schema[key].get("foreign_keys") or []]
+        for key in sorted(schema)
+    ]
+    return hashlib.sha256(dumps_json(material)).hexdigest()
+
+
+def _heights(graph: SchemaGraph) -> np.ndarray:
+    return np.array(
+        [len(graph.schema[key].get("columns") or []) * COLUMN_HEIGHT + HEADER_HEIGHT for key in graph.tables],
+        dtype=float,
+    )
+
+
+def _edge_arrays(graph: SchemaGraph) -> Tuple[np.ndarray, np.ndarray]:
+    index = {key: i for i, key in enumerate(graph.tables)}
+    pairs = sorted({(index[edge["from"]], index[edge["to"]]) for edge in graph.edges if edge["from"] != edge["to"]})
+    return np.array([s for s, _ in pairs], dtype=int), np.array([d for _, d in pairs], dtype=int)
+
+
+def _layers(graph: SchemaGraph) -> Dict[str, int]:
+    """Longest-path layering over the strongly connected components:
+    referenced tables in layer 0, each table one layer past what it references"""
+    layer: Dict[str, int] = {}
+    for component in graph.components:
+        members = set(component)
+        depth = 0
+        for key in component:
+            for ref in graph.forward[key]:
+                if ref not in members:
+                    depth = max(depth, layer[ref] + 1)
+        for key in component:
+            layer[key] = depth
+    return layer
+
+
+def _grid(keys, heights: Dict[str, float], left: float, top: float) -> Dict[str, Tuple[float, float]]:
+    """Tables without relationships, packed into a square-ish grid"""
+    positions = {}
+    columns = max(1, math.ceil(math.sqrt(len(keys))))
+    for start in range(0, len(keys), columns):
+        row = keys[start:start + columns]
+        for offset, key in enumerate(row):
+            positions[key] = (left + offset * (NODE_WIDTH + GAP), top)
+        top += max(heights[key] for key in row) + GAP
+    return positions
+
+
+def layered_layout(graph: SchemaGraph, iterations: int) -> Dict[str, Tuple[float, float]]:
+    """Sugiyama-style layout: tables flow left to right from referenced to
+    referencing, ordered within each column by repeated barycenter sweeps
+    (up to `iterations`, stopping once the order settles). Columns taller
+    than about sqrt(n) tables wrap into extra columns; unrelated tables are
+    gridded to the right."""
+    heights = dict(zip(graph.tables, _heights(graph).tolist()))
+    orphans = set(graph.orphans())
+    connected = [key for key in graph.tables if key not in orphans]
+    positions: Dict[str, Tuple[float, float]] = {}
+    left = 0.0
+
+    if connected:
+        layer_of = _layers(graph)
+        index = {key: i for i, key in enumerate(connected)}
+        layer = np.array([layer_of[key] for key in connected])
+        pairs = [(index[e["from"]], index[e["to"]]) for e in graph.edges if e["from"] != e["to"]]
+        src = np.array([s for s, _ in pairs], dtype=int)
+        dst = np.array([d for _, d in pairs], dtype=int)
+        n = len(connected)
+
+        # Start from name order, then move each table to the mean relative
+        # position of its neighbours, all layers at once
+        order = np.lexsort((np.arange(n), layer))
+        for _ in range(max(1, iterations)):
+            rank = np.empty(n)
+            for value in np.unique(layer):
+                members = order[layer[order] == value]
+                rank[members] = np.arange(len(members)) / max(len(members) - 1, 1)
+            sums = np.bincount(src, weights=rank[dst], minlength=n) + np.bincount(dst, weights=rank[src], minlength=n)
+            counts = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+            barycenter = np.where(counts > 0, sums / np.maximum(counts, 1), rank)
+            new_order = np.lexsort((rank, barycenter, layer))
+            if np.array_equal(new_order, order):
+                break
+            order = new_order
+
+        per_column = max(4, math.ceil(math.sqrt(n)))
+        for value in np.unique(layer):
+            members = [connected[i] for i in order[layer[order] == value]]
+            for start in range(0, len(members), per_column):
+                top = 0.0
+                for key in members[start:start + per_column]:
+                    positions[key] = (left, top)
+                    top += heights[key] + GAP
+                left += NODE_WIDTH + GAP
+        left += GAP
+
+    positions.update(_grid(sorted(orphans), heights, left, 0.0))
+    return positions
+
+
+def _pushes(dx: np.ndarray, dy: np.ndarray, mass, k: float) -> Tuple[np.ndarray, np.ndarray]:
+    """k^2/d pushes along (dx, dy) from `mass` nodes at that offset"""
+    scale = mass * (k * k) / np.maximum(dx * dx + dy * dy, 1e-2)
+    return dx * scale, dy * scale
+
+
+def _near_repulsion(pos: np.ndarray, cell: np.ndarray, side: int, k: float, force: np.ndarray):
+    """Exact pushes between nodes in the same or adjacent finest cells"""
+    n = len(pos)
+    flat = cell[:, 0] * side + cell[:, 1]
+    order = np.argsort(flat, kind="stable")
+    sorted_cells = flat[order]
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            x, y = cell[:, 0] + dx, cell[:, 1] + dy
+            target = x * side + y
+            start = np.searchsorted(sorted_cells, target, "left")
+            count = np.searchsorted(sorted_cells, target, "right") - start
+            count[(x < 0) | (x >= side) | (y < 0) | (y >= side)] = 0
+            # Every (node, member of the neighbouring cell) pair, flattened
+            i = np.repeat(np.arange(n), count)
+            within = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+            j = order[np.repeat(start, count) + within]
+            i, j = i[i != j], j[i != j]
+            push_x, push_y = _pushes(pos[i, 0] - pos[j, 0], pos[i, 1] - pos[j, 1], 1.0, k)
+            force[:, 0] += np.bincount(i, weights=push_x, minlength=n)
+            force[:, 1] += np.bincount(i, weights=push_y, minlength=n)
+
+
+def _repulsion(pos: np.ndarray, k: float) -> np.ndarray:
+    """k^2/d pushes between all pairs of nodes, Barnes-Hut style on a grid
+    hierarchy over the bounding square. Pairs in adjacent cells of the
+    finest level (about one node per cell) are computed exactly; every
+    other node pushes through the centre of mass of the largest cell that
+    is well separated from the receiving node's cell, i.e. not adjacent to
+    it at its own level but adjacent at the parent level. That is at most
+    27 cells per level, so a step costs O(n log n) rather than O(n^2)."""
+    n = len(pos)
+    if n <= _EXACT_MAX_NODES:
+        dx = pos[:, None, 0] - pos[None, :, 0]
+        dy = pos[:, None, 1] - pos[None, :, 1]
+        push_x, push_y = _pushes(dx, dy, 1.0, k)
+        return np.stack([push_x.sum(1), push_y.sum(1)], 1)
+
+    force = np.zeros_like(pos)
+    depth = min(_MAX_DEPTH, max(2, math.ceil(math.log2(math.sqrt(n)))))
+    side = 1 << depth
+    low = pos.min(0)
+    extent = max(float((pos.max(0) - low).max()), 1e-6)
+    fine = np.minimum(((pos - low) * (side / extent)).astype(np.int64), side - 1)
+
+    # Children of the parent cell's 3x3 neighbourhood: a 6x6 block of offsets
+    offset_x = np.repeat(np.arange(6), 6)
+    offset_y = np.tile(np.arange(6), 6)
+    for level in range(2, depth + 1):
+        size = 1 << level
+        cell = fine >> (depth - level)
+        flat = cell[:, 0] * size + cell[:, 1]
+        mass = np.bincount(flat, minlength=size * size)
+        centre_x = np.bincount(flat, weights=pos[:, 0], minlength=size * size) / np.maximum(mass, 1)
+        centre_y = np.bincount(flat, weights=pos[:, 1], minlength=size * size) / np.maximum(mass, 1)
+        for start in range(0, n, _REPULSION_BLOCK):
+            block = slice(start, start + _REPULSION_BLOCK)
+            own = cell[block]
+            x = ((own[:, 0] >> 1) * 2 - 2)[:, None] + offset_x
+            y = ((own[:, 1] >> 1) * 2 - 2)[:, None] + offset_y
+            separated = (
+                (x >= 0) & (x < size) & (y >= 0) & (y < size)
+                & ((np.abs(x - own[:, 0, None]) > 1) | (np.abs(y - own[:, 1, None]) > 1))
+            )
+            index = np.where(separated, x * size + y, 0)
+            weight = np.where(separated, mass[index], 0)
+            push_x, push_y = _pushes(
+                pos[block, 0, None] - centre_x[index], pos[block, 1, None] - centre_y[index], weight, k
+            )
+            force[block, 0] += push_x.sum(1)
+            force[block, 1] += push_y.sum(1)
+
+    _near_repulsion(pos, fine, side, k, force)
+    return force
+
+
+def _simulate(pos: np.ndarray, src: np.ndarray, dst: np.ndarray, fixed: np.ndarray, iterations: int) -> np.ndarray:
+    """Fruchterman-Reingold steps on box centres, with a linearly cooling
+    step size; `fixed` nodes push and pull but do not move"""
+    n = len(pos)
+    k = NODE_WIDTH + GAP
+    start_temperature = k * math.sqrt(n) / 10
+    for step in range(iterations):
+        disp = _repulsion(pos, k)
+        disp -= (pos - pos.mean(0)) * GRAVITY
+        delta = pos[src] - pos[dst]
+        pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / k)[:, None]
+        for axis in (0, 1):
+            disp[:, axis] += np.bincount(dst, weights=pull[:, axis], minlength=n)
+            disp[:, axis] -= np.bincount(src, weights=pull[:, axis], minlength=n)
+        disp[fixed] = 0
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-9)
+        temperature = start_temperature * (1 - step / iterations)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+    return pos
+
+
+def force_layout(graph: SchemaGraph, iterations: int) -> Dict[str, Tuple[float, float]]:
+    """Fruchterman-Reingold from a seeded random spread, so results are
+    reproducible. Large schemas run fewer than `iterations` steps, to stay
+    within _FORCE_STEP_BUDGET."""
+    n = len(graph.tables)
+    if n == 0:
+        return {}
+    iterations = min(iterations, max(_FORCE_MIN_ITERATIONS, _FORCE_STEP_BUDGET // n))
+    heights = _heights(graph)
+    src, dst = _edge_arrays(graph)
+    rng = np.random.default_rng(0)
+    pos = rng.uniform(0, (NODE_WIDTH + GAP) * math.sqrt(n), size=(n, 2))
+    pos = _simulate(pos, src, dst, np.zeros(n, dtype=bool), iterations)
+
+    pos[:, 0] -= NODE_WIDTH / 2
+    pos[:, 1] -= heights / 2
+    pos -= pos.min(0)
+    return {key: (float(x), float(y)) for key, (x, y) in zip(graph.tables, pos)}
+
+
+def _settle_new(
+    graph: SchemaGraph,
+    iterations: int,
+    kept: Dict[str, Tuple[float, float]],
+    initial: Dict[str, Tuple[float, float]],
+) -> Dict[str, Tuple[float, float]]:
+    """Force-simulate only the new tables (those in `initial` but not in
+    `kept`), against the placed tables near their starting points and
+    their placed neighbours, which stay put"""
+    heights = dict(zip(graph.tables, _heights(graph).tolist()))
+    new = [key for key in graph.tables if key not in kept]
+    radius = _NEIGHBOURHOOD * (NODE_WIDTH + GAP)
+    cells: Dict[Tuple[int, int], list] = {}
+    for key, (x, y) in kept.items():
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(key)
+
+    context = set()
+    for key in new:
+        cx, cy = int(initial[key][0] // radius), int(initial[key][1] // radius)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                context.update(cells.get((cx + dx, cy + dy), ()))
+        context.update(n for n in graph.forward[key] + graph.reverse[key] if n in kept)
+
+    members = new + sorted(context)
+    index = {key: i for i, key in enumerate(members)}
+    pairs = sorted({
+        (index[e["from"]], index[e["to"]]) for e in graph.edges
+        if e["from"] != e["to"] and e["from"] in index and e["to"] in index
+    })
+    src = np.array([s for s, _ in pairs], dtype=int)
+    dst = np.array([d for _, d in pairs], dtype=int)
+    # Simulate on box centres
+    pos = np.array([
+        (initial[key][0] + NODE_WIDTH / 2, initial[key][1] + heights[key] / 2) for key in members
+    ], dtype=float)
+    fixed = np.arange(len(members)) >= len(new)
+    pos = _simulate(pos, src, dst, fixed, iterations)
+
+    placed = dict(kept)
+    for i, key in enumerate(new):
+        placed[key] = (float(pos[i, 0] - NODE_WIDTH / 2), float(pos[i, 1] - heights[key] / 2))
+    return {key: placed[key] for key in graph.tables}
+
+
+def _place_new(
+    graph: SchemaGraph,
+    algorithm: str,
+    iterations: int,
+    previous: Dict[str, Tuple[float, float]],
+) -> Dict[str, Tuple[float, float]]:
+    """Keep every table that is still there where it was and place only the new ones"""
+    kept = {key: previous[key] for key in graph.tables if key in previous}
+    new = [key for key in graph.tables if key not in kept]
+    if not new:
+        return kept
+    if algorithm == "force":
+        # New tables start next to a placed neighbour, or below everything
+        bottom = max(y for _, y in kept.values()) + 2 * GAP
+        initial = dict(kept)
+        for offset, key in enumerate(new):
+            anchors = [kept[n] for n in graph.forward[key] + graph.reverse[key] if n in kept]
+            if anchors:
+                x = sum(a[0] for a in anchors) / len(anchors) + NODE_WIDTH + GAP
+                y = sum(a[1] for a in anchors) / len(anchors)
+            else:
+                x, y = offset * (NODE_WIDTH + GAP), bottom
+            initial[key] = (x, y)
+        return _settle_new(graph, iterations, kept, initial)
+
+    # Layered: a new table goes to the bottom of the leftmost column already
+    # holding its layer; tables in a new layer, and unrelated ones, go to the right
+    heights = dict(zip(graph.tables, _heights(graph).tolist()))
+    layer_of = _layers(graph)
+    orphans = set(graph.orphans())
+    right = max(x for x, _ in kept.values()) + NODE_WIDTH + GAP
+    placed = dict(kept)
+    for key in new:
+        same_layer = [placed[k][0] for k in placed if k not in orphans and layer_of[k] == layer_of[key]]
+        if key in orphans:
+            x = right + NODE_WIDTH + GAP
+        else:
+            x = min(same_layer) if same_layer else right
+        column = [y + heights[k] for k, (px, y) in placed.items() if abs(px - x) < NODE_WIDTH]
+        placed[key] = (x, max(column) + GAP if column else 0.0)
+    return placed
+
+
+class LayoutCache:
+    """Computed layouts by (schema structure hash, algorithm, iterations),
+    plus the latest layout per target as the base for incremental updates"""
+
+    def __init__(self, max_entries: int = config.LAYOUT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._layouts: "OrderedDict[tuple, Dict[str, Tuple[float, float]]]" = OrderedDict()
+        self._latest: "OrderedDict[tuple, Dict[str, Tuple[float, float]]]" = OrderedDict()
+
+    def _remember(self, store: OrderedDict, key: tuple, positions: Dict[str, Tuple[float, float]]):
+        store[key] = positions
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def layout_for(
+        self,
+        connection_string: str,
+        graph: SchemaGraph,
+        algorithm: str = "layered",
+        iterations: int = config.LAYOUT_ITERATIONS,
+    ) -> Dict[str, Any]:
+        """Positions (top-left corners) for every table of the graph's schema.
+
+        When the target was laid out before with the same algorithm and most
+        of its tables still exist, they keep their positions and only added
+        tables are placed; otherwise the whole schema is laid out. Schemas
+        of more than LAYOUT_FORCE_MAX_TABLES tables get the layered layout
+        even when force is asked for; "algorithm" says which was used.
+        """
+        if algorithm not in LAYOUT_ALGORITHMS:
+            raise ValueError(f"Unsupported layout algorithm: {algorithm}")
+        if algorithm == "force" and len(graph.tables) > config.LAYOUT_FORCE_MAX_TABLES:
+            # Past this size a force layout is slow and no more readable
+            algorithm = "layered"
+        digest = structure_hash(graph.schema)
+        key = (digest, algorithm, iterations)
+        target = (SchemaCache.key_for(connection_string), algorithm)
+        with self._lock:
+            positions = self._layouts.get(key)
+            previous = self._latest.get(target)
+            if positions is not None:
+                self._layouts.move_to_end(key)
+
+        incremental = False
+        if positions is None:
+            kept = sum(1 for table in graph.tables if previous and table in previous)
+            if graph.tables and kept >= _INCREMENTAL_MIN_SHARE * len(graph.tables):
+                positions = _place_new(graph, algorithm, iterations, previous)
+                incremental = True
+            elif algorithm == "force":
+                positions = force_layout(graph, iterations)
+            else:
+                positions = layered_layout(graph, iterations)
+            with self._lock:
+                self._remember(self._layouts, key, positions)
+        with self._lock:
+            self._remember(self._latest, target, positions)
+
+        return {
+            "algorithm": algorithm,
+            "schema_hash": digest,
+            "incremental": incremental,
+            "positions": {
+                table: {"x": round(x, 1), "y": round(y, 1)} for table, (x, y) in positions.items()
+            },
+        }
+
+
+layout_cache = LayoutCache()
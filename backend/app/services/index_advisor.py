@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, Optional
+
+# Index methods that keep keys in order, so a prefix of the columns can be searched
+ORDERED_METHODS = {None, "btree", "clustered", "nonclustered"}
+
+
+def foreign_key_groups(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Constraints rebuilt from the per-column foreign_keys list. Adapters
+    list a composite key's columns one after another, so consecutive entries
+    to the same table with distinct referenced columns form one key; two
+    keys to the same referenced column (created_by, updated_by) stay apart."""
+    groups: List[Dict[str, Any]] = []
+    for fk in table.get("foreign_keys") or []:
+        last = groups[-1] if groups else None
+        if (
+            last is not None
+            and last["ref_table"] == fk.get("ref_table")
+            and fk.get("ref_column") not in last["ref_columns"]
+            and fk.get("column") not in last["columns"]
+        ):
+            last["columns"].append(fk.get("column"))
+            last["ref_columns"].append(fk.get("ref_column"))
+            last["inferred"] = last["inferred"] or bool(fk.get("inferred"))
+        else:
+            groups.append({
+                "columns": [fk.get("column")],
+                "ref_table": fk.get("ref_table"),
+                "ref_columns": [fk.get("ref_column")],
+                "inferred": bool(fk.get("inferred")),
+            })
+    return groups
+
+
+def _usable(index: Dict[str, Any]) -> bool:
+    return not index.get("partial")
+
+
+def covers(index: Dict[str, Any], columns: List[str]) -> bool:
+    """Whether lookups on `columns` (in any order) can seek this index: they
+    must be its leading key columns, or all of them for unordered methods"""
+    if not _usable(index):
+        return False
+    keys = list(index.get("columns") or [])
+    if index.get("method") in ORDERED_METHODS:
+        return set(keys[:len(columns)]) == set(columns)
+    return set(keys) == set(columns)
+
+
+def _size(table: Dict[str, Any], index: Dict[str, Any]) -> Optional[int]:
+    return (table.get("index_sizes") or {}).get(index.get("name"))
+
+
+def _table_stats(table: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "row_count": table.get("row_count", 0),
+        "size_bytes": table.get("size_bytes", 0),
+        "index_bytes": table.get("index_bytes", 0),
+    }
+
+
+def advise(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Cross-reference foreign keys and indexes of a fetch_schema dict.
+
+    - unindexed_foreign_keys: keys whose columns lead no usable index, so
+      joins on them and deletes in the referenced table scan this table
+    - duplicate_indexes: same key columns, method and partiality as
+      another index; the one that backs a constraint is kept
+    - redundant_indexes: plain ordered indexes whose columns are a leading
+      prefix of another ordered index
+
+    Findings carry the table's estimated rows and bytes, largest first.
+    Tables without index metadata (old snapshots) are only counted.
+    """
+    unindexed, duplicates, redundant = [], [], []
+    without_metadata = 0
+    for key in sorted(schema):
+        table = schema[key]
+        if "indexes" not in table:
+            without_metadata += 1
+            continue
+        indexes = table["indexes"]
+        stats = _table_stats(table)
+
+        for group in foreign_key_groups(table):
+            if not any(covers(index, group["columns"]) for index in indexes):
+                unindexed.append({"table": key, **group, **stats})
+
+        # Constraint-backing indexes first, so the plain copy is the one reported
+        ranked = sorted(indexes, key=lambda index: (not index.get("primary"), not index.get("unique"), index.get("name") or ""))
+        seen: Dict[tuple, Dict[str, Any]] = {}
+        duplicated = set()
+        for index in ranked:
+            if not _usable(index):
+                continue
+            signature = (tuple(index.get("columns") or []), index.get("method"))
+            kept = seen.get(signature)
+            if kept is None:
+                seen[signature] = index
+                continue
+            duplicated.add(index.get("name"))
+            duplicates.append({
+                "table": key,
+                "index": index.get("name"),
+                "duplicate_of": kept.get("name"),
+                "columns": list(index.get("columns") or []),
+                "index_size_bytes": _size(table, index),
+                **stats,
+            })
+
+        for index in ranked:
+            name = index.get("name")
+            columns = list(index.get("columns") or [])
+            if (
+                name in duplicated
+                or index.get("unique")
+                or not _usable(index)
+                or index.get("method") not in ORDERED_METHODS
+            ):
+                continue
+            wider = next(
+                (
+                    other for other in ranked
+                    if other is not index
+                    and _usable(other)
+                    and other.get("method") in ORDERED_METHODS
+                    and len(other.get("columns") or []) > len(columns)
+                    and list(other["columns"][:len(columns)]) == columns
+                ),
+                None,
+            )
+            if wider is not None:
+                redundant.append({
+                    "table": key,
+                    "index": name,
+                    "covered_by": wider.get("name"),
+                    "columns": columns,
+                    "index_size_bytes": _size(table, index),
+                    **stats,
+                })
+
+    unindexed.sort(key=lambda item: (-(item["row_count"] or 0), item["table"]))
+    for findings in (duplicates, redundant):
+        findings.sort(key=lambda item: (-(item["index_size_bytes"] or 0), item["table"], item["index"]))
+    return {
+        "unindexed_foreign_keys": unindexed,
+        "duplicate_indexes": duplicates,
+        "redundant_indexes": redundant,
+        "summary": {
+            "tables": len(schema),
+            "tables_without_index_metadata": without_metadata,
+            "unindexed_foreign_keys": len(unindexed),
+            "duplicate_indexes": len(duplicates),
+            "redundant_indexes": len(redundant),
+            # Space the duplicate and redundant indexes take, where sizes are known
+            "reclaimable_bytes": sum(item["index_size_bytes"] or 0 for item in duplicates + redundant),
+        },
+    }
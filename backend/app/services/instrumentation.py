@@ -0,0 +1,340 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.core import config
+from app.services import metrics
+
+try:
+    from pymongo import monitoring
+except ImportError:  # pragma: no cover - pymongo not installed
+    monitoring = None
+
+
+class RequestTimings:
+    """What one HTTP request spent, shared with the worker threads serving it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+        self.queries = 0
+        self.rows = 0
+
+    def add(self, name: str, seconds: float, queries: int = 0, rows: int = 0):
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.queries += queries
+            self.rows += rows
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value: connect, db (driver round trips),
+        adapter (outermost adapter calls, so db plus Python assembly) and
+        encode, in milliseconds"""
+        with self._lock:
+            parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in sorted(self.seconds.items())]
+            parts.append(f'queries;desc="{self.queries} queries, {self.rows} rows"')
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_request: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+# Adapter methods call each other; only the outermost call counts towards a request
+_depth = threading.local()
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """fn bound to the calling request's timings, for plain ThreadPoolExecutor
+    workers (which, unlike DBExecutor, do not carry context variables)"""
+    timings = _request.get()
+    if timings is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        token = _request.set(timings)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _request.reset(token)
+
+    return run
+
+
+def observe_encoding(media_type: str, seconds: float, size: int):
+    if not config.METRICS_ENABLED:
+        return
+    media_type = media_type.rsplit("/", 1)[-1]
+    metrics.ENCODE_SECONDS.observe(seconds, media_type)
+    metrics.ENCODED_BYTES.inc(media_type, amount=size)
+    timings = _request.get()
+    if timings is not None:
+        timings.add("encode", seconds)
+
+
+def _record_query(db_type: str, seconds: float, rows: int = 0, failed: bool = False):
+    metrics.QUERY_SECONDS.observe(seconds, db_type)
+    if failed:
+        metrics.QUERY_ERRORS.inc(db_type)
+    if rows:
+        metrics.ROWS_FETCHED.inc(db_type, amount=rows)
+    timings = _request.get()
+    if timings is not None:
+        timings.add("db", seconds, queries=1, rows=rows)
+
+
+def _record_rows(db_type: str, seconds: float, rows: int):
+    if rows:
+        metrics.ROWS_FETCHED.inc(db_type, amount=rows)
+    timings = _request.get()
+    if timings is not None:
+        timings.add("db", seconds, rows=rows)
+
+
+class InstrumentedCursor:
+    """DB-API cursor proxy timing execute and fetch calls; everything else
+    (attributes too, e.g. itersize or description) goes to the real cursor"""
+
+    __slots__ = ("_cursor", "_db_type")
+
+    def __init__(self, cursor, db_type: str):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_db_type", db_type)
+
+    def _timed_execute(self, method: str, *args, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = getattr(self._cursor, method)(*args, **kwargs)
+            failed = False
+        finally:
+            _record_query(self._db_type, time.perf_counter() - started, failed=failed)
+        # pyodbc returns the cursor itself, for chaining
+        return self if result is self._cursor else result
+
+    def execute(self, *args, **kwargs):
+        return self._timed_execute("execute", *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed_execute("executemany", *args, **kwargs)
+
+    def _timed_fetch(self, method: str, *args):
+        started = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        rows = (1 if result is not None else 0) if method == "fetchone" else len(result)
+        _record_rows(self._db_type, time.perf_counter() - started, rows)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._timed_fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._timed_fetch("fetchall")
+
+    def __iter__(self):
+        rows = 0
+        try:
+            for row in self._cursor:
+                rows += 1
+                yield row
+        finally:
+            _record_rows(self._db_type, 0.0, rows)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+
+class InstrumentedConnection:
+    """DB-API connection proxy whose cursors are InstrumentedCursors"""
+
+    __slots__ = ("_conn", "_db_type")
+
+    def __init__(self, conn, db_type: str):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_db_type", db_type)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._db_type)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        # e.g. pyodbc's conn.timeout and conn.autocommit
+        setattr(self._conn, name, value)
+
+
+def _observe_adapter(db_type: str, method: str, seconds: float, outermost: bool):
+    metrics.ADAPTER_SECONDS.observe(seconds, db_type, method)
+    if outermost:
+        timings = _request.get()
+        if timings is not None:
+            timings.add("adapter", seconds)
+
+
+def _timed_connect(fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def connect(self, *args, **kwargs):
+        started = time.perf_counter()
+        conn = fn(self, *args, **kwargs)
+        elapsed = time.perf_counter() - started
+        metrics.CONNECT_SECONDS.observe(elapsed, self.db_type)
+        if conn is None:
+            metrics.CONNECT_FAILURES.inc(self.db_type)
+        timings = _request.get()
+        if timings is not None:
+            timings.add("connect", elapsed)
+        if conn is None or not self.instrument_cursors:
+            return conn
+        return InstrumentedConnection(conn, self.db_type)
+
+    connect.__timed__ = True
+    return connect
+
+
+def _timed_method(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator(self, *args, **kwargs):
+            # Time spent inside the generator only, not in the consumer
+            iterator = fn(self, *args, **kwargs)
+            spent = 0.0
+            outermost = getattr(_depth, "value", 0) == 0
+            try:
+                while True:
+                    _depth.value = getattr(_depth, "value", 0) + 1
+                    started = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        spent += time.perf_counter() - started
+                        _depth.value -= 1
+                    yield item
+            finally:
+                iterator.close()
+                _observe_adapter(self.db_type, name, spent, outermost)
+
+        generator.__timed__ = True
+        return generator
+
+    @functools.wraps(fn)
+    def method(self, *args, **kwargs):
+        depth = getattr(_depth, "value", 0)
+        _depth.value = depth + 1
+        started = time.perf_counter()
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            _depth.value = depth
+            _observe_adapter(self.db_type, name, time.perf_counter() - started, depth == 0)
+
+    method.__timed__ = True
+    return method
+
+
+# Pure helpers called per table in tight loops; not worth a histogram sample
+_UNTIMED = {"table_ref", "is_disconnect"}
+
+
+def instrument_adapter(cls: type):
+    """Time every public adapter method of `cls`, and make connect() hand
+    out connections whose cursors time each driver call. Called for each
+    BaseAdapter subclass as it is defined."""
+    if not config.METRICS_ENABLED:
+        return
+    for name in dir(cls):
+        if name.startswith("_") or name in _UNTIMED:
+            continue
+        fn = inspect.getattr_static(cls, name)
+        if not inspect.isfunction(fn) or getattr(fn, "__timed__", False) or getattr(fn, "__isabstractmethod__", False):
+            continue
+        setattr(cls, name, _timed_connect(fn) if name == "connect" else _timed_method(name, fn))
+
+
+if monitoring is not None:
+    class MongoCommandTimer(monitoring.CommandListener):
+        """pymongo command events as queries: pymongo has no cursor to wrap,
+        and the events fire on the thread that ran the command"""
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            reply = event.reply.get("cursor") if isinstance(event.reply, dict) else None
+            rows = 0
+            if isinstance(reply, dict):
+                rows = len(reply.get("firstBatch") or reply.get("nextBatch") or [])
+            _record_query("mongodb", event.duration_micros / 1e6, rows)
+
+        def failed(self, event):
+            _record_query("mongodb", event.duration_micros / 1e6, failed=True)
+
+    mongo_listeners = [MongoCommandTimer()] if config.METRICS_ENABLED else []
+else:
+    mongo_listeners = []
+
+
+class MetricsMiddleware:
+    """Per-request timings in a context variable; request latency, response
+    size and query count histograms by route template, plus an optional
+    Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _request.set(timings)
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if config.SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers") or [])
+                    value = timings.server_timing(time.perf_counter() - started)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body") or b"")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
+            metrics.HTTP_RESPONSE_BYTES.observe(size, route)
+            metrics.REQUEST_QUERIES.observe(timings.queries, route)
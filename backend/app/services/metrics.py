@@ -0,0 +1,144 @@
+import bisect
+import math
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; from a catalog lookup on localhost up to a slow introspection
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Round trips per request
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+# Bytes per response body
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative buckets, sum and count per label set, as Prometheus expects"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "dbstru_http_request_duration_seconds", "Time to the end of the response body", ["method", "route", "status"]
+)
+HTTP_RESPONSE_BYTES = registry.histogram(
+    "dbstru_http_response_bytes", "Response body size", ["route"], SIZE_BUCKETS
+)
+REQUEST_QUERIES = registry.histogram(
+    "dbstru_request_db_queries", "Driver round trips made for one request", ["route"], COUNT_BUCKETS
+)
+CONNECT_SECONDS = registry.histogram(
+    "dbstru_db_connect_duration_seconds", "Opening a database connection", ["db_type"]
+)
+CONNECT_FAILURES = registry.counter(
+    "dbstru_db_connect_failures_total", "Connection attempts that returned no connection", ["db_type"]
+)
+ADAPTER_SECONDS = registry.histogram(
+    "dbstru_adapter_call_duration_seconds", "Adapter method calls, generators until exhausted", ["db_type", "method"]
+)
+QUERY_SECONDS = registry.histogram(
+    "dbstru_db_query_duration_seconds", "Driver execute calls (MongoDB commands)", ["db_type"]
+)
+QUERY_ERRORS = registry.counter(
+    "dbstru_db_query_errors_total", "Driver execute calls that raised", ["db_type"]
+)
+ROWS_FETCHED = registry.counter(
+    "dbstru_db_rows_fetched_total", "Rows (documents) read from drivers", ["db_type"]
+)
+ENCODE_SECONDS = registry.histogram(
+    "dbstru_encode_duration_seconds", "Serializing response payloads", ["format"]
+)
+ENCODED_BYTES = registry.counter(
+    "dbstru_encoded_bytes_total", "Bytes produced by response serialization", ["format"]
+)
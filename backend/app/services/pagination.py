@@ -0,0 +1,21 @@
+import base64
+import json
+from typing import Any, List
+
+
+def encode_cursor(key_values: List[Any]) -> str:
+    """Opaque, URL-safe cursor holding the primary key of the last row sent"""
+    raw = json.dumps(key_values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key_values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(key_values, list) or not key_values:
+        raise ValueError("Invalid pagination cursor")
+    return key_values
@@ -0,0 +1,279 @@
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core import config
+
+
+def _hash64(value: Any) -> int:
+    # Type-qualified so 1 and "1" count as different values
+    material = f"{type(value).__name__}:{value!r}".encode("utf-8", "surrogatepass")
+    return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Cardinality estimate in 2^precision one-byte registers (about
+    1.04 / sqrt(2^precision) relative error). Merging takes the register-wise max."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: Any):
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class TopK:
+    """Space-Saving heavy hitters: at most `capacity` counters; a new value
+    replaces the smallest counter and inherits its count as error bound."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # value key -> [value, count, error]
+        self.counters: Dict[Any, List[Any]] = {}
+
+    def add(self, value: Any, count: int = 1, error: int = 0):
+        key = (type(value).__name__, repr(value))
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[1] += count
+            counter[2] += error
+        elif len(self.counters) < self.capacity:
+            self.counters[key] = [value, count, error]
+        else:
+            smallest = min(self.counters, key=lambda k: self.counters[k][1])
+            floor = self.counters.pop(smallest)[1]
+            self.counters[key] = [value, floor + count, floor + error]
+
+    def merge(self, other: "TopK"):
+        for value, count, error in other.counters.values():
+            self.add(value, count, error)
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        ranked = sorted(self.counters.values(), key=lambda c: -c[1])[:k]
+        return [{"value": value, "count": count, "error": error} for value, count, error in ranked]
+
+
+class Reservoir:
+    """Uniform sample of at most `size` values (Algorithm R), for quantiles"""
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seen = 0
+        self.values: List[Any] = []
+        self._random = random.Random(seed)
+
+    def add(self, value: Any):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            slot = self._random.randrange(self.seen)
+            if slot < self.size:
+                self.values[slot] = value
+
+    def merge(self, other: "Reservoir"):
+        # Weight each side by how many values it stands for
+        total = self.seen + other.seen
+        if not total:
+            return
+        take = min(self.size, len(self.values) + len(other.values))
+        from_self = round(take * self.seen / total)
+        merged = self._random.sample(self.values, min(from_self, len(self.values)))
+        merged += self._random.sample(other.values, min(take - len(merged), len(other.values)))
+        self.values, self.seen = merged, total
+
+    def quantiles(self, points=(0.05, 0.25, 0.5, 0.75, 0.95)) -> Optional[Dict[str, Any]]:
+        if not self.values:
+            return None
+        ordered = sorted(self.values)
+        return {
+            f"p{round(p * 100)}": ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+            for p in points
+        }
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _length_bucket(length: int) -> int:
+    """0, 1, 2-3, 4-7, ... as bucket 0, 1, 2, 3, ..."""
+    return length.bit_length()
+
+
+class ColumnProfile:
+    """Streaming statistics for one column; profiles of disjoint samples merge"""
+
+    def __init__(self, top_k: int = config.PROFILE_TOP_K):
+        self.top_k = top_k
+        self.count = 0
+        self.nulls = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self.distinct = HyperLogLog()
+        # Extra counters keep the reported top values accurate
+        self.frequent = TopK(top_k * 4)
+        self.numbers = Reservoir(config.PROFILE_RESERVOIR_SIZE)
+        self.lengths: Dict[int, int] = {}
+
+    def add(self, value: Any):
+        self.count += 1
+        if value is None:
+            self.nulls += 1
+            return
+        if isinstance(value, (dict, list)):
+            # Nested documents: only counted and hashed
+            value = repr(value)
+        self.distinct.add(value)
+        self.frequent.add(value)
+        if _numeric(value):
+            self.numbers.add(value)
+        if isinstance(value, (str, bytes)):
+            bucket = _length_bucket(len(value))
+            self.lengths[bucket] = self.lengths.get(bucket, 0) + 1
+        if isinstance(value, (int, float, Decimal, str, date, datetime)):
+            self.add_bound(value)
+
+    def merge(self, other: "ColumnProfile"):
+        self.count += other.count
+        self.nulls += other.nulls
+        for bound in (other.minimum, other.maximum):
+            if bound is not None:
+                self.add_bound(bound)
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        self.numbers.merge(other.numbers)
+        for bucket, count in other.lengths.items():
+            self.lengths[bucket] = self.lengths.get(bucket, 0) + count
+
+    def add_bound(self, value: Any):
+        try:
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+        except TypeError:
+            # Mixed types in one field; keep the bounds of the first type seen
+            pass
+
+    def summary(self) -> Dict[str, Any]:
+        non_null = self.count - self.nulls
+        return {
+            "sampled": self.count,
+            "null_ratio": round(self.nulls / self.count, 4) if self.count else None,
+            # Never more than the non-null values actually seen
+            "distinct_estimate": min(self.distinct.estimate(), non_null),
+            "min": self.minimum,
+            "max": self.maximum,
+            "top_values": self.frequent.top(self.top_k),
+            "quantiles": self.numbers.quantiles(),
+            "length_histogram": [
+                {
+                    "min_length": 0 if bucket == 0 else 1 << (bucket - 1),
+                    "max_length": 0 if bucket == 0 else (1 << bucket) - 1,
+                    "count": self.lengths[bucket],
+                }
+                for bucket in sorted(self.lengths)
+            ] or None,
+        }
+
+
+def profile_rows(fields: Optional[List[str]], batches: Iterator[List[Any]], top_k: int = config.PROFILE_TOP_K) -> Dict[str, Any]:
+    """One pass over sample_rows output. Rows are tuples in `fields` order,
+    or documents (dicts) when fields is None; a document missing a field
+    counts as a null for it."""
+    profiles: Dict[str, ColumnProfile] = {name: ColumnProfile(top_k) for name in fields or []}
+    rows = 0
+    for batch in batches:
+        for row in batch:
+            if fields is None:
+                for name in row:
+                    if name not in profiles:
+                        profile = profiles[name] = ColumnProfile(top_k)
+                        # Documents seen before this field appeared lacked it
+                        profile.count = profile.nulls = rows
+                for name, profile in profiles.items():
+                    profile.add(row.get(name))
+            else:
+                for profile, value in zip(profiles.values(), row):
+                    profile.add(value)
+            rows += 1
+    return {
+        "sampled_rows": rows,
+        "columns": {name: profile.summary() for name, profile in profiles.items()},
+    }
+
+
+class ProfileEntry:
+    def __init__(self, profile: Dict[str, Any], ttl: float):
+        self.profile = profile
+        self.expires_at = time.monotonic() + ttl
+
+
+class ProfileCache:
+    """Column profiles per (target, table, sample size), dropped with the
+    target's cached schema after DDL or when their TTL runs out"""
+
+    def __init__(self, ttl: float = config.PROFILE_CACHE_TTL, max_entries: int = config.PROFILE_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, ProfileEntry]" = OrderedDict()
+
+    @staticmethod
+    def target_for(connection_string: str) -> str:
+        return hashlib.sha256(connection_string.encode("utf-8")).hexdigest()
+
+    def get(self, connection_string: str, table_name: str, sample_size: int) -> Optional[Dict[str, Any]]:
+        key = (self.target_for(connection_string), table_name, sample_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() > entry.expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.profile
+
+    def put(self, connection_string: str, table_name: str, sample_size: int, profile: Dict[str, Any]):
+        key = (self.target_for(connection_string), table_name, sample_size)
+        with self._lock:
+            self._entries[key] = ProfileEntry(profile, self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, connection_string: str):
+        target = self.target_for(connection_string)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == target]:
+                del self._entries[key]
+
+
+profile_cache = ProfileCache()
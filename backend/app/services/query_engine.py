@@ -0,0 +1,294 @@
+import hashlib
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core import config
+from app.services.adapters.base import documents_to_rows, statement_keyword
+from app.services.db_manager import DBManager
+from app.services.encoding import MISSING, convert_column, dumps_json
+from app.services.result_cache import DDL_STATEMENTS, is_read_only, result_cache
+
+
+class QueryCancelled(Exception):
+    def __init__(self, query_id: str, reason: str):
+        self.query_id = query_id
+        self.reason = reason
+        if reason == "timeout":
+            super().__init__(f"Query '{query_id}' exceeded its timeout and was cancelled")
+        else:
+            super().__init__(f"Query '{query_id}' was cancelled")
+
+
+def _target(connection_string: str) -> str:
+    return hashlib.sha256(connection_string.encode("utf-8")).hexdigest()
+
+
+class QueryHandle:
+    """State of one running /query call, shared with the thread that cancels it"""
+
+    def __init__(self, query_id: str, connection_string: str, timeout_ms: int):
+        self.query_id = query_id
+        self.connection_string = connection_string
+        self.target = _target(connection_string)
+        self.timeout_ms = timeout_ms
+        # Set by the adapter once the statement is running
+        self.on_cancel: Optional[Callable[[], None]] = None
+        self.cancelled = False
+        self.cancel_reason: Optional[str] = None
+        self.started = time.perf_counter()
+        self.executed_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.rows_scanned = 0
+        self.rows_returned = 0
+        self.rows_affected: Optional[int] = None
+        self.truncated = False
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str = "cancelled"):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self.cancel_reason = reason
+            if self.on_cancel is not None:
+                try:
+                    self.on_cancel()
+                except Exception as e:
+                    print(f"Error cancelling query {self.query_id}: {e}")
+
+    def detach(self):
+        """Stop cancels from reaching the connection once it goes back to the pool"""
+        with self._lock:
+            self.on_cancel = None
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished_at or time.perf_counter()
+        return {
+            "query_id": self.query_id,
+            "elapsed_ms": round((end - self.started) * 1000, 3),
+            # Until the first batch (or the DML result) was available
+            "execute_ms": round(((self.executed_at or end) - self.started) * 1000, 3),
+            # Rows read from the server cursor; can exceed rows_returned by
+            # the look-ahead batch that detects truncation
+            "rows_scanned": self.rows_scanned,
+            "rows_returned": self.rows_returned,
+            "rows_affected": self.rows_affected,
+            "truncated": self.truncated,
+        }
+
+
+class QueryRegistry:
+    """Running queries by id, so a second request can cancel them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries: Dict[str, QueryHandle] = {}
+
+    def register(self, handle: QueryHandle):
+        with self._lock:
+            if handle.query_id in self._queries:
+                raise ValueError(f"A query with id '{handle.query_id}' is already running")
+            self._queries[handle.query_id] = handle
+
+    def remove(self, handle: QueryHandle):
+        with self._lock:
+            if self._queries.get(handle.query_id) is handle:
+                del self._queries[handle.query_id]
+
+    def cancel(self, query_id: str, connection_string: str, reason: str = "cancelled") -> bool:
+        """Cancel a running query. Only callers holding the same connection
+        string may cancel it; returns False when there is no such query."""
+        with self._lock:
+            handle = self._queries.get(query_id)
+        if handle is None or handle.target != _target(connection_string):
+            return False
+        handle.cancel(reason)
+        return True
+
+
+query_registry = QueryRegistry()
+
+
+def _close_quietly(rows: Iterator[Any]):
+    try:
+        rows.close()
+    except Exception:
+        # The connection is being discarded anyway
+        pass
+
+
+def start_query(
+    connection_string: str,
+    query: str,
+    params: Optional[List[Any]] = None,
+    max_rows: int = config.QUERY_DEFAULT_MAX_ROWS,
+    timeout_ms: int = config.QUERY_DEFAULT_TIMEOUT_MS,
+    batch_size: int = 500,
+    query_id: Optional[str] = None,
+):
+    """Send a query and return (handle, fields, batches).
+
+    The statement has already run (or failed) when this returns, so errors
+    surface before any response is started. `batches` holds the pooled
+    connection until it is exhausted or closed; it stops after `max_rows`
+    rows and raises QueryCancelled if the query is cancelled or runs past
+    `timeout_ms` (which covers fetching, i.e. a slow streaming client, too).
+    """
+    handle = QueryHandle(query_id or uuid.uuid4().hex, connection_string, timeout_ms)
+    query_registry.register(handle)
+    # Backstop for engines (and fetch phases) the native timeout does not cover
+    watchdog = threading.Timer(timeout_ms / 1000, handle.cancel, ["timeout"])
+    watchdog.daemon = True
+
+    stack = ExitStack()
+    stack.callback(query_registry.remove, handle)
+    try:
+        conn, db_type = stack.enter_context(DBManager.connection(connection_string))
+        if not conn:
+            raise ConnectionError(f"Failed to connect to {db_type}")
+        # Unwound before the connection is released
+        stack.callback(handle.detach)
+        stack.callback(watchdog.cancel)
+        watchdog.start()
+        rows = DBManager.get_adapter(db_type).execute_query(conn, query, params, handle, batch_size)
+        fields = next(rows)
+        handle.executed_at = time.perf_counter()
+        if not is_read_only(db_type, query):
+            if db_type != "mongodb" and statement_keyword(query) in DDL_STATEMENTS:
+                DBManager.invalidate_schema(connection_string)
+            else:
+                DBManager.invalidate_results(connection_string)
+    except BaseException as e:
+        stack.__exit__(*sys.exc_info())
+        if handle.cancelled:
+            raise QueryCancelled(handle.query_id, handle.cancel_reason) from e
+        raise
+
+    def batches() -> Iterator[List[Any]]:
+        try:
+            remaining = max_rows
+            for batch in rows:
+                if handle.cancelled:
+                    raise QueryCancelled(handle.query_id, handle.cancel_reason)
+                handle.rows_scanned += len(batch)
+                if len(batch) > remaining:
+                    batch = batch[:remaining]
+                    handle.truncated = True
+                remaining -= len(batch)
+                handle.rows_returned += len(batch)
+                if batch:
+                    yield batch
+                if handle.truncated:
+                    break
+            # Closing the cursor stops the server sending the rows past max_rows
+            try:
+                rows.close()
+            except Exception as e:
+                # Every row has been handed out; only the connection is lost
+                print(f"Error closing query cursor: {e}")
+                handle.finished_at = time.perf_counter()
+                stack.__exit__(*sys.exc_info())
+                return
+        except QueryCancelled:
+            _close_quietly(rows)
+            stack.__exit__(*sys.exc_info())
+            raise
+        except BaseException as e:
+            # Includes the client going away mid-stream: drop the connection
+            _close_quietly(rows)
+            stack.__exit__(*sys.exc_info())
+            if handle.cancelled and isinstance(e, Exception):
+                raise QueryCancelled(handle.query_id, handle.cancel_reason) from e
+            raise
+        else:
+            handle.finished_at = time.perf_counter()
+            stack.close()
+
+    return handle, fields, batches()
+
+
+def run_query(
+    connection_string: str,
+    query: str,
+    cache_ttl: Optional[float] = None,
+    **options,
+) -> Dict[str, Any]:
+    """Run a query to completion (up to max_rows) and return the page plus
+    its timing and row metadata, in the adapter page shape ("fields"/"rows").
+
+    Read-only statements are answered from the result cache when an entry
+    for the same statement, parameters and schema version is still live
+    (writes and DDL run through start_query invalidate the target's entries).
+    """
+    started = time.perf_counter()
+    db_type = DBManager.get_db_type(connection_string)
+    ttl = config.RESULT_CACHE_TTL if cache_ttl is None else cache_ttl
+    read_only = is_read_only(db_type, query)
+
+    key = None
+    if read_only and ttl > 0:
+        version = result_cache.schema_version(
+            connection_string, lambda: DBManager.schema_version(connection_string)
+        )
+        key = result_cache.key_for(
+            connection_string,
+            version,
+            query,
+            options.get("params"),
+            options.get("max_rows", config.QUERY_DEFAULT_MAX_ROWS),
+        )
+        cached = result_cache.get(key)
+        if cached is not None:
+            result = dict(cached)
+            result.update({
+                "query_id": options.get("query_id") or uuid.uuid4().hex,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+                "execute_ms": 0.0,
+                "rows_scanned": 0,
+                "cached": True,
+            })
+            return result
+
+    handle, fields, batches = start_query(connection_string, query, **options)
+    collected = []
+    for batch in batches:
+        collected.extend(batch)
+    if fields is None:
+        fields, collected = documents_to_rows(collected, MISSING)
+    result = {"fields": fields, "rows": collected}
+    result.update(handle.summary())
+    result["cached"] = False
+
+    if key is not None:
+        # A copy: the caller's dict is consumed by the response encoder
+        result_cache.put(key, connection_string, dict(result), ttl)
+    return result
+
+
+def ndjson_stream(
+    handle: QueryHandle,
+    fields: Optional[List[str]],
+    batches: Iterator[List[Any]],
+    exact_decimals: bool = False,
+) -> Iterator[bytes]:
+    """Newline-delimited JSON: a "fields" line, one "rows" line per batch and
+    a closing "summary" (or "error") line. Rows are arrays in field order, or
+    objects for schemaless stores; decimals are numbers unless exact_decimals."""
+    yield dumps_json({"type": "fields", "query_id": handle.query_id, "fields": fields}) + b"\n"
+    try:
+        for batch in batches:
+            if fields is None:
+                rows = batch
+            else:
+                rows = list(zip(*[convert_column(values, exact_decimals=exact_decimals) for values in zip(*batch)]))
+            yield dumps_json({"type": "rows", "rows": rows}) + b"\n"
+    except Exception as e:
+        # The status line has already been sent; report the failure in-band
+        print(f"Error streaming query {handle.query_id}: {e}")
+        yield dumps_json({"type": "error", "detail": str(e), **handle.summary()}) + b"\n"
+        return
+    yield dumps_json({"type": "summary", **handle.summary()}) + b"\n"
@@ -0,0 +1,324 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core import config
+from app.services.schema_cache import SchemaCache
+
+# Share of the confidence that comes from the names alone; the rest needs
+# sampled values to back it up
+NAME_WEIGHT = 0.3
+# Expected matching values needed before containment counts in full
+MIN_EVIDENCE = 20
+# Targets kept in the relationship cache
+_MAX_CACHED_TARGETS = 32
+
+
+class BloomFilter:
+    """Set membership in m bits with k hash positions per value (double
+    hashing over one blake2b digest): no false negatives, about
+    `error_rate` false positives at `capacity` values."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> Iterator[int]:
+        digest = hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^0-9a-z]", "", name.lower())
+
+
+def _stems(name: str) -> set:
+    """The normalized name plus naive singular forms (customers, categories, boxes)"""
+    stems = {name}
+    if name.endswith("ies") and len(name) > 3:
+        stems.add(name[:-3] + "y")
+    if name.endswith("es") and len(name) > 2:
+        stems.add(name[:-2])
+    if name.endswith("s") and len(name) > 1:
+        stems.add(name[:-1])
+    return stems
+
+
+def _type_families(column_type: Optional[str]) -> set:
+    """Coarse type families, so int4 matches bigint and varchar matches text.
+    Mongo's "ObjectId|str" style unions give several families."""
+    families = set()
+    for part in str(column_type or "").lower().split("|"):
+        part = part.strip()
+        if not part or part in ("null", "mixed"):
+            continue
+        if "uuid" in part or "uniqueidentifier" in part:
+            families.add("uuid")
+        elif "objectid" in part:
+            families.add("objectid")
+        elif any(word in part for word in ("int", "serial", "numeric", "decimal", "number", "long")):
+            families.add("number")
+        elif any(word in part for word in ("char", "text", "str")):
+            families.add("text")
+        else:
+            families.add(part)
+    return families
+
+
+def _compatible(source_type: Optional[str], target_type: Optional[str]) -> bool:
+    source, target = _type_families(source_type), _type_families(target_type)
+    # Unknown types do not rule a candidate out; the values will decide
+    return not source or not target or bool(source & target)
+
+
+def key_column(table: Dict[str, Any]) -> Optional[str]:
+    """The single-column primary key a reference would point at, if any"""
+    primary_keys = table.get("primary_keys") or []
+    return primary_keys[0] if len(primary_keys) == 1 else None
+
+
+def find_candidates(schema: Dict[str, Any], name_of: Callable[[str], str]) -> List[Dict[str, Any]]:
+    """Columns whose name and type suggest a reference to another table's
+    key: customer_id / CustomerId / customerId -> customers.<pk>, or a
+    column named like another table's non-generic key (customer_no ->
+    customers.customer_no). Columns already covered by a declared foreign
+    key are skipped. Each candidate carries a name score in (0, 1]."""
+    by_stem: Dict[str, List[str]] = {}
+    keys: Dict[str, str] = {}
+    for key, table in schema.items():
+        pk = key_column(table)
+        if pk is None:
+            continue
+        keys[key] = pk
+        for stem in _stems(_normalize(name_of(key))):
+            by_stem.setdefault(stem, []).append(key)
+    by_key_name: Dict[str, List[str]] = {}
+    for key, pk in keys.items():
+        if _normalize(pk) not in ("id", ""):
+            by_key_name.setdefault(_normalize(pk), []).append(key)
+
+    candidates = []
+    for key, table in schema.items():
+        declared = {fk.get("column") for fk in table.get("foreign_keys") or []}
+        column_types = table.get("column_types") or {}
+        for column in table.get("columns") or []:
+            if column in declared:
+                continue
+            normalized = _normalize(column)
+            proposals: Dict[str, float] = {}
+            if normalized.endswith("id") and len(normalized) > 2:
+                stem = normalized[:-2]
+                for target in {t for s in _stems(stem) for t in by_stem.get(s, [])}:
+                    pk = _normalize(keys[target])
+                    proposals[target] = 1.0 if pk in ("id", normalized) else 0.9
+            for target in by_key_name.get(normalized, []):
+                proposals.setdefault(target, 0.8)
+
+            for target, name_score in proposals.items():
+                ref_column = keys[target]
+                if target == key and ref_column == column:
+                    continue
+                target_types = schema[target].get("column_types") or {}
+                if not _compatible(column_types.get(column), target_types.get(ref_column)):
+                    continue
+                candidates.append({
+                    "from": key,
+                    "column": column,
+                    "to": target,
+                    "ref_column": ref_column,
+                    "name_score": name_score,
+                })
+    return candidates
+
+
+def plan_samples(candidates: List[Dict[str, Any]], max_queries: int) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """Pick the tables to sample within the query budget, those taking part
+    in the most candidates first. Returns ({table: {"columns", "rows"}},
+    candidates whose both tables made it)."""
+    weight: Dict[str, int] = {}
+    for candidate in candidates:
+        weight[candidate["from"]] = weight.get(candidate["from"], 0) + 1
+        weight[candidate["to"]] = weight.get(candidate["to"], 0) + 1
+    chosen = set(sorted(weight, key=lambda key: (-weight[key], key))[:max(0, max_queries)])
+    kept = [c for c in candidates if c["from"] in chosen and c["to"] in chosen]
+
+    plan: Dict[str, Dict[str, Any]] = {}
+    for candidate in kept:
+        source = plan.setdefault(candidate["from"], {"columns": set(), "rows": 0})
+        source["columns"].add(candidate["column"])
+        source["rows"] = max(source["rows"], config.INFERENCE_SAMPLE_ROWS)
+        # Referenced keys get the bigger sample: misses there cost confidence
+        target = plan.setdefault(candidate["to"], {"columns": set(), "rows": 0})
+        target["columns"].add(candidate["ref_column"])
+        target["rows"] = max(target["rows"], config.INFERENCE_KEY_SAMPLE_ROWS)
+    return plan, kept
+
+
+def _value_key(value: Any) -> Optional[str]:
+    """Comparable text for a sampled value, so 42, 42.0 and Decimal('42') match"""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        try:
+            if value == int(value):
+                return str(int(value))
+        except (OverflowError, ValueError):
+            pass
+    return str(value)
+
+
+def _lookup(document: Dict[str, Any], path: str) -> Any:
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def collect_values(fields: Optional[List[str]], batches: Iterator[List[Any]], columns) -> Tuple[Dict[str, set], int]:
+    """Distinct value keys of `columns` over sample_rows output, and the
+    number of rows read. Documents (fields None) are read by dotted path."""
+    values: Dict[str, set] = {column: set() for column in columns}
+    index = {name: i for i, name in enumerate(fields or [])}
+    rows = 0
+    for batch in batches:
+        for row in batch:
+            rows += 1
+            for column, seen in values.items():
+                if fields is None:
+                    value = _lookup(row, column)
+                elif column in index:
+                    value = row[index[column]]
+                else:
+                    continue
+                key = _value_key(value)
+                if key is not None:
+                    seen.add(key)
+    return values, rows
+
+
+def score_candidates(
+    schema: Dict[str, Any],
+    candidates: List[Dict[str, Any]],
+    samples: Dict[str, Tuple[Dict[str, set], int]],
+    name_of: Callable[[str], str],
+    min_confidence: float = config.INFERENCE_MIN_CONFIDENCE,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Check each candidate's sampled values against a Bloom filter of the
+    referenced key's sampled values and score it.
+
+    Containment is the share of distinct referencing values found among
+    the keys, scaled up by how much of the referenced table was sampled.
+    It counts in full once MIN_EVIDENCE matches were to be expected, so
+    a handful of lucky hits does not make a relationship. Returns
+    {table key: [foreign key dicts]}, best target per column."""
+    filters: Dict[Tuple[str, str], BloomFilter] = {}
+    best: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for candidate in candidates:
+        source = samples.get(candidate["from"])
+        target = samples.get(candidate["to"])
+        if source is None or target is None:
+            continue
+        referencing = source[0].get(candidate["column"]) or set()
+        keys = target[0].get(candidate["ref_column"]) or set()
+        if not referencing or not keys:
+            continue
+
+        bloom_key = (candidate["to"], candidate["ref_column"])
+        bloom = filters.get(bloom_key)
+        if bloom is None:
+            bloom = filters[bloom_key] = BloomFilter(len(keys))
+            for value in keys:
+                bloom.add(value)
+
+        matched = sum(1 for value in referencing if value in bloom)
+        # A sample shorter than the estimate means the key column was read in full
+        row_count = schema[candidate["to"]].get("row_count") or 0
+        coverage = 1.0 if target[1] >= row_count else max(target[1] / row_count, 1e-9)
+        containment = min(1.0, matched / len(referencing) / coverage)
+        reliability = min(1.0, len(referencing) * coverage / MIN_EVIDENCE)
+        confidence = round(
+            NAME_WEIGHT * candidate["name_score"] + (1 - NAME_WEIGHT) * containment * reliability, 3
+        )
+        if confidence < min_confidence:
+            continue
+        slot = (candidate["from"], candidate["column"])
+        if slot not in best or confidence > best[slot]["confidence"]:
+            best[slot] = {
+                "column": candidate["column"],
+                "ref_table": name_of(candidate["to"]),
+                "ref_column": candidate["ref_column"],
+                "inferred": True,
+                "confidence": confidence,
+            }
+
+    relationships: Dict[str, List[Dict[str, Any]]] = {}
+    for (table, _), fk in sorted(best.items()):
+        relationships.setdefault(table, []).append(fk)
+    return relationships
+
+
+def merge_inferred(schema: Dict[str, Any], relationships: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Schema with inferred foreign keys appended; tables with any are copies"""
+    merged = dict(schema)
+    for key, fks in relationships.items():
+        if key in merged:
+            table = merged[key]
+            merged[key] = {**table, "foreign_keys": list(table.get("foreign_keys") or []) + fks}
+    return merged
+
+
+class RelationshipCache:
+    """Latest inference per target, valid while the target's cached schema
+    dict is the one it was run against"""
+
+    def __init__(self, ttl: float = config.PROFILE_CACHE_TTL, max_targets: int = _MAX_CACHED_TARGETS):
+        self.ttl = ttl
+        self.max_targets = max_targets
+        self._lock = threading.Lock()
+        # target -> (schema, min confidence, result, merged schema, expires at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, connection_string: str, schema: Dict[str, Any], min_confidence: float) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        target = SchemaCache.key_for(connection_string)
+        with self._lock:
+            entry = self._entries.get(target)
+            if entry is None or entry[0] is not schema or entry[1] != min_confidence:
+                return None
+            if time.monotonic() > entry[4]:
+                del self._entries[target]
+                return None
+            self._entries.move_to_end(target)
+            return entry[2], entry[3]
+
+    def put(self, connection_string: str, schema: Dict[str, Any], min_confidence: float, result: Dict[str, Any], merged: Dict[str, Any]):
+        target = SchemaCache.key_for(connection_string)
+        with self._lock:
+            self._entries[target] = (schema, min_confidence, result, merged, time.monotonic() + self.ttl)
+            self._entries.move_to_end(target)
+            while len(self._entries) > self.max_targets:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, connection_string: str):
+        with self._lock:
+            self._entries.pop(SchemaCache.key_for(connection_string), None)
+
+
+relationship_cache = RelationshipCache()
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core import config
+from app.services.adapters.base import statement_keyword
+from app.services.encoding import dumps_json
+
+# Statements whose results may be cached, and those that change the schema
+READ_STATEMENTS = {"select", "with", "values", "table", "show"}
+DDL_STATEMENTS = {"create", "alter", "drop", "truncate", "rename", "comment"}
+
+_LITERALS = re.compile(r"'(?:''|[^'])*'|\"(?:\"\"|[^\"])*\"|`[^`]*`|\[[^\]]*\]")
+_WRITES = re.compile(r"\b(insert|update|delete|merge|into|nextval|setval|lock)\b|\bfor\s+update\b", re.IGNORECASE)
+
+
+def normalize_statement(sql: str) -> str:
+    """Collapse whitespace outside quoted literals and drop a trailing ';'.
+    Case is kept: identifiers are case-sensitive on some engines."""
+    parts = []
+    position = 0
+    for match in _LITERALS.finditer(sql):
+        parts.append(re.sub(r"\s+", " ", sql[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(re.sub(r"\s+", " ", sql[position:]))
+    return "".join(parts).strip().rstrip(";").rstrip()
+
+
+def is_read_only(db_type: str, query: str) -> bool:
+    """Conservative check that a statement only reads"""
+    if db_type == "mongodb":
+        try:
+            spec = json.loads(query)
+        except ValueError:
+            return False
+        pipeline = spec.get("aggregate") if isinstance(spec, dict) else None
+        if not isinstance(pipeline, list):
+            return isinstance(spec, dict)
+        return not any(isinstance(stage, dict) and ({"$out", "$merge"} & set(stage)) for stage in pipeline)
+    if statement_keyword(query) not in READ_STATEMENTS:
+        return False
+    return not any(_WRITES.search(part) for part in _LITERALS.split(query))
+
+
+class ResultEntry:
+    def __init__(self, result: Dict[str, Any], size: int, target: str, ttl: float):
+        self.result = result
+        self.size = size
+        self.target = target
+        self.expires_at = time.monotonic() + ttl
+
+
+class ResultCache:
+    """Results of read-only /query statements.
+
+    Keys combine the target, a schema version, the normalized statement,
+    its parameters and the row cap. Entries carry their own TTL and are
+    evicted least-recently-used first once their combined size goes over
+    `max_bytes`. DDL against a target drops its entries; the schema version
+    (re-probed at most every `version_interval` seconds) catches changes
+    made by other clients.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = config.RESULT_CACHE_MAX_BYTES,
+        version_interval: float = config.RESULT_CACHE_VERSION_INTERVAL,
+    ):
+        self.max_bytes = max_bytes
+        self.version_interval = version_interval
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, ResultEntry]" = OrderedDict()
+        self._bytes = 0
+        # target -> (probed version, probed at); target -> local DDL generation
+        self._versions: Dict[str, tuple] = {}
+        self._generations: Dict[str, int] = {}
+
+    @staticmethod
+    def target_for(connection_string: str) -> str:
+        return hashlib.sha256(connection_string.encode("utf-8")).hexdigest()
+
+    def schema_version(self, connection_string: str, probe: Callable[[], Optional[str]]) -> str:
+        """Version of the target's schema: the adapter's probe, re-run at most
+        every version_interval seconds, plus a counter bumped by local DDL"""
+        target = self.target_for(connection_string)
+        with self._lock:
+            known = self._versions.get(target)
+            generation = self._generations.get(target, 0)
+        if known is None or time.monotonic() - known[1] > self.version_interval:
+            known = (probe() or "", time.monotonic())
+            with self._lock:
+                self._versions[target] = known
+        return f"{generation}:{known[0]}"
+
+    def key_for(self, connection_string: str, version: str, query: str, params: Optional[List[Any]], max_rows: int) -> str:
+        material = dumps_json([
+            self.target_for(connection_string), version, normalize_statement(query), params, max_rows
+        ])
+        return hashlib.sha256(material).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() > entry.expires_at:
+                self._remove_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.result
+
+    def put(self, key: str, connection_string: str, result: Dict[str, Any], ttl: float):
+        if ttl <= 0:
+            return
+        size = len(dumps_json(result))
+        with self._lock:
+            self._remove_locked(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = ResultEntry(result, size, self.target_for(connection_string), ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+
+    def invalidate(self, connection_string: str):
+        """Drop every cached result for a target (after DDL or writes)"""
+        target = self.target_for(connection_string)
+        with self._lock:
+            self._generations[target] = self._generations.get(target, 0) + 1
+            self._versions.pop(target, None)
+            for key in [key for key, entry in self._entries.items() if entry.target == target]:
+                self._remove_locked(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._versions.clear()
+
+    def _remove_locked(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+result_cache = ResultCache()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core import config
+
+# Striped locks so concurrent misses for one target introspect only once
+_LOCK_STRIPES = 64
+
+
+class CacheEntry:
+    def __init__(self, schema: Dict[str, Any], size: int, markers: Optional[Dict[str, str]] = None):
+        self.schema = schema
+        self.size = size
+        self.markers = markers
+        self.stored_at = time.monotonic()
+        self.stale = False
+
+
+class SchemaCache:
+    """In-process cache of fetch_schema results.
+
+    Entries are keyed by a hash of the connection string (so credentials
+    are never kept as dict keys), expire after `ttl` seconds and are
+    evicted least-recently-used first once their combined JSON size goes
+    over `max_bytes`.
+
+    Expired or invalidated entries are not served, but stay around (until
+    evicted) as the base snapshot for an incremental refresh.
+
+    The latest change markers per target are kept for `probe_interval`
+    seconds, so schema loads and version checks in that window share one
+    catalog probe.
+    """
+
+    def __init__(
+        self,
+        ttl: float = config.SCHEMA_CACHE_TTL,
+        max_bytes: int = config.SCHEMA_CACHE_MAX_BYTES,
+        probe_interval: float = config.SCHEMA_PROBE_INTERVAL,
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._probes: Dict[str, tuple] = {}
+        self._load_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    @staticmethod
+    def key_for(connection_string: str) -> str:
+        return hashlib.sha256(connection_string.encode("utf-8")).hexdigest()
+
+    def get(self, connection_string: str) -> Optional[Dict[str, Any]]:
+        """Return the cached schema if it is present, fresh and not invalidated"""
+        key = self.key_for(connection_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stale:
+                return None
+            if time.monotonic() - entry.stored_at > self.ttl:
+                entry.stale = True
+                return None
+            self._entries.move_to_end(key)
+            return entry.schema
+
+    def peek(self, connection_string: str) -> Optional[CacheEntry]:
+        """Return the entry even when stale, for use as a refresh base"""
+        with self._lock:
+            return self._entries.get(self.key_for(connection_string))
+
+    def put(
+        self,
+        connection_string: str,
+        schema: Dict[str, Any],
+        markers: Optional[Dict[str, str]] = None,
+    ):
+        key = self.key_for(connection_string)
+        size = len(json.dumps(schema, default=str))
+        with self._lock:
+            self._remove_locked(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = CacheEntry(schema, size, markers)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+
+    def change_markers(
+        self,
+        connection_string: str,
+        probe: Callable[[], Optional[Dict[str, str]]],
+        fresh: bool = False,
+    ) -> Optional[Dict[str, str]]:
+        """The target's change markers from `probe`, re-run at most every
+        probe_interval seconds (always when `fresh`)"""
+        key = self.key_for(connection_string)
+        with self._lock:
+            known = self._probes.get(key)
+        if fresh or known is None or time.monotonic() - known[1] > self.probe_interval:
+            known = (probe(), time.monotonic())
+            with self._lock:
+                expired = [
+                    target for target, (_, probed_at) in self._probes.items()
+                    if known[1] - probed_at > self.probe_interval
+                ]
+                for target in expired:
+                    del self._probes[target]
+                self._probes[key] = known
+        return known[0]
+
+    def load_lock(self, connection_string: str) -> threading.Lock:
+        """Lock held while (re)loading the schema for one target"""
+        key = self.key_for(connection_string)
+        return self._load_locks[int(key[:8], 16) % _LOCK_STRIPES]
+
+    def invalidate(self, connection_string: str):
+        """Stop serving the entry; the next read refreshes it"""
+        with self._lock:
+            self._probes.pop(self.key_for(connection_string), None)
+            entry = self._entries.get(self.key_for(connection_string))
+            if entry is not None:
+                entry.stale = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._probes.clear()
+            self._bytes = 0
+
+    def _remove_locked(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+def changed_tables(old_markers: Dict[str, str], new_markers: Dict[str, str]) -> List[str]:
+    """Keys that were added or whose marker moved since the last snapshot"""
+    return [key for key, marker in new_markers.items() if old_markers.get(key) != marker]
+
+
+def schema_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Tables added, altered and dropped between two schema dicts"""
+    return {
+        "added": {key: table for key, table in current.items() if key not in previous},
+        "altered": {
+            key: table
+            for key, table in current.items()
+            if key in previous and previous[key] != table
+        },
+        "dropped": [key for key in previous if key not in current],
+    }
+
+
+schema_cache = SchemaCache()
@@ -0,0 +1,165 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from app.services.encoding import dumps_json
+
+# Hash lists kept for recently diffed schema snapshots
+_MAX_HASHED_SCHEMAS = 16
+
+
+def normalize_table(table: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a fetch_schema table that define it: columns in order
+    with type and nullability, primary key, foreign keys and indexes. Row
+    counts, sizes, sampling statistics and layout positions are left out."""
+    column_types = table.get("column_types") or {}
+    nullable = table.get("nullable") or {}
+    normalized = {
+        "columns": [
+            [name, column_types.get(name), bool(nullable.get(name, True))]
+            for name in table.get("columns") or []
+        ],
+        "primary_keys": list(table.get("primary_keys") or []),
+        "foreign_keys": sorted(
+            [fk.get("column"), fk.get("ref_table"), fk.get("ref_column")]
+            for fk in table.get("foreign_keys") or []
+        ),
+    }
+    # Tables introspected before indexes were collected have no such key
+    if "indexes" in table:
+        normalized["indexes"] = sorted(
+            [index.get("name"), list(index.get("columns") or []), bool(index.get("unique")), bool(index.get("partial"))]
+            for index in table["indexes"]
+        )
+    return normalized
+
+
+def table_hash(table: Dict[str, Any]) -> str:
+    return hashlib.sha256(dumps_json(normalize_table(table))).hexdigest()
+
+
+class _HashMemo:
+    """Per-table hashes of recently seen schema dicts, by identity, so a
+    cached schema is hashed once however often it is diffed"""
+
+    def __init__(self, max_schemas: int = _MAX_HASHED_SCHEMAS):
+        self.max_schemas = max_schemas
+        self._lock = threading.Lock()
+        # id -> (schema, hashes); holding the schema keeps its id from being reused
+        self._memo: "OrderedDict[int, Tuple[Dict[str, Any], Dict[str, str]]]" = OrderedDict()
+
+    def hashes(self, schema: Dict[str, Any]) -> Dict[str, str]:
+        with self._lock:
+            entry = self._memo.get(id(schema))
+            if entry is not None and entry[0] is schema:
+                self._memo.move_to_end(id(schema))
+                return entry[1]
+        hashes = {key: table_hash(table) for key, table in schema.items()}
+        with self._lock:
+            self._memo[id(schema)] = (schema, hashes)
+            while len(self._memo) > self.max_schemas:
+                self._memo.popitem(last=False)
+        return hashes
+
+
+_hash_memo = _HashMemo()
+
+
+def table_hashes(schema: Dict[str, Any]) -> Dict[str, str]:
+    return _hash_memo.hashes(schema)
+
+
+def diff_tables(source: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    """Column, primary key and foreign key changes from one table definition to another"""
+    old, new = normalize_table(source), normalize_table(target)
+    old_columns = {name: (col_type, nullable) for name, col_type, nullable in old["columns"]}
+    new_columns = {name: (col_type, nullable) for name, col_type, nullable in new["columns"]}
+
+    changed = {}
+    for name in [name for name in old_columns if name in new_columns]:
+        (old_type, old_null), (new_type, new_null) = old_columns[name], new_columns[name]
+        change = {}
+        if old_type != new_type:
+            change["type"] = {"from": old_type, "to": new_type}
+        if old_null != new_null:
+            change["nullable"] = {"from": old_null, "to": new_null}
+        if change:
+            changed[name] = change
+
+    result: Dict[str, Any] = {}
+    added = [
+        {"name": name, "type": col_type, "nullable": nullable}
+        for name, col_type, nullable in new["columns"] if name not in old_columns
+    ]
+    dropped = [name for name, _, _ in old["columns"] if name not in new_columns]
+    if added or dropped or changed:
+        result["columns"] = {"added": added, "dropped": dropped, "changed": changed}
+    kept_order = [name for name, _, _ in new["columns"] if name in old_columns]
+    if kept_order != [name for name, _, _ in old["columns"] if name in new_columns]:
+        result["column_order"] = {"from": [c[0] for c in old["columns"]], "to": [c[0] for c in new["columns"]]}
+    if old["primary_keys"] != new["primary_keys"]:
+        result["primary_keys"] = {"from": old["primary_keys"], "to": new["primary_keys"]}
+
+    def fk_dicts(fks: List[List[Any]]) -> List[Dict[str, Any]]:
+        return [{"column": c, "ref_table": t, "ref_column": r} for c, t, r in fks]
+
+    added_fks = [fk for fk in new["foreign_keys"] if fk not in old["foreign_keys"]]
+    dropped_fks = [fk for fk in old["foreign_keys"] if fk not in new["foreign_keys"]]
+    if added_fks or dropped_fks:
+        result["foreign_keys"] = {"added": fk_dicts(added_fks), "dropped": fk_dicts(dropped_fks)}
+
+    if "indexes" in old and "indexes" in new:
+        # A changed definition shows as dropped and re-added under its name
+        added_indexes = [index for index in new["indexes"] if index not in old["indexes"]]
+        dropped_indexes = [index for index in old["indexes"] if index not in new["indexes"]]
+        if added_indexes or dropped_indexes:
+            result["indexes"] = {
+                "added": [{"name": n, "columns": c, "unique": u, "partial": p} for n, c, u, p in added_indexes],
+                "dropped": [n for n, _, _, _ in dropped_indexes],
+            }
+    return result
+
+
+def diff_schemas(
+    source: Dict[str, Any],
+    target: Dict[str, Any],
+    include_definitions: bool = False,
+) -> Dict[str, Any]:
+    """Tables added, dropped and altered going from `source` to `target`.
+
+    Tables are matched by schema key and compared by the hash of their
+    normalized definition; only tables whose hashes differ are compared
+    column by column. With include_definitions, added tables carry their
+    full definition.
+    """
+    source_hashes, target_hashes = table_hashes(source), table_hashes(target)
+    added = sorted(key for key in target_hashes if key not in source_hashes)
+    dropped = sorted(key for key in source_hashes if key not in target_hashes)
+    altered = {}
+    unchanged = 0
+    for key in sorted(source_hashes.keys() & target_hashes.keys()):
+        if source_hashes[key] != target_hashes[key]:
+            changes = diff_tables(source[key], target[key])
+            # Empty when only one side has index metadata to compare
+            if changes:
+                altered[key] = changes
+                continue
+        unchanged += 1
+
+    result = {
+        "added": {key: target[key] for key in added} if include_definitions else added,
+        "dropped": dropped,
+        "altered": altered,
+        "summary": {
+            "source_tables": len(source_hashes),
+            "target_tables": len(target_hashes),
+            "added": len(added),
+            "dropped": len(dropped),
+            "altered": len(altered),
+            "unchanged": unchanged,
+        },
+    }
+    result["identical"] = not (added or dropped or altered)
+    return result
+
@@ -0,0 +1,238 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+from app.services.schema_cache import SchemaCache
+
+# Graphs kept for the most recently used targets
+_MAX_GRAPHS = 32
+
+
+class SchemaGraph:
+    """Foreign-key graph of one fetch_schema result.
+
+    Edges point from the referencing table to the referenced one. Built
+    once per schema snapshot: forward/reverse adjacency, strongly connected
+    components (Tarjan) and a topological order of the components with
+    referenced tables first, i.e. a valid load order.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.tables = sorted(schema)
+        self.edges: List[Dict[str, str]] = []
+        self.unresolved: List[Dict[str, str]] = []
+        self.forward: Dict[str, List[str]] = {key: [] for key in self.tables}
+        self.reverse: Dict[str, List[str]] = {key: [] for key in self.tables}
+
+        by_name: Dict[str, List[str]] = {}
+        for key in self.tables:
+            by_name.setdefault(key.split(".")[-1], []).append(key)
+
+        forward = {key: set() for key in self.tables}
+        reverse = {key: set() for key in self.tables}
+        for key in self.tables:
+            for fk in schema[key].get("foreign_keys") or []:
+                target = self._resolve(key, fk.get("ref_table"), by_name)
+                edge = {
+                    "from": key,
+                    "to": target or fk.get("ref_table"),
+                    "column": fk.get("column"),
+                    "ref_column": fk.get("ref_column"),
+                }
+                if target is None:
+                    self.unresolved.append(edge)
+                    continue
+                self.edges.append(edge)
+                forward[key].add(target)
+                reverse[target].add(key)
+        for key in self.tables:
+            self.forward[key] = sorted(forward[key])
+            self.reverse[key] = sorted(reverse[key])
+
+        self.edges_from: Dict[str, List[Dict[str, str]]] = {key: [] for key in self.tables}
+        self.edges_to: Dict[str, List[Dict[str, str]]] = {key: [] for key in self.tables}
+        for edge in self.edges:
+            self.edges_from[edge["from"]].append(edge)
+            self.edges_to[edge["to"]].append(edge)
+
+        self.components = self._strongly_connected()
+        self.component_of = {
+            key: index for index, component in enumerate(self.components) for key in component
+        }
+
+    def _resolve(self, source: str, ref_table: Optional[str], by_name: Dict[str, List[str]]) -> Optional[str]:
+        """Schema key for a foreign key's ref_table, which adapters report
+        without its schema; prefer a match in the referencing table's schema"""
+        if not ref_table:
+            return None
+        if ref_table in self.schema:
+            return ref_table
+        candidates = by_name.get(ref_table.split(".")[-1], [])
+        if len(candidates) == 1:
+            return candidates[0]
+        prefix = source.rsplit(".", 1)[0] + "." if "." in source else ""
+        for candidate in candidates:
+            if candidate.startswith(prefix):
+                return candidate
+        return candidates[0] if candidates else None
+
+    def _strongly_connected(self) -> List[List[str]]:
+        """Iterative Tarjan. Components come out referenced-first: each one
+        after every component it can reach."""
+        index_of: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack = set()
+        stack: List[str] = []
+        components = []
+        counter = 0
+
+        for root in self.tables:
+            if root in index_of:
+                continue
+            work = [(root, iter(self.forward[root]))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, neighbors = work[-1]
+                advanced = False
+                for neighbor in neighbors:
+                    if neighbor not in index_of:
+                        index_of[neighbor] = lowlink[neighbor] = counter
+                        counter += 1
+                        stack.append(neighbor)
+                        on_stack.add(neighbor)
+                        work.append((neighbor, iter(self.forward[neighbor])))
+                        advanced = True
+                        break
+                    if neighbor in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[neighbor])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+        return components
+
+    def resolve(self, table: str) -> Optional[str]:
+        """Schema key for a key or bare table name"""
+        if table in self.schema:
+            return table
+        matches = [key for key in self.tables if key.split(".")[-1] == table]
+        return matches[0] if len(matches) == 1 else None
+
+    def topological_order(self) -> List[str]:
+        """Tables with referenced tables first (members of a cycle stay together)"""
+        return [key for component in self.components for key in component]
+
+    def cycles(self) -> List[List[str]]:
+        """Groups of tables that reference each other, including self-references"""
+        return [
+            component
+            for component in self.components
+            if len(component) > 1 or component[0] in self.forward[component[0]]
+        ]
+
+    def orphans(self) -> List[str]:
+        """Tables with no foreign keys in either direction"""
+        return [key for key in self.tables if not self.forward[key] and not self.reverse[key]]
+
+    def neighborhood(self, table: str, hops: int = 1, direction: str = "both") -> Dict[str, Any]:
+        """Tables within `hops` foreign keys of `table` ("out" follows
+        references, "in" follows referrers) and the edges between them"""
+        distances = {table: 0}
+        queue = deque([table])
+        while queue:
+            node = queue.popleft()
+            if distances[node] >= hops:
+                continue
+            neighbors = []
+            if direction in ("out", "both"):
+                neighbors.extend(self.forward[node])
+            if direction in ("in", "both"):
+                neighbors.extend(self.reverse[node])
+            for neighbor in neighbors:
+                if neighbor not in distances:
+                    distances[neighbor] = distances[node] + 1
+                    queue.append(neighbor)
+        edges = [
+            edge
+            for key in distances
+            for edge in self.edges_from[key]
+            if edge["to"] in distances
+        ]
+        return {"center": table, "hops": hops, "direction": direction, "tables": distances, "edges": edges}
+
+    def join_path(self, source: str, target: str) -> Optional[List[Dict[str, str]]]:
+        """Fewest foreign-key joins between two tables, in either direction.
+        Returns the edges in walking order, or None if they are not connected."""
+        if source == target:
+            return []
+        previous: Dict[str, Optional[tuple]] = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            steps = [(edge["to"], edge) for edge in self.edges_from[node]]
+            steps += [(edge["from"], edge) for edge in self.edges_to[node]]
+            for neighbor, edge in steps:
+                if neighbor in previous:
+                    continue
+                previous[neighbor] = (node, edge)
+                if neighbor == target:
+                    path = []
+                    while previous[neighbor] is not None:
+                        neighbor, edge = previous[neighbor]
+                        path.append(edge)
+                    return path[::-1]
+                queue.append(neighbor)
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "tables": len(self.tables),
+            "edges": len(self.edges),
+            "unresolved_edges": self.unresolved,
+            "components": len(self.components),
+            "cycles": len(self.cycles()),
+            "orphans": len(self.orphans()),
+        }
+
+
+class GraphIndex:
+    """SchemaGraph per target, rebuilt when the cached schema changes"""
+
+    def __init__(self, max_graphs: int = _MAX_GRAPHS):
+        self.max_graphs = max_graphs
+        self._lock = threading.Lock()
+        self._graphs: "OrderedDict[str, SchemaGraph]" = OrderedDict()
+
+    def graph_for(self, connection_string: str, schema: Dict[str, Any]) -> SchemaGraph:
+        key = SchemaCache.key_for(connection_string)
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None and graph.schema is schema:
+                self._graphs.move_to_end(key)
+                return graph
+        # Build outside the lock; a concurrent duplicate build is harmless
+        graph = SchemaGraph(schema)
+        with self._lock:
+            self._graphs[key] = graph
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+        return graph
+
+
+graph_index = GraphIndex()
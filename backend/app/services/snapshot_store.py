@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core import config
+from app.services.adapters.base import chunked
+
+# Per-table fields that change without the definition changing; stored per
+# version instead of in the deduplicated definition
+VOLATILE_FIELDS = (
+    "row_count", "approximate", "presence", "sampled_documents",
+    "size_bytes", "index_bytes", "index_sizes",
+)
+
+# SQLite's default limit on bound parameters is 999
+_IN_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL UNIQUE,
+    db_type TEXT
+);
+CREATE TABLE IF NOT EXISTS definitions (
+    hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target_id INTEGER NOT NULL REFERENCES targets(id),
+    created_at REAL NOT NULL,
+    fingerprint TEXT NOT NULL,
+    table_count INTEGER NOT NULL,
+    tables BLOB NOT NULL,
+    stats BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_target ON versions(target_id, id);
+"""
+
+
+def _pack(payload: Any) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+def split_table(table: Dict[str, Any]) -> Tuple[str, bytes, Dict[str, Any]]:
+    """(content hash, compressed definition, volatile fields) of one table"""
+    definition = {key: value for key, value in table.items() if key not in VOLATILE_FIELDS}
+    stats = {key: table[key] for key in VOLATILE_FIELDS if key in table}
+    canonical = json.dumps(definition, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest(), zlib.compress(canonical), stats
+
+
+class SnapshotStore:
+    """Versioned schema snapshots in a local SQLite file.
+
+    Every introspection is recorded as a version of its target (identified
+    by a hash of the connection string, so no credentials are stored).
+    Table definitions are stored once per content hash, zlib-compressed;
+    a version holds its table -> hash map and the volatile per-table fields
+    (row counts, sampling statistics). SQLite's locking makes the file safe
+    to share between worker processes.
+    """
+
+    def __init__(self, path: str = config.SNAPSHOT_DB_PATH, max_versions: int = config.SNAPSHOT_MAX_VERSIONS):
+        self.path = path
+        self.max_versions = max_versions
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        # Recording runs on one background thread, off the request path
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-writer")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @staticmethod
+    def target_for(connection_string: str) -> str:
+        return hashlib.sha256(connection_string.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, connection_string: str, db_type: str, schema: Dict[str, Any]):
+        """Record a version in the background; failures are logged, not raised"""
+        if not self.enabled:
+            return
+        self._writer.submit(self._record_quietly, connection_string, db_type, schema)
+
+    def _record_quietly(self, connection_string: str, db_type: str, schema: Dict[str, Any]):
+        try:
+            self.record(connection_string, db_type, schema)
+        except Exception as e:
+            print(f"Error recording schema snapshot: {e}")
+
+    def record(self, connection_string: str, db_type: str, schema: Dict[str, Any]) -> int:
+        """Store a schema as the target's newest version and return its id"""
+        tables, stats, bodies = {}, {}, {}
+        for key, table in schema.items():
+            digest, body, volatile = split_table(table)
+            tables[key] = digest
+            bodies[digest] = body
+            if volatile:
+                stats[key] = volatile
+        fingerprint = hashlib.sha256(
+            json.dumps(sorted(tables.items()), separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO targets (target, db_type) VALUES (?, ?) "
+                "ON CONFLICT(target) DO UPDATE SET db_type = excluded.db_type",
+                (self.target_for(connection_string), db_type),
+            )
+            target_id = conn.execute(
+                "SELECT id FROM targets WHERE target = ?", (self.target_for(connection_string),)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO definitions (hash, body) VALUES (?, ?)", list(bodies.items())
+            )
+            version_id = conn.execute(
+                "INSERT INTO versions (target_id, created_at, fingerprint, table_count, tables, stats) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (target_id, time.time(), fingerprint, len(tables), _pack(tables), _pack(stats)),
+            ).lastrowid
+            if self.max_versions > 0:
+                conn.execute(
+                    "DELETE FROM versions WHERE target_id = ? AND id NOT IN "
+                    "(SELECT id FROM versions WHERE target_id = ? ORDER BY id DESC LIMIT ?)",
+                    (target_id, target_id, self.max_versions),
+                )
+            return version_id
+
+    def versions(self, connection_string: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """The target's versions, newest first"""
+        if not self.enabled:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT v.id, v.created_at, v.fingerprint, v.table_count FROM versions v "
+                "JOIN targets t ON t.id = v.target_id WHERE t.target = ? ORDER BY v.id DESC LIMIT ?",
+                (self.target_for(connection_string), limit),
+            ).fetchall()
+        return [
+            {"version": row[0], "created_at": row[1], "fingerprint": row[2], "table_count": row[3]}
+            for row in rows
+        ]
+
+    def load(self, connection_string: str, version: Optional[int] = None) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(schema, version info) of the given or newest version of the
+        target, or None if there is no such version. Never touches the
+        target database."""
+        if not self.enabled:
+            return None
+        query = (
+            "SELECT v.id, v.created_at, v.fingerprint, v.table_count, v.tables, v.stats, t.db_type "
+            "FROM versions v JOIN targets t ON t.id = v.target_id WHERE t.target = ?"
+        )
+        params: List[Any] = [self.target_for(connection_string)]
+        if version is not None:
+            query += " AND v.id = ?"
+            params.append(version)
+        query += " ORDER BY v.id DESC LIMIT 1"
+
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            tables, stats = _unpack(row[4]), _unpack(row[5])
+            bodies = {}
+            for batch in chunked(sorted(set(tables.values())), _IN_BATCH):
+                placeholders = ", ".join("?" * len(batch))
+                bodies.update(conn.execute(
+                    f"SELECT hash, body FROM definitions WHERE hash IN ({placeholders})", batch
+                ).fetchall())
+
+        schema = {}
+        for key, digest in tables.items():
+            table = json.loads(zlib.decompress(bodies[digest]))
+            table.update(stats.get(key, {}))
+            schema[key] = table
+        info = {
+            "version": row[0],
+            "created_at": row[1],
+            "fingerprint": row[2],
+            "table_count": row[3],
+            "db_type": row[6],
+        }
+        return schema, info
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,150 @@
+import os
+from typing import Any, Dict, List
+from urllib.parse import urlparse, urlunparse
+
+from app.services.db_manager import DBManager
+from benchmarks.generators import (
+    ROWS_TABLE,
+    TABLE_PREFIX,
+    create_table_sql,
+    generate_rows,
+    generate_schema,
+    rows_table,
+    sample_document,
+)
+
+# Rows per bulk_insert call, and tables created per transaction (Postgres
+# holds a lock per created table until commit)
+INSERT_BATCH = 10000
+DDL_BATCH = 500
+
+
+def fixture_url(base_url: str, tables: int, rows: int, fixture_dir: str) -> str:
+    """Connection string of the fixture database for one size. Every size
+    gets its own database (file for SQLite), so fixtures survive between runs."""
+    if DBManager.get_db_type(base_url) == "sqlite":
+        return f"sqlite:///{os.path.join(fixture_dir, f'bench_{tables}_{rows}.sqlite3')}"
+    parsed = urlparse(base_url)
+    name = parsed.path.lstrip("/") or "dbstru_bench"
+    return urlunparse(parsed._replace(path=f"/{name}_{tables}_{rows}"))
+
+
+def _create_database(base_url: str, url: str):
+    """Create the fixture database on the server if it does not exist yet"""
+    db_type = DBManager.get_db_type(url)
+    if db_type in ("sqlite", "mongodb"):
+        # Created on first write
+        return
+    name = urlparse(url).path.lstrip("/")
+    adapter = DBManager.get_adapter(db_type)
+    conn = adapter.connect(base_url)
+    if conn is None:
+        raise ConnectionError(f"Failed to connect to {db_type}")
+    try:
+        cursor = conn.cursor()
+        if db_type == "postgresql":
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+        else:
+            cursor.execute("SELECT 1 FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = %s", (name,))
+        if cursor.fetchone() is None:
+            adapter.create_database(conn, name)
+    finally:
+        adapter.close(conn)
+
+
+def _drop(conn, db_type: str, names: List[str]):
+    if db_type == "mongodb":
+        for name in names:
+            conn.drop_collection(name)
+        return
+    cursor = conn.cursor()
+    if db_type == "mysql":
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for name in names:
+        if db_type == "postgresql":
+            cursor.execute(f'DROP TABLE IF EXISTS "{name}" CASCADE')
+        elif db_type == "mysql":
+            cursor.execute(f"DROP TABLE IF EXISTS `{name}`")
+        else:
+            cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+    if db_type == "mysql":
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+
+
+def _create(conn, db_type: str, specs: List[Dict[str, Any]]):
+    if db_type == "mongodb":
+        for spec in specs:
+            if spec["name"] != ROWS_TABLE:
+                conn[spec["name"]].insert_one(sample_document(spec))
+        return
+    cursor = conn.cursor()
+    for position, spec in enumerate(specs, 1):
+        cursor.execute(create_table_sql(spec, db_type))
+        if position % DDL_BATCH == 0:
+            conn.commit()
+    conn.commit()
+
+
+def _analyze(conn, db_type: str):
+    """Refresh catalog statistics so row estimates match the loaded data"""
+    if db_type == "mongodb":
+        return
+    cursor = conn.cursor()
+    if db_type == "mysql":
+        cursor.execute(f"ANALYZE TABLE `{ROWS_TABLE}`")
+        cursor.fetchall()
+    else:
+        cursor.execute("ANALYZE")
+    conn.commit()
+
+
+def ensure_fixture(base_url: str, tables: int, rows: int, fixture_dir: str, reload: bool = False) -> str:
+    """Build (or reuse) the fixture for one size and return its connection string.
+
+    The fixture is generate_schema(tables) plus ROWS_TABLE holding `rows`
+    rows. An existing fixture is reused when it holds exactly those tables
+    and row count. Only bench_* tables are ever dropped: a database holding
+    anything else is refused, since its tables would skew the numbers.
+    """
+    url = fixture_url(base_url, tables, rows, fixture_dir)
+    db_type = DBManager.get_db_type(url)
+    adapter = DBManager.get_adapter(db_type)
+    if db_type == "sqlite":
+        os.makedirs(fixture_dir, exist_ok=True)
+    else:
+        _create_database(base_url, url)
+
+    specs = generate_schema(tables) + [rows_table()]
+    expected = {spec["name"] for spec in specs}
+
+    conn = adapter.connect(url)
+    if conn is None:
+        raise ConnectionError(f"Failed to connect to {db_type}")
+    try:
+        present = {adapter.table_ref(key)["name"]: key for key in adapter.list_tables(conn)}
+        foreign = sorted(name for name in present if not name.startswith((TABLE_PREFIX, ROWS_TABLE)))
+        if foreign:
+            raise RuntimeError(
+                f"Fixture database {urlparse(url).path.lstrip('/')} holds tables the benchmarks did not create: "
+                f"{', '.join(foreign[:5])}"
+            )
+        if not reload and set(present) == expected and adapter.count_rows(conn, present[ROWS_TABLE], 600000) == rows:
+            return url
+
+        print(f"Loading {db_type} fixture: {tables} tables, {rows} rows")
+        # Children first, so Postgres and SQLite never see a dangling reference
+        _drop(conn, db_type, sorted(present, reverse=True))
+        _create(conn, db_type, specs)
+
+        columns = [name for name, _ in rows_table()["columns"]]
+        if db_type == "mongodb":
+            # The row id doubles as the document _id, which keyset paging seeks on
+            columns = ["_id" if name == "id" else name for name in columns]
+        for start in range(1, rows + 1, INSERT_BATCH):
+            batch = list(generate_rows(min(INSERT_BATCH, rows - start + 1), start=start))
+            adapter.bulk_insert(conn, ROWS_TABLE, columns, batch)
+        _analyze(conn, db_type)
+        return url
+    finally:
+        adapter.close(conn)
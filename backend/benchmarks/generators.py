@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+# Every generated object is named bench_*, so fixture loaders only ever drop their own tables
+TABLE_PREFIX = "bench_t"
+ROWS_TABLE = "bench_rows"
+
+# Column kinds and their declared type per dialect. MySQL gets TEXT rather
+# than VARCHAR so wide tables stay under InnoDB's 65,535-byte row limit.
+TYPES = {
+    "bigint": {"postgresql": "bigint", "mysql": "bigint", "sqlite": "INTEGER"},
+    "int": {"postgresql": "integer", "mysql": "int", "sqlite": "INTEGER"},
+    "text": {"postgresql": "text", "mysql": "text", "sqlite": "TEXT"},
+    "numeric": {"postgresql": "numeric(12,2)", "mysql": "decimal(12,2)", "sqlite": "NUMERIC"},
+    "timestamp": {"postgresql": "timestamp", "mysql": "datetime", "sqlite": "TEXT"},
+    "bool": {"postgresql": "boolean", "mysql": "tinyint(1)", "sqlite": "INTEGER"},
+}
+_KINDS = ["int", "text", "text", "numeric", "timestamp", "bool"]
+
+# Foreign keys per table: most tables reference one or two others, a few many
+_FAN_OUT = [0, 1, 2, 3, 4, 6]
+_FAN_OUT_WEIGHTS = [25, 35, 22, 10, 5, 3]
+
+_WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+_EPOCH = datetime(2024, 1, 1)
+
+
+def table_name(index: int) -> str:
+    return f"{TABLE_PREFIX}{index:05d}"
+
+
+def generate_schema(
+    tables: int,
+    seed: int = 0,
+    wide_ratio: float = 0.02,
+    wide_columns: int = 120,
+) -> List[Dict[str, Any]]:
+    """Deterministic synthetic schema of `tables` table specs, parents first.
+
+    Each spec is {"name", "columns": [(name, kind)], "primary_key",
+    "foreign_keys": [(column, ref_table)]}. Referenced tables are picked by
+    preferential attachment, so a few hub tables (the "users" and
+    "accounts" of a real schema) collect most of the incoming keys; about
+    wide_ratio of the tables get wide_columns columns.
+    """
+    rng = random.Random(f"{seed}:{tables}")
+    specs: List[Dict[str, Any]] = []
+    # Each table appears once plus once per incoming key, so a uniform pick is degree-weighted
+    attachment: List[int] = []
+    for index in range(tables):
+        name = table_name(index)
+        wide = index > 0 and rng.random() < wide_ratio
+        width = wide_columns if wide else rng.randint(3, 12)
+        columns = [("id", "bigint")] + [(f"c{j:03d}", rng.choice(_KINDS)) for j in range(width)]
+
+        foreign_keys = []
+        wanted = min(index, rng.choices(_FAN_OUT, _FAN_OUT_WEIGHTS)[0])
+        parents: List[int] = []
+        while len(parents) < wanted:
+            parent = rng.choice(attachment)
+            if parent not in parents:
+                parents.append(parent)
+        for parent in sorted(parents):
+            column = f"{table_name(parent)}_id"
+            columns.append((column, "bigint"))
+            foreign_keys.append((column, table_name(parent)))
+            attachment.append(parent)
+
+        attachment.append(index)
+        specs.append({"name": name, "columns": columns, "primary_key": "id", "foreign_keys": foreign_keys})
+    return specs
+
+
+def rows_table() -> Dict[str, Any]:
+    """Spec of the large-row-count fixture paged by the table-data cases"""
+    return {
+        "name": ROWS_TABLE,
+        "columns": [
+            ("id", "bigint"),
+            ("account_id", "int"),
+            ("kind", "text"),
+            ("amount", "numeric"),
+            ("note", "text"),
+            ("created_at", "timestamp"),
+            ("flagged", "bool"),
+        ],
+        "primary_key": "id",
+        "foreign_keys": [],
+    }
+
+
+def generate_rows(count: int, seed: int = 0, start: int = 1) -> Iterator[tuple]:
+    """Deterministic rows for rows_table(), ids start..start+count-1"""
+    rng = random.Random(f"{seed}:rows:{start}")
+    for row_id in range(start, start + count):
+        note = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 16)))
+        yield (
+            row_id,
+            rng.randint(1, 50000),
+            rng.choice(_WORDS),
+            round(rng.uniform(0, 10000), 2),
+            note,
+            (_EPOCH + timedelta(seconds=row_id * 37)).strftime("%Y-%m-%d %H:%M:%S"),
+            rng.random() < 0.1,
+        )
+
+
+def _quote(name: str, dialect: str) -> str:
+    return f"`{name}`" if dialect == "mysql" else f'"{name}"'
+
+
+def create_table_sql(spec: Dict[str, Any], dialect: str) -> str:
+    """CREATE TABLE for one spec, with its primary and foreign keys inline.
+    MySQL indexes the foreign key columns itself; the others do not."""
+    q = lambda name: _quote(name, dialect)
+    parts = [f"{q(name)} {TYPES[kind][dialect]}" for name, kind in spec["columns"]]
+    parts.append(f"PRIMARY KEY ({q(spec['primary_key'])})")
+    for column, ref_table in spec["foreign_keys"]:
+        parts.append(f"FOREIGN KEY ({q(column)}) REFERENCES {q(ref_table)} ({q('id')})")
+    return f"CREATE TABLE {q(spec['name'])} ({', '.join(parts)})"
+
+
+def sample_document(spec: Dict[str, Any], seed: int = 0) -> Dict[str, Any]:
+    """One document with every column of `spec`, so schema inference on the
+    collection sees all its fields"""
+    rng = random.Random(f"{seed}:{spec['name']}")
+    values = {
+        "bigint": lambda: rng.randint(1, 10 ** 9),
+        "int": lambda: rng.randint(1, 50000),
+        "text": lambda: rng.choice(_WORDS),
+        "numeric": lambda: round(rng.uniform(0, 10000), 2),
+        "timestamp": lambda: _EPOCH + timedelta(seconds=rng.randint(0, 10 ** 8)),
+        "bool": lambda: rng.random() < 0.5,
+    }
+    return {name: values[kind]() for name, kind in spec["columns"]}
@@ -0,0 +1,268 @@
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services.adapters.base import BaseAdapter, chunked, empty_table_schema, index_entry
+from app.services.db_manager import DBManager
+
+# Below SQLite's default bound-parameter limit on old builds (999)
+_IN_CHUNK = 500
+
+
+def sqlite_path(connection_string: str) -> str:
+    """File path of a connection string: sqlite:///relative/path or sqlite:////absolute/path"""
+    return connection_string[len("sqlite:///"):]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteAdapter(BaseAdapter):
+    """Read-side stand-in used by the benchmarks when no database server is
+    available. Introspection reads the catalog in a few bulk queries through
+    SQLite's pragma table functions, like the server adapters do through
+    their information schemas; DDL through the API is not supported."""
+
+    db_type = "sqlite"
+
+    def connect(self, connection_string: str):
+        try:
+            # Pooled connections move between worker threads
+            conn = sqlite3.connect(sqlite_path(connection_string), check_same_thread=False)
+            # SQLite parses the whole schema on a connection's first catalog
+            # access; do it here so it counts as connecting, like a server handshake
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            return conn
+        except Exception as e:
+            print(f"SQLite Connection failed: {e}")
+            return None
+
+    def list_tables(self, conn) -> List[str]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+        """)
+        return [row[0] for row in cursor.fetchall()]
+
+    def fetch_schema(self, conn) -> dict:
+        return self.fetch_tables(conn)
+
+    def _catalog(self, cursor, sql: str, tables: Optional[List[str]]) -> List[tuple]:
+        """Rows of a catalog query over m (sqlite_master), for all tables or
+        for `tables` in IN-list chunks"""
+        base = f"{sql} WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'"
+        if tables is None:
+            cursor.execute(base)
+            return cursor.fetchall()
+        rows = []
+        for chunk in chunked(tables, _IN_CHUNK):
+            cursor.execute(f"{base} AND m.name IN ({', '.join('?' * len(chunk))})", chunk)
+            rows.extend(cursor.fetchall())
+        return rows
+
+    def fetch_tables(self, conn, tables: Optional[List[str]] = None) -> dict:
+        cursor = conn.cursor()
+        schema: Dict[str, Any] = {}
+
+        columns = self._catalog(cursor, """
+            SELECT m.name, p.name, p.type, p."notnull", p.pk
+            FROM sqlite_master m JOIN pragma_table_info(m.name) p
+        """, tables)
+        primary: Dict[str, List[tuple]] = {}
+        for table, column, data_type, not_null, pk in columns:
+            entry = schema.get(table)
+            if entry is None:
+                entry = schema[table] = empty_table_schema()
+            entry["columns"].append(column)
+            entry["column_types"][column] = data_type.lower() or "any"
+            entry["nullable"][column] = not not_null and not pk
+            if pk:
+                primary.setdefault(table, []).append((pk, column))
+        for table, keys in primary.items():
+            schema[table]["primary_keys"] = [column for _, column in sorted(keys)]
+
+        foreign_keys = self._catalog(cursor, """
+            SELECT m.name, f."from", f."table", f."to"
+            FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) f
+        """, tables)
+        for table, column, ref_table, ref_column in foreign_keys:
+            if table in schema:
+                schema[table]["foreign_keys"].append({
+                    "column": column,
+                    "ref_table": ref_table,
+                    "ref_column": ref_column or "rowid",
+                })
+
+        indexes = self._catalog(cursor, """
+            SELECT m.name, l.name, l."unique", l.origin, l.partial, i.name
+            FROM sqlite_master m
+            JOIN pragma_index_list(m.name) l
+            JOIN pragma_index_info(l.name) i
+        """, tables)
+        by_index: Dict[tuple, Dict[str, Any]] = {}
+        for table, index, unique, origin, partial, column in indexes:
+            entry = by_index.get((table, index))
+            if entry is None:
+                entry = by_index[(table, index)] = {
+                    "unique": unique, "primary": origin == "pk", "partial": partial, "columns": []
+                }
+            entry["columns"].append(column)
+        for (table, index), entry in sorted(by_index.items()):
+            if table in schema:
+                schema[table]["indexes"].append(index_entry(
+                    index, entry["columns"], entry["unique"], entry["primary"], entry["partial"], "btree"
+                ))
+        for table, entry in schema.items():
+            # INTEGER PRIMARY KEY is the rowid itself and has no index of its own
+            if entry["primary_keys"] and not any(index["primary"] for index in entry["indexes"]):
+                entry["indexes"].insert(0, index_entry("rowid", entry["primary_keys"], primary=True, method="btree"))
+
+        # Row estimates exist once ANALYZE has run; the first number is the table's row count
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone():
+            cursor.execute("SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl")
+            for table, row_count in cursor.fetchall():
+                if table in schema:
+                    schema[table]["row_count"] = row_count or 0
+        return schema
+
+    def count_rows(self, conn, table_key: str, timeout_ms: int) -> int:
+        """Exact COUNT(*); SQLite runs in-process, so there is nothing to time out"""
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {_quote(table_key)}")
+        return cursor.fetchone()[0]
+
+    def _columns(self, cursor, table_name: str) -> List[Dict[str, Any]]:
+        cursor.execute("SELECT name, type, pk FROM pragma_table_info(?) ORDER BY cid", (table_name,))
+        return [{"name": row[0], "type": row[1].lower(), "pk": row[2]} for row in cursor.fetchall()]
+
+    def get_table_data(self, conn, table_name: str, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        try:
+            cursor = conn.cursor()
+            columns = self._columns(cursor, table_name)
+            cursor.execute(f"SELECT COUNT(*) FROM {_quote(table_name)}")
+            total = cursor.fetchone()[0]
+
+            cursor.execute(f"SELECT * FROM {_quote(table_name)} LIMIT ? OFFSET ?", (limit, offset))
+            rows = cursor.fetchall()
+
+            return {
+                "fields": [col[0] for col in cursor.description],
+                "rows": rows,
+                "columns": [{"name": col["name"], "type": col["type"]} for col in columns],
+                "total": total,
+                "limit": limit,
+                "offset": offset,
+                "hasMore": (offset + limit) < total
+            }
+        except Exception as e:
+            print(f"Error fetching table data: {e}")
+            raise
+
+    def get_table_data_keyset(
+        self, conn, table_name: str, limit: int = 100, after: Optional[List[Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            cursor = conn.cursor()
+            columns = self._columns(cursor, table_name)
+            key_columns = [col["name"] for col in sorted(columns, key=lambda col: col["pk"]) if col["pk"]]
+            if not key_columns:
+                return None
+            if after is not None and len(after) != len(key_columns):
+                raise ValueError("Pagination cursor does not match the table's primary key")
+
+            key_list = ", ".join(map(_quote, key_columns))
+            where = ""
+            if after is not None:
+                where = f"WHERE ({key_list}) > ({', '.join('?' * len(after))})"
+            cursor.execute(
+                f"SELECT * FROM {_quote(table_name)} {where} ORDER BY {key_list} LIMIT ?",
+                (*(after or ()), limit + 1)
+            )
+            rows = cursor.fetchall()
+
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            names = [col[0] for col in cursor.description]
+            key_positions = [names.index(col) for col in key_columns]
+
+            return {
+                "fields": names,
+                "rows": rows,
+                "columns": [{"name": col["name"], "type": col["type"]} for col in columns],
+                "limit": limit,
+                "hasMore": has_more,
+                "next_key": [rows[-1][i] for i in key_positions] if has_more else None
+            }
+        except Exception as e:
+            print(f"Error fetching table data: {e}")
+            raise
+
+    def stream_rows(
+        self, conn, table_name: str, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000
+    ) -> Iterator[Any]:
+        filters = filters or {}
+        where = ""
+        if filters:
+            where = "WHERE " + " AND ".join(f"{_quote(col)} = ?" for col in filters)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT * FROM {_quote(table_name)} {where}", list(filters.values())
+            )
+            yield [col[0] for col in cursor.description]
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            cursor.close()
+
+    def bulk_insert(self, conn, table_name: str, columns: Optional[List[str]], rows: List[Any]) -> int:
+        column_list = ", ".join(map(_quote, columns))
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                f"INSERT INTO {_quote(table_name)} ({column_list}) VALUES ({', '.join('?' * len(columns))})", rows
+            )
+            conn.commit()
+            return len(rows)
+        finally:
+            cursor.close()
+
+    def create_database(self, conn, db_name: str) -> bool:
+        raise NotImplementedError("The SQLite stand-in is read-only through the API")
+
+    def create_table(self, conn, table_name: str, columns: List[Dict[str, Any]]) -> bool:
+        raise NotImplementedError("The SQLite stand-in is read-only through the API")
+
+    def alter_table(self, conn, table_name: str, operations: List[Dict[str, Any]]) -> bool:
+        raise NotImplementedError("The SQLite stand-in is read-only through the API")
+
+    def drop_table(self, conn, table_name: str) -> bool:
+        raise NotImplementedError("The SQLite stand-in is read-only through the API")
+
+
+def register():
+    """Route sqlite:/// connection strings to SQLiteAdapter through DBManager,
+    in this process only; every other scheme resolves as before"""
+    get_db_type, get_adapter = DBManager.get_db_type, DBManager.get_adapter
+    if getattr(get_adapter, "__sqlite_stand_in__", False):
+        return
+
+    def db_type(connection_string: str) -> str:
+        if connection_string.lower().startswith("sqlite:///"):
+            return "sqlite"
+        return get_db_type(connection_string)
+
+    def adapter(db_type: str):
+        if db_type == "sqlite":
+            return SQLiteAdapter()
+        return get_adapter(db_type)
+
+    adapter.__sqlite_stand_in__ = True
+    DBManager.get_db_type = staticmethod(db_type)
+    DBManager.get_adapter = staticmethod(adapter)
@@ -132,7 +132,7 @@ export default function ERD({ schema }) {
           columns: columnsWithMetadata,
           rowCount: details.row_count,
         },
-        position: { x, y },
+        position: details.position || { x, y },
         draggable: true,
       });
 
@@ -6,8 +6,28 @@ export const dbService = {
     return response.data;
   },
   
-  getSchema: async (connectionString) => {
-    const response = await api.post('/schema', { connection_string: connectionString });
+  // Tables come with an ERD "position" computed by the server
+  getSchema: async (connectionString, layout = 'layered') => {
+    const response = await api.post('/schema', { connection_string: connectionString }, {
+      params: layout ? { layout } : {}
+    });
+    return response.data;
+  },
+  
+  // Table names only; options: pattern, schema, limit, offset
+  listTables: async (connectionString, options = {}) => {
+    const response = await api.post('/schema/tables', { connection_string: connectionString }, {
+      params: options
+    });
+    return response.data;
+  },
+
+  // Definitions for just the given table keys (e.g. the tables in view)
+  getTableDetails: async (connectionString, tables) => {
+    const response = await api.post('/schema/tables/batch', {
+      connection_string: connectionString,
+      tables
+    });
     return response.data;
   },
   
@@ -56,6 +76,117 @@ export const dbService = {
       }
     });
     return response.data;
+  },
+
+  // Seek-based paging: pass the previous response's next_cursor to get the next page
+  getTableDataKeyset: async (connectionString, tableName, limit = 100, cursor = null) => {
+    const response = await api.get(`/table-data/${tableName}`, {
+      params: {
+        connection_string: connectionString,
+        limit,
+        pagination: 'keyset',
+        ...(cursor ? { cursor } : {})
+      }
+    });
+    return response.data;
+  },
+
+  // Approximate column statistics from a sample of the table
+  getTableProfile: async (connectionString, tableName, sampleSize = 10000, refresh = false) => {
+    const response = await api.get(`/profile/${tableName}`, {
+      params: {
+        connection_string: connectionString,
+        sample_size: sampleSize,
+        refresh
+      }
+    });
+    return response.data;
+  },
+
+  // Ad-hoc query; options: params, max_rows, timeout_ms, query_id
+  runQuery: async (connectionString, query, options = {}) => {
+    const response = await api.post('/query', {
+      connection_string: connectionString,
+      query,
+      ...options
+    });
+    return response.data;
+  },
+
+  // Resolves with the NDJSON progress events as text once the load finishes
+  importTable: async (connectionString, tableName, file, batchSize = 5000) => {
+    const form = new FormData();
+    form.append('connection_string', connectionString);
+    form.append('batch_size', batchSize);
+    form.append('file', file);
+    const response = await api.post(`/import/${tableName}`, form, { responseType: 'text' });
+    return response.data;
+  },
+
+  cancelQuery: async (connectionString, queryId) => {
+    const response = await api.post(`/query/${queryId}/cancel`, {
+      connection_string: connectionString
+    });
+    return response.data;
+  },
+
+  // Tables within `hops` foreign keys; direction: 'in', 'out' or 'both'
+  getTableNeighborhood: async (connectionString, table, hops = 1, direction = 'both') => {
+    const response = await api.post('/graph/neighborhood', {
+      connection_string: connectionString,
+      table,
+      hops,
+      direction
+    });
+    return response.data;
+  },
+
+  // Stored schema versions, newest first; load one with getSchemaVersion
+  getSchemaSnapshots: async (connectionString) => {
+    const response = await api.post('/schema/snapshots', { connection_string: connectionString });
+    return response.data;
+  },
+
+  getSchemaVersion: async (connectionString, version) => {
+    const response = await api.post('/schema', { connection_string: connectionString }, {
+      params: { version }
+    });
+    return response.data;
+  },
+
+  // Unindexed foreign keys and duplicate/redundant indexes
+  getIndexAdvice: async (connectionString, refresh = false) => {
+    const response = await api.post('/schema/indexes/advice', { connection_string: connectionString }, {
+      params: { refresh }
+    });
+    return response.data;
+  },
+
+  // Relationships inferred from names and sampled values; options: min_confidence, max_queries, refresh
+  inferRelationships: async (connectionString, options = {}) => {
+    const response = await api.post('/schema/relationships', { connection_string: connectionString }, {
+      params: options
+    });
+    return response.data;
+  },
+
+  // Tables added, dropped and altered going from source to target
+  diffSchemas: async (sourceConnectionString, targetConnectionString, refresh = false) => {
+    const response = await api.post('/schema/diff', {
+      source: { connection_string: sourceConnectionString },
+      target: { connection_string: targetConnectionString },
+      refresh
+    });
+    return response.data;
+  },
+
+  getJoinPath: async (connectionString, source, target) => {
+    const response = await api.post('/graph/join-path', {
+      connection_string: connectionString,
+      source,
+      target
+    });
+    return response.data;
   }
 };
 